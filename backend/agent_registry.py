@@ -1,9 +1,17 @@
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+# Active runs whose core instances are kept, and how long an idle run is kept.
+MAX_ACTIVE_RUNS = 256
+RUN_SCOPE_TTL_S = 3600.0
 
 class AgentRegistry:
     def __init__(self):
         self._agents: Dict[str, Any] = {}
         self._profiles: List[Dict[str, Any]] = []
+        self.version = 0  # bumped on every registration (matchmaker index invalidation)
 
     def register(self, agent: Any):
         # Prioritize 'agent_id', then 'name', then class name
@@ -12,16 +20,75 @@ class AgentRegistry:
         # Also store profile if available
         if hasattr(agent, "profile"):
             self._profiles.append(agent.profile)
+        self.version += 1
 
     def get_agent(self, agent_id: str) -> Optional[Any]:
         return self._agents.get(agent_id)
 
+    def items(self) -> List[Tuple[str, Any]]:
+        return list(self._agents.items())
+
     def list_agents(self) -> List[Dict[str, Any]]:
         # Return profiles or basic info
         return self._profiles
 
 registry = AgentRegistry()
 
+
+class RunScopes:
+    """
+    Core instances owned by each active run, keyed by task id (the run id the
+    orchestrator mints its task token for). The gateway routes a channel's
+    messages to the instances of the run that opened it instead of the
+    process-wide "sys" agents. Scopes are closed when the run ends, expire
+    after `ttl_s` without use and are capped at `max_runs` (least recently
+    used first), so memory does not grow with the number of runs.
+    """
+    def __init__(self, max_runs: int = MAX_ACTIVE_RUNS, ttl_s: float = RUN_SCOPE_TTL_S):
+        self.max_runs = max_runs
+        self.ttl_s = ttl_s
+        self._runs: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, task_id: str, cores: Dict[str, Any]):
+        """Registers a run's cores under both their key and their own core name."""
+        by_id = {}
+        for key, core in cores.items():
+            by_id[key] = core
+            by_id[getattr(core, "core_name", None) or getattr(core, "name", key)] = core
+        with self._lock:
+            self._runs[task_id] = (time.monotonic() + self.ttl_s, by_id)
+            self._runs.move_to_end(task_id)
+            self._evict()
+
+    def close(self, task_id: str):
+        with self._lock:
+            self._runs.pop(task_id, None)
+
+    def get(self, task_id: str, core_id: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._runs.get(task_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._runs[task_id]
+                return None
+            self._runs[task_id] = (time.monotonic() + self.ttl_s, entry[1])
+            self._runs.move_to_end(task_id)
+            return entry[1].get(core_id)
+
+    def _evict(self):
+        now = time.monotonic()
+        for task_id in [t for t, (expires, _) in self._runs.items() if expires < now]:
+            del self._runs[task_id]
+        while len(self._runs) > self.max_runs:
+            self._runs.popitem(last=False)
+
+    def __len__(self):
+        return len(self._runs)
+
+run_scopes = RunScopes()
+
 # Legacy static data (kept for reference if needed)
 AGENT_REGISTRY_DATA = [
     {
@@ -12,6 +12,17 @@ class CadBuilderAgent(DisciplineCore):
     Role: Generate parametric CAD from specifications.
     """
     name = "drone-cad-v1"
+    profile = {
+        "id": "drone-cad-v1",
+        "name": "CAD Builder",
+        "role": "Design Engineer",
+        "icon": "📐",
+        "description": "Generates parametric CAD models and drawings.",
+        "instructions": ["Maintain parametricity", "Export STEP/STL"],
+        "tools": ["opencascade", "freecad"],
+        "relationships": {"incoming": ["drone-materials-v1"], "outgoing": ["drone-quick-sim-v1"]},
+        "keywords": ["cad", "drawing", "parametric", "geometr*", "stl"]
+    }
     
     def __init__(self, run_id: str):
         super().__init__(run_id, self.name)
@@ -33,9 +44,13 @@ class CadBuilderAgent(DisciplineCore):
         # Retrieve Knowledge
         kb_context = ""
         if self.kb:
-            strategies = self.kb.search("optimization_strategies")
-            rules = self.kb.search("design_rules")
-            kb_context = f"Design Guidelines:\n{json.dumps(strategies, indent=2)}\nRules:\n{json.dumps(rules, indent=2)}"
+            # Only the guidelines and rules relevant to these specs
+            kb_context = "Design Guidelines & Rules:\n" + self.kb.retrieve_fragment(
+                json.dumps(specs) if specs else context.get("task", ""),
+                categories=["optimization_strategies", "design_rules"],
+                k=int(context.get("kb_top_k", 5)),
+                token_budget=context.get("kb_token_budget", 800)
+            )
 
         system_prompt = (
             "You are an expert CAD Engineer. Plan the parametric modeling strategy for the given specs.\n"
@@ -72,8 +87,7 @@ class CadBuilderAgent(DisciplineCore):
         kb_context = ""
         if self.kb:
             # Re-inject relevant rules for execution
-            aerodynamics = self.kb.search("aerodynamics")
-            kb_context = f"Aerodynamic Considerations:\n{json.dumps(aerodynamics, indent=2)}"
+            kb_context = f"Aerodynamic Considerations:\n{self.kb.fragment('aerodynamics')}"
         
         # Simulating CAD generation
         system_prompt = (
@@ -12,6 +12,17 @@ class MaterialsAgent(DisciplineCore):
     Role: Propose materials, fasteners, adhesives, and manufacturing methods.
     """
     name = "drone-materials-v1"
+    profile = {
+        "id": "drone-materials-v1",
+        "name": "Materials Agent",
+        "role": "Drone Specialist",
+        "icon": "🧪",
+        "description": "Proposes materials, fasteners, and manufacturing methods.",
+        "instructions": ["Check yield strength", "Optimize weight"],
+        "tools": ["ashby_charts", "supplier_db"],
+        "relationships": {"incoming": ["engineering-core"], "outgoing": ["drone-cad-v1"]},
+        "keywords": ["material", "fastener", "manufactur*", "alloy", "composite", "yield"]
+    }
     
     def __init__(self, run_id: str):
         super().__init__(run_id, self.name)
@@ -35,8 +46,7 @@ class MaterialsAgent(DisciplineCore):
         kb_context = ""
         if self.kb:
             # Get general guidelines
-            guidelines = self.kb.search("design_guidelines")
-            kb_context = f"Design Guidelines:\n{json.dumps(guidelines, indent=2)}"
+            kb_context = f"Design Guidelines:\n{self.kb.fragment('design_guidelines')}"
 
         system_prompt = (
             "You are an expert Materials Engineer. Analyze the following part specifications "
@@ -70,13 +80,22 @@ class MaterialsAgent(DisciplineCore):
         self.log("Executor", "Action", f"Executing plan: {plan.get('summary')}", "🧪")
         
         part_specs = context.get("part_specs", {})
+        min_yield = context.get("constraints", {}).get("min_yield_pa", 0)
 
         # Retrieve Knowledge
         kb_context = ""
         if self.kb:
-            # Get all filaments
-            filaments = self.kb.search("filaments")
-            kb_context = f"Available Materials:\n{json.dumps(filaments, indent=2)}"
+            # Yield never exceeds tensile strength, so filaments below the
+            # required yield can be dropped before prompting. Lightest first.
+            if min_yield:
+                filaments = self.kb.query(
+                    "filaments",
+                    where={"tensile_strength_mpa": (min_yield / 1e6, None)},
+                    order_by="density_g_cm3"
+                )
+                kb_context = f"Available Materials:\n{json.dumps(filaments, indent=2)}"
+            else:
+                kb_context = f"Available Materials:\n{self.kb.fragment('filaments')}"
         
         # Simulating material selection logic
         system_prompt = (
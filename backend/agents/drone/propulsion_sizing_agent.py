@@ -4,6 +4,8 @@ from lib.llm import call_llm
 from lib.abn_client import ABNClient
 from lib.knowledge_base import KnowledgeBase
 from lib.drone_physics import PAVPhysics  # Import Shared Physics Library
+from lib.tools.propulsion_optimizer import PropulsionOptimizerTool, G_PER_LB
+from lib.tools.prop_performance import PropPerformanceTables
 import json
 import os
 import sys
@@ -16,6 +18,18 @@ class PropulsionSizingAgent(DisciplineCore):
     Includes physics-based validation for power requirements using shared PAVPhysics.
     """
     name = "engineering-propulsion-v1" 
+    profile = {
+        "id": "engineering-propulsion-v1",
+        "name": "Propulsion Sizing",
+        "role": "Drone Specialist",
+        "icon": "🚁",
+        "description": "Selects motors, props, and batteries for flight requirements.",
+        "instructions": ["Maximize endurance", "Ensure T/W ratio > 2"],
+        "tools": ["component_db", "thrust_calc"],
+        "relationships": {"incoming": ["hmao-orchestrator"], "outgoing": ["engineering-flightcontrol-v1"]},
+        "keywords": ["propulsion", "motor", "propeller", "battery", "thrust", "endurance"]
+    }
+    SAFETY_CORE = "engineering-flightcontrol-v1"
     
     def __init__(self, run_id: str):
         super().__init__(run_id, "engineering-propulsion-v1")
@@ -24,14 +38,23 @@ class PropulsionSizingAgent(DisciplineCore):
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         kb_path = os.path.join(base_dir, "knowledge", "propulsion_db.json")
         self.kb = KnowledgeBase(kb_path)
+        self.safety_kb = KnowledgeBase(os.path.join(base_dir, "knowledge", "safety_regulations.json"))
+        self.prop_kb = KnowledgeBase(os.path.join(base_dir, "knowledge", "prop_performance.json"))
+        self.optimizer = PropulsionOptimizerTool()
         
         # Load System Prompt
         self.prompt_path = os.path.join(base_dir, "prompts", "propulsion_sizing.md")
 
+    def _min_thrust_to_weight(self) -> float:
+        for margin in self.safety_kb.search("stability_margins", "Thrust-to-Weight"):
+            if "min" in margin:
+                return float(margin["min"])
+        return 1.5
+
     async def _plan(self, context: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "summary": "Select propulsion components from Knowledge Base and VALIDATE via physics + ABN.",
-            "strategy": "1. Search KB. 2. Calculate Power Req (Hover/Cruise) using PAVPhysics. 3. Generate recommendation. 4. Negotiate."
+            "strategy": "1. Calculate Power Req (Hover/Cruise) using PAVPhysics. 2. Rank every KB combination numerically (Pareto front). 3. Explain the shortlist. 4. Negotiate."
         }
     
     async def _execute(self, plan: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
@@ -44,16 +67,50 @@ class PropulsionSizingAgent(DisciplineCore):
         disc_area_ft2 = float(inputs.get("disc_area_ft2", 2.0)) # Approx for a medium quad
         
         # Calculate theoretical power requirements using SHARED LIBRARY
-        hover_kw_req = PAVPhysics.calc_hover_power_kw(weight_lbs, disc_area_ft2)
+        optimizer = self.optimizer
+        if "altitude_ft" in inputs or "temp_f" in inputs:
+            altitude_ft = float(inputs.get("altitude_ft", 0.0))
+            temp_f = float(inputs["temp_f"]) if "temp_f" in inputs else None
+            optimizer = PropulsionOptimizerTool(altitude_ft=altitude_ft, temp_f=temp_f)
+            hover_kw_req = PAVPhysics.calc_hover_power_kw(weight_lbs, disc_area_ft2, sigma=optimizer.sigma)
+        else:
+            hover_kw_req = PAVPhysics.calc_hover_power_kw(weight_lbs, disc_area_ft2)
         
         self.log("Executor", "Physics", f"Calculated Hover Power Req: {hover_kw_req:.2f} kW (Weight: {weight_lbs}lbs)", "🧮")
 
-        # 1. RETRIEVE KNOWLEDGE
-        motors = self.kb.search("motors")
-        escs = self.kb.search("escs")
-        batteries = self.kb.search("batteries")
+        # 1. RETRIEVE KNOWLEDGE + DETERMINISTIC SEARCH
+        # Every motor x ESC x battery x rotor-count combination is checked numerically;
+        # the LLM only explains the pre-validated Pareto shortlist.
+        rotor_counts = inputs.get("rotor_counts") or [int(inputs.get("rotor_count", 4))]
+        base_weight_g = float(inputs.get("base_weight_g", weight_lbs * G_PER_LB))
+        min_tw = float(inputs.get("min_thrust_to_weight", self._min_thrust_to_weight()))
+        search = optimizer.optimize(
+            self.kb.search("motors"), self.kb.search("escs"), self.kb.search("batteries"),
+            rotor_counts=rotor_counts, base_weight_g=base_weight_g,
+            min_thrust_to_weight=min_tw, max_results=5,
+            prop_tables=PropPerformanceTables.from_kb(self.prop_kb)
+        )
+        shortlist = search["front"]
+        self.log("Executor", "Optimizer",
+                 f"Evaluated {search['evaluated']} combinations in {search['elapsed_ms']:.1f} ms; "
+                 f"{search['feasible']} feasible, {len(shortlist)} on the Pareto front.", "⚙️")
+
+        if shortlist:
+            inventory_context = f"""
+        Pre-validated Shortlist (Pareto front: endurance vs thrust-to-weight vs weight):
+        {json.dumps(shortlist, indent=2)}
         
-        inventory_context = f"""
+        Every option above already satisfies T/W >= {min_tw}, ESC current rating, battery C rating
+        and motor/battery cell count. Hover power, RPM and throttle come from the prop performance
+        tables where a motor has one (hover_rpm set), otherwise from PAVPhysics momentum theory.
+        """
+        else:
+            self.log("Executor", "Retrieval", f"No inventory combination reaches T/W {min_tw}. Offering strongest options.", "⚠️")
+            motors = self.kb.query("motors", order_by="max_thrust_g", descending=True, limit=5)
+            escs = self.kb.query("escs", order_by="current_a", descending=True, limit=5)
+            batteries = self.kb.query("batteries", order_by="capacity_mah", descending=True, limit=5)
+            inventory_context = f"""
+        No inventory combination passed the deterministic checks (T/W >= {min_tw}, ESC/battery current, cell count).
         Available Inventory:
         Motors: {json.dumps(motors, indent=2)}
         ESCs: {json.dumps(escs, indent=2)}
@@ -96,38 +153,48 @@ class PropulsionSizingAgent(DisciplineCore):
                 "hover_power_kw_required": hover_kw_req,
                 "weight_used_lbs": weight_lbs
             }
+            rec["optimizer"] = {
+                "shortlist": shortlist,
+                "evaluated": search["evaluated"],
+                "feasible": search["feasible"],
+                "min_thrust_to_weight": min_tw
+            }
         except Exception as e:
             return {"error": f"JSON PARSE ERROR: {e}", "raw": response}
 
-        # 3. ABN Negotiation: Check with Flight Safety
+        # 3. ABN Negotiation: Check with Flight Safety (and any other critics) concurrently
         try:
-            self.log("Orchestrator", "Request", "Asking Orchestrator for a Safety Expert...", "📡")
+            self.log("Orchestrator", "Request", "Asking Orchestrator for Safety and Simulation reviewers...", "📡")
             if self.abn:
                 abn = self.abn
             else:
                 abn = ABNClient(self.name, "legacy-token") 
             
-            target_id = await abn.request_connection("Verify flight safety and stability")
+            review = await abn.multicast("Verify flight safety and stability; simulation sanity check", "PROPOSAL", rec)
             
-            if not target_id:
+            if not review["targets"]:
                  self.log("Orchestrator", "Skip", "No Safety Agent available. Skipping validation.", "⏭️")
                  rec["safety_validation"] = "SKIPPED"
             else:
-                self.log("ABN", "Connect", f"Channel established with {target_id}.", "🔌")
-                
-                safety_response = await abn.send_message(
-                    target_id,
-                    "PROPOSAL",
-                    rec
-                )
+                self.log("ABN", "Connect", f"Proposal sent to {', '.join(review['targets'])}.", "🔌")
+                replies = review["replies"]
+                for target, error in review["errors"].items():
+                    self.log("ABN", "Error", f"{target} failed: {error}", "⚠️")
                 
+                safety_response = replies.get(self.SAFETY_CORE)
                 if safety_response:
                     self.log("ABN", "Receive", f"Safety Assessment: {safety_response.get('assessment')}", "📥")
                     rec["safety_validation"] = safety_response
-                    if safety_response.get("assessment") == "UNSAFE":
-                        rec["status"] = "REJECTED_BY_SAFETY"
                 else:
                     rec["safety_validation"] = {"error": "No response"}
+                rec["reviews"] = {
+                    "replies": replies,
+                    "errors": review["errors"],
+                    "unanswered": review["unanswered"],
+                    "quorum_met": review["quorum_met"]
+                }
+                if any(isinstance(r, dict) and r.get("assessment") == "UNSAFE" for r in replies.values()):
+                    rec["status"] = "REJECTED_BY_SAFETY"
 
         except Exception as e:
             rec["safety_validation"] = {"error": f"ABN Negotiation Failed: {str(e)}"}
@@ -10,6 +10,17 @@ class ResearchAgent(DisciplineCore):
     Role: Support early design decisions with targeted research.
     """
     name = "drone-research-v1"
+    profile = {
+        "id": "drone-research-v1",
+        "name": "Research Agent",
+        "role": "Researcher",
+        "icon": "📚",
+        "description": "Conducts targeted research on materials and methods.",
+        "instructions": ["Find datasheets", "Cite sources"],
+        "tools": ["web_search", "knowledge_base"],
+        "relationships": {"incoming": ["hmao-orchestrator"], "outgoing": ["drone-materials-v1"]},
+        "keywords": ["research", "datasheet", "literature", "source", "cite"]
+    }
     
     def __init__(self, run_id: str):
         super().__init__(run_id, self.name)
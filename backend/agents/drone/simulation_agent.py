@@ -8,6 +8,7 @@ from lib.llm import call_llm
 from lib.abn_client import ABNClient
 from lib.knowledge_base import KnowledgeBase
 from lib.drone_physics import PAVPhysics, MPH_TO_FTS, RHO_STD # Import Shared Physics
+from lib.tools.frame_solver import FrameStressTool
 
 class QuickSimAgent(DisciplineCore):
     """
@@ -16,6 +17,17 @@ class QuickSimAgent(DisciplineCore):
     Updated with PAV Physics for Aerodynamic Simulations via shared library.
     """
     name = "drone-quick-sim-v1"
+    profile = {
+        "id": "drone-quick-sim-v1",
+        "name": "Quick-Sim Agent",
+        "role": "Analyst",
+        "icon": "🔥",
+        "description": "Runs fast sanity checks (FEA/CFD) on designs.",
+        "instructions": ["Check max stress", "Verify deflection"],
+        "tools": ["sfepy", "calculix"],
+        "relationships": {"incoming": ["drone-cad-v1"], "outgoing": []},
+        "keywords": ["simulat*", "sanity", "fea", "cfd", "stress", "deflection"]
+    }
     
     def __init__(self, run_id: str):
         super().__init__(run_id, self.name)
@@ -38,8 +50,7 @@ class QuickSimAgent(DisciplineCore):
         # Retrieve Knowledge
         kb_context = ""
         if self.kb:
-            guidelines = self.kb.search("simulation_guidelines")
-            kb_context = f"Simulation Guidelines:\n{json.dumps(guidelines, indent=2)}"
+            kb_context = f"Simulation Guidelines:\n{self.kb.fragment('simulation_guidelines')}"
 
         system_prompt = (
             "You are a Simulation Engineer. Plan the setup for a quick Finite Element Analysis (FEA) check.\n"
@@ -70,7 +81,7 @@ class QuickSimAgent(DisciplineCore):
 
     async def _execute(self, plan: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Run the simulation (simulated + physics calculation).
+        Run the simulation (aerodynamics + stiffness-method frame FEA).
         """
         self.log("Executor", "Action", f"Running simulation with plan: {plan.get('summary')}", "🔥")
         
@@ -86,8 +97,15 @@ class QuickSimAgent(DisciplineCore):
         cd_profile = float(inputs.get("cd_profile", 0.02)) # 'CDw'
         cruise_speed_mph = float(inputs.get("cruise_speed_mph", 60.0))
         
+        altitude_ft = float(inputs.get("altitude_ft", 0.0))
+        # Ambient temperature at altitude; without one the ISA standard day applies
+        temp_f = float(inputs["temp_f"]) if "temp_f" in inputs else None
+        
         cruise_speed_fts = cruise_speed_mph * MPH_TO_FTS
-        rho = RHO_STD # Assuming sea level for quick check
+        if temp_f is None:
+            rho = PAVPhysics.get_air_density(altitude_ft)
+        else:
+            rho = PAVPhysics.get_air_density(altitude_ft, temp_f) # ISA pressure at altitude, ambient temperature
         
         # Calculate Drag using SHARED LIBRARY
         try:
@@ -103,47 +121,40 @@ class QuickSimAgent(DisciplineCore):
             physics_results = {
                 "drag_lbs": drag_lbs,
                 "lift_coefficient": lift_coeff,
-                "cruise_speed_mph": cruise_speed_mph
+                "cruise_speed_mph": cruise_speed_mph,
+                "air_density_slug_ft3": rho,
+                "altitude_ft": altitude_ft
             }
             self.log("Executor", "Physics", f"Calculated Drag: {drag_lbs:.2f} lbs at {cruise_speed_mph} mph", "💨")
         except Exception as e:
             physics_results = {"error": str(e)}
             self.log("Executor", "Error", f"Physics calc failed: {e}", "❌")
 
-        # Retrieve Knowledge for Validation
-        kb_context = ""
-        if self.kb:
-            validation_data = self.kb.search("validation_data")
-            kb_context = f"Validation Data Baseline:\n{json.dumps(validation_data, indent=2)}"
-        
-        # Simulating SfePy / PyCalculix run
-        system_prompt = (
-            "You are a Quick-Sim Agent. Simulate the results of the FEA analysis.\n"
-            f"Ensure results are consistent with typical validation data:\n{kb_context}\n"
-            f"PHYSICS RESULTS (Aerodynamics): {json.dumps(physics_results)}\n"
-            "Output must be a valid JSON object with 'max_stress_pa', 'max_deflection_mm', 'safety_factor', and 'passed' (bool)."
+        # --- STRUCTURAL FEA (deterministic frame solver) ---
+        load_cases = context.get("load_cases") or (self.kb.search("load_cases") if self.kb else [])
+        tool = FrameStressTool(
+            rotor_count=int(inputs.get("rotor_count", 4)),
+            arm_length_m=float(inputs.get("arm_length_m", 0.12)),
+            arm_width_m=float(inputs.get("arm_width_mm", 15.0)) / 1000.0,
+            arm_height_m=float(inputs.get("arm_height_mm", 8.5)) / 1000.0,
+            youngs_modulus_pa=float(inputs.get("youngs_modulus_pa", 2.1e9)),
+            yield_strength_pa=float(inputs.get("yield_strength_pa", 40e6)),
+            mass_kg=float(inputs["mass_kg"]) if "mass_kg" in inputs else None
         )
-        
-        user_prompt = f"Simulate results for plan: {json.dumps(plan)}"
-        
-        response = call_llm(
-            system_prompt,
-            user_prompt,
-            json_mode=True
-        )
-        
-        try:
-            result = json.loads(response)
-            result["physics_aerodynamics"] = physics_results
-        except:
-            # Fallback
-            result = {
-                "max_stress_pa": 150000000.0,
-                "max_deflection_mm": 0.5,
-                "safety_factor": 1.5,
-                "passed": True,
-                "physics_aerodynamics": physics_results
-            }
+        result = tool.run(load_cases, min_safety_factor=float(context.get("min_safety_factor", 1.2)))
+        result["physics_aerodynamics"] = physics_results
+
+        if "error" in result:
+            self.log("Executor", "Error", f"Frame solver: {result['error']}", "❌")
+        else:
+            self.log("Executor", "FEA",
+                     f"Solved {len(result['cases'])} load cases ({result['model']['dof']} DOF) in {result['elapsed_ms']:.1f} ms. "
+                     f"Governing: {result['governing_case']}, SF {result['safety_factor']:.2f}", "🧮")
+            for case in result["cases"]:
+                if "beam_theory_deflection_mm" in case:
+                    self.log("Executor", "Check",
+                             f"{case['case']}: FEA {case['max_deflection_mm']:.3f} mm vs WL^3/3EI "
+                             f"{case['beam_theory_deflection_mm']:.3f} mm", "📏")
 
         # Format for ABN / output
         output = {
@@ -10,6 +10,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from agents.base import BaseAgent, AgentMessage, AgentState
 from lib.abn_client import ABNClient
 
+# Entries kept in a core's trace_log; the oldest are dropped beyond this.
+MAX_TRACE_LOG = 1000
+
 class DisciplineCore(BaseAgent, ABC):
     """
     HMAO Discipline Core.
@@ -32,6 +35,9 @@ class DisciplineCore(BaseAgent, ABC):
             "timestamp": datetime.datetime.now().isoformat()
         }
         self.trace_log.append(entry)
+        if len(self.trace_log) > MAX_TRACE_LOG:
+            # Long-lived cores (e.g. ABN traffic outside run()) must not grow without bound
+            del self.trace_log[:len(self.trace_log) - MAX_TRACE_LOG]
         return entry
 
     async def handle_abn_message(self, envelope: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -19,6 +19,17 @@ class EngineeringCore(DisciplineCore):
     Has access to Best Practices KB.
     """
     name = "engineering_core"
+    profile = {
+        "id": "engineering-core",
+        "name": "Engineering Core",
+        "role": "Builder",
+        "icon": "🛠️",
+        "description": "Implements code solutions and runs simulations.",
+        "instructions": ["Write clean code", "Verify outputs"],
+        "tools": ["code_gen", "linter"],
+        "relationships": {"incoming": ["hmao-orchestrator"], "outgoing": []},
+        "keywords": ["implement*", "codegen"]
+    }
     
     def __init__(self, run_id: str):
         super().__init__(run_id, "engineering_core")
@@ -52,13 +63,10 @@ class EngineeringCore(DisciplineCore):
         filename = plan.get("filename")
         
         # Retrieve Knowledge
-        conventions = self.kb.search("python_conventions")
-        patterns = self.kb.search("physics_patterns")
-        
         kb_context = f"""
         Engineering Best Practices:
-        Python: {json.dumps(conventions, indent=2)}
-        Physics: {json.dumps(patterns, indent=2)}
+        Python: {self.kb.fragment("python_conventions")}
+        Physics: {self.kb.fragment("physics_patterns")}
         """
         
         # Inject KB into the plan description for the Generator
@@ -147,18 +155,21 @@ class EngineeringCore(DisciplineCore):
                     else:
                         abn = ABNClient(self.name, "legacy")
 
-                    target_id = await abn.request_connection("Perform code review and security check")
+                    # Every matching reviewer (QA, security, ...) is asked at once
+                    fanout = await abn.multicast("Perform code review and security check", "REVIEW_REQUEST", {"code": generated_code})
                     
-                    if target_id:
-                        self.log("ABN", "Propose", f"Sending code to {target_id}...", "📤")
-                        review = await abn.send_message(target_id, "REVIEW_REQUEST", {"code": generated_code})
-                        
-                        if review:
+                    if fanout["targets"]:
+                        self.log("ABN", "Propose", f"Sent code to {', '.join(fanout['targets'])}...", "📤")
+                        for target_id, review in fanout["replies"].items():
+                            if not review:
+                                continue
                             status = review.get("status", "UNKNOWN")
                             score = review.get("score", 0)
-                            self.log("ABN", "Receive", f"QA Review: {status} (Score: {score}/100)", "📥")
+                            self.log("ABN", "Receive", f"{target_id}: {status} (Score: {score}/100)", "📥")
                             if status == "REJECTED":
-                                self.log("Executor", "Warning", "QA Rejected the code. Proceeding with caution.", "⚠️")
+                                self.log("Executor", "Warning", f"{target_id} rejected the code. Proceeding with caution.", "⚠️")
+                        for target_id, error in fanout["errors"].items():
+                            self.log("ABN", "Error", f"{target_id} review failed: {error}", "⚠️")
                 except Exception as e:
                     self.log("ABN", "Error", f"QA Negotiation failed: {e}", "⚠️")
 
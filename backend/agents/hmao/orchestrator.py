@@ -24,6 +24,7 @@ from agents.drone.materials_agent import MaterialsAgent
 from agents.drone.cad_agent import CadBuilderAgent
 from agents.drone.simulation_agent import QuickSimAgent
 from agents.drone.research_agent import ResearchAgent
+from agents.qa.code_review_agent import CodeReviewAgent
 
 # Import Modules
 from agents.hmao.modules.repository_index import RepositoryIndexModule
@@ -31,10 +32,22 @@ from agents.hmao.modules.planner import PlannerModule
 
 # Import Auth
 from lib.auth import create_task_token
+from agent_registry import run_scopes
 
 class GlobalOrchestrator(BaseAgent):
     name = "hmao.orchestrator"
     version = "v1.3.index-aware"
+    profile = {
+        "id": "hmao-orchestrator",
+        "name": "Orchestrator",
+        "role": "Mission Control",
+        "icon": "🧠",
+        "description": "Manages the overall mission lifecycle and delegates tasks.",
+        "instructions": ["Ensure safety", "Optimize budget"],
+        "tools": ["planner", "delegator"],
+        "relationships": {"incoming": [], "outgoing": ["engineering-core"]},
+        "keywords": []
+    }
 
     def __init__(self, run_id: str):
         # FIX: Remove the second argument to match BaseAgent.__init__
@@ -52,6 +65,7 @@ class GlobalOrchestrator(BaseAgent):
         self.register_core("drone-cad-v1", CadBuilderAgent(run_id))
         self.register_core("drone-quick-sim-v1", QuickSimAgent(run_id))
         self.register_core("drone-research-v1", ResearchAgent(run_id))
+        self.register_core("qa-codereview-v1", CodeReviewAgent(run_id))
         
         # Initialize Modules
         self.repo_index = RepositoryIndexModule()
@@ -80,6 +94,16 @@ class GlobalOrchestrator(BaseAgent):
         return {}
 
     async def run(self, input_payload: Dict[str, Any]) -> AgentMessage:
+        # ABN messages of this run are routed to this run's core instances
+        task_token = create_task_token(self.run_id, list(self.cores))
+        run_scopes.open(self.run_id, self.cores)
+        try:
+            return await self._run_mission(input_payload, task_token)
+        finally:
+            # Pooled channels stay for later runs of this task (continue_run); they expire by TTL or revocation
+            run_scopes.close(self.run_id)
+
+    async def _run_mission(self, input_payload: Dict[str, Any], task_token: str) -> AgentMessage:
         problem = input_payload.get("problem", "")
         user_inputs = input_payload.get("inputs", {})
         
@@ -193,6 +217,7 @@ class GlobalOrchestrator(BaseAgent):
                         "artifacts": self.state.artifacts,
                         "inputs": user_inputs,
                         "metadata": task.metadata, 
+                        "task_token": task_token,
                     }
 
                     try:
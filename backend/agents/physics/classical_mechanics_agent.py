@@ -3,6 +3,7 @@ from agents.hmao.core import DisciplineCore
 from lib.llm import call_llm
 from lib.knowledge_base import KnowledgeBase
 from lib.drone_physics import PAVPhysics, RHO_STD # Import Shared Physics
+from lib.tools.formula_engine import FormulaEngine
 import json
 import os
 import math
@@ -15,6 +16,18 @@ class ClassicalMechanicsAgent(DisciplineCore):
     Updated with PAV Physics for general aerodynamic calculations.
     """
     name = "physics-classical-mechanics-v1"
+    profile = {
+        "id": "physics-classical-mechanics-v1",
+        "name": "Classical Mechanics",
+        "role": "Physicist",
+        "icon": "🍎",
+        "description": "Solves Newtonian physics problems (forces, motion, energy).",
+        "instructions": ["Identify Knowns/Unknowns", "Use Standard Model"],
+        "tools": ["formula_db", "solver"],
+        "relationships": {"incoming": ["hmao-orchestrator"], "outgoing": []},
+        "keywords": ["physics", "newton", "force", "motion", "energy", "kinematic*", "mechanic*"]
+    }
+    formula_categories = ["kinematics_suvat", "dynamics_forces", "energy_momentum"]
     
     def __init__(self, run_id: str):
         super().__init__(run_id, "physics-classical-mechanics-v1")
@@ -31,24 +44,82 @@ class ClassicalMechanicsAgent(DisciplineCore):
     async def _plan(self, context: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "summary": "Solve physics problem using Standard Model.",
-            "strategy": "Identify Knowns/Unknowns -> Select Formula -> Compute."
+            "strategy": "Identify Knowns/Unknowns -> Select Formula -> Compute (symbolic engine, LLM fallback)."
+        }
+
+    def _formula_engine(self) -> FormulaEngine:
+        # Parsed, solved and compiled once per KB snapshot
+        snapshot = self.kb.snapshot
+        return snapshot.derived(("formula_engine",), lambda: FormulaEngine.build(snapshot.data))
+
+    def _solve_deterministic(self, problem: str, inputs: Dict[str, Any], unknown: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Solves directly from the KB formulas when the unknown and enough knowns
+        can be identified. Returns a solution in the LLM output format, or None.
+        """
+        engine = self._formula_engine()
+        knowns = {}
+        for key, value in inputs.items():
+            name = engine.canonical(key)
+            if name is None:
+                continue
+            try:
+                knowns[name] = float(value) if not isinstance(value, (list, tuple)) else [float(v) for v in value]
+            except (TypeError, ValueError):
+                continue
+        target = engine.canonical(unknown) if unknown else engine.identify_unknown(problem)
+        if not target or not knowns:
+            return None
+
+        result = engine.solve(target, knowns)
+        if result is None:
+            return None
+        assumptions = [f"{k}={v}" for k, v in engine.defaults.items() if k in result["knowns"] and k not in knowns]
+        final_answer = {"value": result["value"], "variable": target}
+        if result["unit"]:
+            # Only the KB knows the unit; none is reported for variables it does not annotate
+            final_answer["unit"] = result["unit"]
+        return {
+            "analysis": {
+                "knowns": result["knowns"],
+                "unknowns": [target],
+                "assumptions": assumptions
+            },
+            "steps": [f"Step {i}: {s['name']}: {s['expression']} -> {s['solved_for']} = {s['value']}"
+                      for i, s in enumerate(result["steps"], 1)],
+            "final_answer": final_answer,
+            "reasoning": "Solved symbolically from the Knowledge Base formulas (sympy, compiled with lambdify).",
+            "method": "symbolic"
         }
 
     async def _execute(self, plan: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         problem = context.get("objective", "")
         inputs = context.get("inputs", {})
         
-        # 1. Retrieve Knowledge (Fetch All Formulas for context)
-        # We could filter, but physics problems might need any of them.
-        kinematics = self.kb.search("kinematics_suvat")
-        dynamics = self.kb.search("dynamics_forces")
-        energy = self.kb.search("energy_momentum")
+        # 0. Deterministic path: KB formulas solved and compiled once per process
+        try:
+            solution = self._solve_deterministic(problem, inputs, context.get("unknown") or inputs.get("unknown"))
+        except Exception as e:
+            self.log("Executor", "Warning", f"Symbolic solve failed, falling back to LLM: {e}", "⚠️")
+            solution = None
+        if solution:
+            self.log("Executor", "Compute", f"Solved {solution['final_answer']['variable']} symbolically (no LLM call).", "🧮")
+            solution["execution_result"] = {
+                "stdout": json.dumps(solution, indent=2),
+                "stderr": ""
+            }
+            return solution
         
+        # 1. Retrieve Knowledge (only the formulas most relevant to this problem)
+        formulas = self.kb.retrieve_fragment(
+            f"{problem} {' '.join(inputs.keys())}",
+            categories=self.formula_categories,
+            k=int(context.get("kb_top_k", 4)),
+            token_budget=context.get("kb_token_budget", 600)
+        )
         kb_context = f"""
-        Physics Formulas:
-        Kinematics (SUVAT): {json.dumps(kinematics, indent=2)}
-        Dynamics (Forces): {json.dumps(dynamics, indent=2)}
-        Energy & Momentum: {json.dumps(energy, indent=2)}
+        Physics Formulas (most relevant first, grouped by topic):
+        {formulas}
         """
         
         # 2. Check for Aerodynamic specific requests (Basic check)
@@ -12,6 +12,17 @@ class CodeReviewAgent(DisciplineCore):
     Has access to a Security Vulnerability Knowledge Base.
     """
     name = "qa-codereview-v1"
+    profile = {
+        "id": "qa-codereview-v1",
+        "name": "QA Reviewer",
+        "role": "Auditor",
+        "icon": "🧐",
+        "description": "Reviews code for bugs and security issues.",
+        "instructions": ["Check PEP8", "Find security holes"],
+        "tools": ["static_analysis"],
+        "relationships": {"incoming": ["engineering-core"], "outgoing": []},
+        "keywords": ["review*", "qa", "security", "audit*", "bug", "lint", "linting"]
+    }
     
     def __init__(self, run_id: str):
         super().__init__(run_id, "qa-codereview-v1")
@@ -32,13 +43,10 @@ class CodeReviewAgent(DisciplineCore):
             return {"error": "No code provided for review."}
             
         # Retrieve Knowledge
-        banned = self.kb.search("banned_functions")
-        cwes = self.kb.search("common_cwes")
-        
         kb_context = f"""
         Security Knowledge Base:
-        Banned Functions: {json.dumps(banned, indent=2)}
-        Common Weaknesses: {json.dumps(cwes, indent=2)}
+        Banned Functions: {self.kb.fragment("banned_functions")}
+        Common Weaknesses: {self.kb.fragment("common_cwes")}
         """
         
         # Load Prompt
@@ -0,0 +1,53 @@
+"""
+Closed-form ISA vs a precomputed altitude x temperature-offset table with
+bilinear interpolation. In NumPy the closed form is a handful of vectorized
+ufunc passes, which beats the four gathers a table lookup needs; this script
+keeps that comparison reproducible.
+
+Usage (from backend/):
+    python benchmarks/bench_atmosphere.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+# Ensure backend directory is in python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.atmosphere import isa, density_ratio
+
+
+def table_density(h, dT, altitudes, offsets, table):
+    x = np.clip(h / (altitudes[1] - altitudes[0]), 0, len(altitudes) - 1)
+    y = np.clip((dT - offsets[0]) / (offsets[1] - offsets[0]), 0, len(offsets) - 1)
+    i = np.minimum(x.astype(np.intp), len(altitudes) - 2)
+    j = np.minimum(y.astype(np.intp), len(offsets) - 2)
+    fx, fy = x - i, y - j
+    flat = table.ravel()
+    k = i * len(offsets) + j
+    return ((flat.take(k) * (1 - fx) + flat.take(k + len(offsets)) * fx) * (1 - fy)
+            + (flat.take(k + 1) * (1 - fx) + flat.take(k + len(offsets) + 1) * fx) * fy)
+
+
+if __name__ == "__main__":
+    altitudes = np.arange(0.0, 65001.0, 100.0)
+    offsets = np.arange(-60.0, 61.0, 2.0)
+    table = isa(altitudes[:, None], offsets[None, :])["density_slug_ft3"]
+
+    rng = np.random.default_rng(0)
+    for n in (1_000, 100_000, 1_000_000):
+        h, dT = rng.uniform(0, 65000, n), rng.uniform(-60, 60, n)
+        start = time.perf_counter()
+        exact = isa(h, dT)["density_slug_ft3"]
+        closed_s = time.perf_counter() - start
+        start = time.perf_counter()
+        density_ratio(h, dT)
+        ratio_s = time.perf_counter() - start
+        start = time.perf_counter()
+        approx = table_density(h, dT, altitudes, offsets, table)
+        table_s = time.perf_counter() - start
+        err = np.max(np.abs(approx / exact - 1))
+        print(f"{n:>9,} points: closed form {closed_s * 1e3:.2f} ms (ratio only {ratio_s * 1e3:.2f} ms), "
+              f"table {table_s * 1e3:.2f} ms (max rel err {err:.1e})")
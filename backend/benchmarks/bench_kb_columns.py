@@ -0,0 +1,53 @@
+"""
+Micro-benchmark for KnowledgeBase.query numeric range / top-k queries.
+
+Usage (from backend/):
+    python benchmarks/bench_kb_columns.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Ensure backend directory is in python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.knowledge_base import KnowledgeBase, kb_registry
+from benchmarks.bench_kb_search import make_catalog
+
+
+def run(n: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.json")
+        with open(path, "w") as f:
+            json.dump(make_catalog(n), f)
+        kb = KnowledgeBase(path)
+
+        start = time.perf_counter()
+        kb.columns("motors")
+        build_s = time.perf_counter() - start
+
+        repeat = 200
+        start = time.perf_counter()
+        for _ in range(repeat):
+            top = kb.query("motors", where={"max_thrust_g": (2500, None), "kv": (None, 1600)}, order_by="weight_g", limit=5)
+        query_s = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        items = kb.search("motors")
+        baseline = sorted(
+            [m for m in items if m["max_thrust_g"] >= 2500 and m["kv"] <= 1600],
+            key=lambda m: m["weight_g"]
+        )[:5]
+        scan_s = time.perf_counter() - start
+
+        assert [m["weight_g"] for m in top] == [m["weight_g"] for m in baseline]
+        print(f"{n:>8,} items: columns built in {build_s * 1e3:.1f} ms, "
+              f"query {query_s * 1e6:.0f} us vs python scan {scan_s * 1e3:.1f} ms")
+        kb_registry.invalidate(path)
+
+
+if __name__ == "__main__":
+    for size in (10_000, 100_000):
+        run(size)
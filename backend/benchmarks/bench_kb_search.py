@@ -0,0 +1,81 @@
+"""
+Micro-benchmark for KnowledgeBase.search.
+
+Compares the per-snapshot inverted index against the old linear substring scan
+on synthetic parts catalogs of 10k and 100k entries.
+
+Usage (from backend/):
+    python benchmarks/bench_kb_search.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Ensure backend directory is in python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.knowledge_base import KnowledgeBase, kb_registry
+
+BRANDS = ["T-Motor", "Emax", "BrotherHobby", "iFlight", "RCinPower", "Lumenier", "Xing", "Velox"]
+SERIES = ["F40 PRO IV", "ECO II", "Avenger", "XING-E", "GTS V3", "Velox V2", "Stout", "Nano"]
+TAGS = ["racing", "freestyle", "long-range", "cinematic", "budget", "high-performance", "heavy-lift"]
+QUERIES = ["emax", "avenger 28", "long-range", "7-inch", "2306", "otor", "no-such-part"]
+
+
+def make_catalog(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    motors = []
+    for i in range(n):
+        stator = f"{rng.randint(11, 40):02d}{rng.randint(4, 10):02d}"
+        motors.append({
+            "id": f"m{i}",
+            "name": f"{rng.choice(BRANDS)} {rng.choice(SERIES)} {stator}",
+            "kv": rng.randrange(900, 3000, 50),
+            "weight_g": rng.randint(20, 120),
+            "max_thrust_g": rng.randrange(600, 4000, 10),
+            "recommended_prop": f"{rng.randint(3, 10)}-inch",
+            "voltage": rng.choice(["4S", "6S", "4S-6S"]),
+            "tags": rng.sample(TAGS, 2),
+        })
+    return {"motors": motors}
+
+
+def linear_scan(items, query):
+    query = query.lower()
+    return [item for item in items if query in " ".join([str(v).lower() for v in item.values()])]
+
+
+def timed(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def run(n: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.json")
+        with open(path, "w") as f:
+            json.dump(make_catalog(n), f)
+
+        kb = KnowledgeBase(path)
+        items = kb.search("motors")
+
+        build_s, _ = timed(lambda: kb.search("motors", "warmup"), 1)
+        print(f"\n== {n:,} items (index build {build_s * 1e3:.1f} ms)")
+        print(f"{'query':<16}{'hits':>8}{'scan ms':>12}{'index ms':>12}{'speed-up':>10}")
+        for q in QUERIES:
+            repeat = 3 if n >= 100_000 else 10
+            scan_s, expected = timed(lambda: linear_scan(items, q), repeat)
+            index_s, got = timed(lambda: kb.search("motors", q), repeat * 10)
+            assert [m["id"] for m in got] == [m["id"] for m in expected], q
+            print(f"{q:<16}{len(got):>8}{scan_s * 1e3:>12.3f}{index_s * 1e3:>12.3f}{scan_s / index_s:>9.0f}x")
+        kb_registry.invalidate(path)
+
+
+if __name__ == "__main__":
+    for size in (10_000, 100_000):
+        run(size)
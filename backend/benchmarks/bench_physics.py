@@ -0,0 +1,45 @@
+"""
+Scalar PAVPhysics vs VectorPAVPhysics on a million-point design grid.
+
+Usage (from backend/):
+    python benchmarks/bench_physics.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+# Ensure backend directory is in python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.drone_physics import FallbackPAVPhysics, VectorPAVPhysics, RHO_STD
+
+N = 1_000_000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    W = rng.uniform(2, 60, N)
+    V = rng.uniform(0, 200, N)
+    S = rng.uniform(1, 10, N)
+    Ae = rng.uniform(0.5, 5, N)
+
+    start = time.perf_counter()
+    drag_s = [FallbackPAVPhysics.calc_drag(w, RHO_STD, v, s, 8.0, 0.8, 0.02, 15.0) for w, v, s in zip(W.tolist(), V.tolist(), S.tolist())]
+    hover_s = [FallbackPAVPhysics.calc_hover_power_kw(w, a) for w, a in zip(W.tolist(), Ae.tolist())]
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    drag_v = VectorPAVPhysics.calc_drag(W, RHO_STD, V, S, 8.0, 0.8, 0.02, 15.0)
+    hover_v = VectorPAVPhysics.calc_hover_power_kw(W, Ae)
+    vector_s = time.perf_counter() - start
+
+    np.testing.assert_allclose(drag_v, drag_s)
+    np.testing.assert_allclose(hover_v, hover_s)
+    print(f"{N:,} points (drag + hover power): scalar {scalar_s:.2f} s, "
+          f"vectorized {vector_s * 1e3:.1f} ms, speed-up {scalar_s / vector_s:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
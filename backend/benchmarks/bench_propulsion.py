@@ -0,0 +1,45 @@
+"""
+Micro-benchmark for the vectorized propulsion optimizer.
+
+Usage (from backend/):
+    python benchmarks/bench_propulsion.py
+"""
+import os
+import sys
+
+import numpy as np
+
+# Ensure backend directory is in python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.knowledge_base import KnowledgeBase
+from lib.tools.prop_performance import PropPerformanceTables
+from lib.tools.propulsion_optimizer import PropulsionOptimizerTool
+
+
+def make_inventory(n_motors: int, n_escs: int, n_batteries: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    motors = [{
+        "id": f"m{i}", "name": f"Motor {i}", "weight_g": int(rng.integers(20, 120)),
+        "max_thrust_g": int(rng.integers(800, 4000)), "recommended_prop": f"{rng.integers(4, 11)}-inch",
+        "voltage": ["4S", "4S-6S", "6S"][i % 3],
+    } for i in range(n_motors)]
+    escs = [{"id": f"e{i}", "name": f"ESC {i}", "current_a": int(rng.integers(20, 80)),
+             "weight_g": int(rng.integers(5, 30))} for i in range(n_escs)]
+    batteries = [{"id": f"b{i}", "name": f"Pack {i}", "capacity_mah": int(rng.integers(1000, 10000)),
+                  "voltage": ["4S", "6S"][i % 2], "weight_g": int(rng.integers(150, 1200)),
+                  "c_rating": int(rng.integers(20, 150))} for i in range(n_batteries)]
+    return motors, escs, batteries
+
+
+if __name__ == "__main__":
+    tool = PropulsionOptimizerTool()
+    knowledge = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge")
+    tables = PropPerformanceTables.from_kb(KnowledgeBase(os.path.join(knowledge, "prop_performance.json")))
+    for label, prop_tables in (("momentum theory", None), ("prop tables", tables)):
+        print(label)
+        for sizes in ((20, 10, 20), (100, 40, 100), (200, 50, 200)):
+            res = tool.optimize(*make_inventory(*sizes), rotor_counts=[4, 6, 8], base_weight_g=1500,
+                                prop_tables=prop_tables)
+            print(f"{res['evaluated']:>10,} combinations: {res['feasible']:,} feasible, "
+                  f"front {len(res['front'])} in {res['elapsed_ms']:.1f} ms")
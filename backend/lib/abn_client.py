@@ -1,22 +1,130 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 import uuid
+import time
+import threading
 import datetime
-# Import Router functions directly to simulate HTTP calls within process
-from routers.gateway import open_abn_channel, send_abn_message
+from collections import OrderedDict
+import asyncio
 from models import ABNOpenRequest
 from lib.matchmaker import matchmaker
+from lib.auth import verify_token, is_channel_revoked
+from lib.abn_transport import ABNTransport, default_transport, was_not_queued
+
+# A pooled channel is not handed out this close to its token expiry.
+CHANNEL_EXPIRY_MARGIN_S = 30.0
+MAX_POOLED_CHANNELS = 1024
+# How long a multicast waits for its reviewers (LLM-backed handlers are slow).
+DEFAULT_MULTICAST_TIMEOUT_S = 120.0
+
+
+class ChannelLease:
+    """An open channel: its token, remaining negotiation budget and message sequence."""
+    def __init__(self, channel_id: str, abn_token: str, target_core: str, budget: int, expires_at: float):
+        self.channel_id = channel_id
+        self.abn_token = abn_token
+        self.target_core = target_core
+        self.budget = budget
+        self.expires_at = expires_at
+        self.seq = 0
+
+    def usable(self) -> bool:
+        return (self.budget > 0 and time.time() < self.expires_at - CHANNEL_EXPIRY_MARGIN_S
+                and not is_channel_revoked(self.channel_id))
+
+    def next_seq(self) -> int:
+        # Odd numbers for requests; the gateway logs each reply as seq + 1
+        self.seq += 2
+        return self.seq - 1
+
+    def give_back(self, seqs: List[int]):
+        """
+        Returns seqs (and budget) of messages the gateway rejected before
+        queuing, provided nothing was numbered after them; otherwise the
+        mailbox skips them once its gap timeout passes.
+        """
+        if seqs and self.seq == max(seqs) + 1:
+            self.seq = min(seqs) - 1
+            self.budget += len(seqs)
+
+
+class ChannelPool:
+    """
+    Process-wide pool of open ABN channels keyed by (task, origin, target),
+    so repeated negotiations within a run, and across runs of the same task,
+    skip matchmaking-to-channel setup (PDP call, channel row, token mint).
+    Leases are dropped once their budget or token lifetime runs out.
+    """
+    def __init__(self, max_channels: int = MAX_POOLED_CHANNELS):
+        self.max_channels = max_channels
+        self._leases: "OrderedDict[Tuple[str, str, str], ChannelLease]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[ChannelLease]:
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease.usable():
+                self._leases.move_to_end(key)
+                self.hits += 1
+                return lease
+            self._leases.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple[str, str, str], lease: ChannelLease):
+        with self._lock:
+            self._leases[key] = lease
+            self._leases.move_to_end(key)
+            while len(self._leases) > self.max_channels:
+                self._leases.popitem(last=False)
+
+    def drop_task(self, task_id: str):
+        """Forgets the channels of a finished task."""
+        with self._lock:
+            for key in [k for k in self._leases if k[0] == task_id]:
+                del self._leases[key]
+
+    def clear(self):
+        with self._lock:
+            self._leases.clear()
+
+    def __len__(self):
+        return len(self._leases)
+
+
+channel_pool = ChannelPool()
+
 
 class ABNClient:
     """
     Client for interacting with the ABN Gateway.
-    Uses direct function calls to routers to simulate HTTP requests.
+    Reaches the gateway through `transport`: in-process calls by default, or
+    pooled HTTP when the core runs on another host (ABN_GATEWAY_URL).
+    Channels come from the shared channel_pool when the task token is valid.
     """
-    def __init__(self, origin_core_id: str, task_token: str):
+    def __init__(self, origin_core_id: str, task_token: str, pool: Optional[ChannelPool] = None,
+                 transport: Optional[ABNTransport] = None):
         self.origin_core_id = origin_core_id
         self.task_token = task_token
+        self.pool = pool if pool is not None else channel_pool
+        self.transport = transport if transport is not None else default_transport
         self.channel_id = None
         self.abn_token = None
-        
+        self.lease: Optional[ChannelLease] = None
+
+    def _task_id(self) -> Optional[str]:
+        try:
+            # Same task id the gateway records for the channel (and run scopes are keyed by)
+            return verify_token(self.task_token, expected_prefix="task:")["sub"].replace("task:", "", 1)
+        except Exception:
+            return None
+
+    def _use(self, lease: ChannelLease):
+        self.lease = lease
+        self.channel_id = lease.channel_id
+        self.abn_token = lease.abn_token
+
     async def request_connection(self, need_description: str) -> Optional[str]:
         """
         Ask the Orchestrator to find a peer and open a channel.
@@ -42,8 +150,18 @@ class ABNClient:
 
     async def open_channel(self, target_core_id: str, budget: int = 10) -> str:
         """
-        Opens a channel via the Gateway using the Task Token.
+        Reuses a pooled channel to the target for this task, or opens one via
+        the Gateway using the Task Token.
         """
+        task_id = self._task_id()
+        key = (task_id, self.origin_core_id, target_core_id)
+        if task_id:
+            lease = self.pool.get(key)
+            if lease:
+                self._use(lease)
+                print(f"[{self.origin_core_id}] Reusing ABN channel {self.channel_id} (budget left {lease.budget})")
+                return self.channel_id
+
         print(f"[{self.origin_core_id}] Opening ABN channel to {target_core_id}...")
         
         req = ABNOpenRequest(
@@ -52,41 +170,166 @@ class ABNClient:
             proposed_budget=budget
         )
         
-        # Call Gateway Router
-        # We simulate the Header by passing the string directly
-        response = await open_abn_channel(req, authorization=self.task_token)
+        # Call Gateway (Task Token as the Authorization header)
+        response = await self.transport.open_channel(req, self.task_token)
         
-        self.channel_id = response.channel_id
-        self.abn_token = response.abn_token
+        claims = verify_token(response.abn_token, expected_prefix="channel:")
+        lease = ChannelLease(response.channel_id, response.abn_token, target_core_id,
+                             int(claims.get("negotiation_budget", budget)), float(claims["exp"]))
+        self._use(lease)
+        if task_id:
+            self.pool.put(key, lease)
         
         print(f"[{self.origin_core_id}] Channel Open: {self.channel_id}")
         return self.channel_id
 
-    async def send_message(self, target_core_id: str, msg_type: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def post_message(self, target_core_id: str, msg_type: str, payload: Dict[str, Any]) -> asyncio.Future:
+        """
+        Queues a message on the open channel and returns the future of the
+        reply without waiting for it. Messages posted on a channel are handled
+        in the order they were posted, so callers can pipeline several and
+        gather the replies.
+        """
         # Note: target_core_id arg is kept for compatibility with agent code, 
         # but the channel is already bound to a target.
-        # We should verify it matches or just ignore it.
-        
         if not self.channel_id or not self.abn_token:
             raise Exception("Channel not open")
-            
-        # print(f"[{self.origin_core_id}] Sending {msg_type}...")
-        
+        if self.lease and not self.lease.usable():
+            # Budget or lifetime spent: continue on a fresh channel to the same peer
+            await self.open_channel(self.lease.target_core)
+        lease = self.lease
+        seq = lease.next_seq() if lease else None
+        if lease:
+            lease.budget -= 1
+
         envelope = {
             "trace_id": str(uuid.uuid4()),
             "channel_id": self.channel_id,
             "origin_core": self.origin_core_id,
             "target_core": target_core_id, 
             "msg_type": msg_type,
-            "seq": 1, # TODO: Increment
             **payload
         }
-        
-        # Call Gateway Router
-        response = await send_abn_message(
-            channel_id=self.channel_id, 
-            envelope=envelope, 
-            authorization=self.abn_token
-        )
-        
-        return response.get("reply")
+        if seq is not None:
+            envelope["seq"] = seq
+
+        # Call Gateway: verified, logged and queued on the target's mailbox
+        try:
+            reply = await self.transport.post_message(self.channel_id, envelope, self.abn_token)
+        except Exception as e:
+            if lease and was_not_queued(e):
+                lease.give_back([seq])
+            raise
+        if lease:
+            def give_back_if_rejected(done: asyncio.Future):
+                # Over HTTP the rejection only shows up in the reply
+                if not done.cancelled() and was_not_queued(done.exception()):
+                    lease.give_back([seq])
+            reply.add_done_callback(give_back_if_rejected)
+        return reply
+
+    async def send_message(self, target_core_id: str, msg_type: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await (await self.post_message(target_core_id, msg_type, payload))
+
+    async def send_batch(self, target_core_id: str, messages: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Sends (msg_type, payload) pairs back to back in one gateway call: the
+        token is checked once and the target handles them in order. Returns
+        the replies in order (None for a rejected message).
+        """
+        if not self.channel_id or not self.abn_token:
+            raise Exception("Channel not open")
+        if self.lease and (not self.lease.usable() or self.lease.budget < len(messages)):
+            # Not enough budget left for the whole batch: continue on a fresh channel
+            await self.open_channel(self.lease.target_core)
+
+        lease = self.lease
+        envelopes = []
+        for msg_type, payload in messages:
+            envelope = {
+                "trace_id": str(uuid.uuid4()),
+                "channel_id": self.channel_id,
+                "origin_core": self.origin_core_id,
+                "target_core": target_core_id,
+                "msg_type": msg_type,
+                **payload
+            }
+            if lease:
+                envelope["seq"] = lease.next_seq()
+                lease.budget -= 1
+            envelopes.append(envelope)
+
+        try:
+            result = await self.transport.send_batch(self.channel_id, envelopes, self.abn_token)
+        except Exception as e:
+            if lease and was_not_queued(e):
+                lease.give_back([envelope["seq"] for envelope in envelopes])
+            raise
+        for index, error in result["errors"].items():
+            print(f"[{self.origin_core_id}] Batch message {index} rejected: {error}")
+        return result["replies"]
+
+    @staticmethod
+    def _quorum_size(quorum: Union[str, int], n: int) -> int:
+        if quorum == "all":
+            return n
+        if quorum == "majority":
+            return n // 2 + 1
+        if quorum == "any":
+            return min(1, n)
+        return max(0, min(int(quorum), n))
+
+    async def _ask(self, target_core_id: str, msg_type: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # One sibling client per target: same task token and pool, its own lease
+        peer = ABNClient(self.origin_core_id, self.task_token, pool=self.pool, transport=self.transport)
+        await peer.open_channel(target_core_id)
+        return await peer.send_message(target_core_id, msg_type, payload)
+
+    async def multicast(self, need_description: str, msg_type: str, payload: Dict[str, Any],
+                        targets: Optional[List[str]] = None, quorum: Union[str, int] = "all",
+                        timeout_s: float = DEFAULT_MULTICAST_TIMEOUT_S) -> Dict[str, Any]:
+        """
+        Sends one message to every agent the matchmaker finds for the need (or
+        to `targets`) concurrently, on pooled channels, and gathers the replies.
+
+        Returns as soon as `quorum` replies arrived ("all", "majority", "any"
+        or a count), every target answered or failed, or `timeout_s` passed;
+        unanswered requests are then cancelled. The result maps target ->
+        reply / error and lists the targets left unanswered.
+        """
+        if targets is None:
+            targets = matchmaker.find_agents(need_description)
+        targets = list(dict.fromkeys(t for t in targets if t != self.origin_core_id))
+        needed = self._quorum_size(quorum, len(targets))
+        print(f"[{self.origin_core_id}] Multicasting {msg_type} to {targets} (quorum {needed})")
+
+        tasks = {asyncio.ensure_future(self._ask(t, msg_type, payload)): t for t in targets}
+        replies: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        pending = set(tasks)
+        deadline = asyncio.get_running_loop().time() + timeout_s
+        try:
+            while pending and len(replies) < needed:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    target = tasks[task]
+                    if task.exception() is not None:
+                        errors[target] = str(task.exception())
+                    else:
+                        replies[target] = task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return {
+            "targets": targets,
+            "replies": replies,
+            "errors": errors,
+            "unanswered": [tasks[t] for t in pending],
+            "timed_out": bool(pending) and len(replies) < needed,
+            "quorum": needed,
+            "quorum_met": len(replies) >= needed and needed > 0,
+        }
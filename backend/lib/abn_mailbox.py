@@ -0,0 +1,235 @@
+import asyncio
+import functools
+import os
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+
+from agent_registry import run_scopes
+
+# Requests on a channel use odd sequence numbers (1, 3, 5, ...); the gateway
+# records each reply as seq + 1, so both directions share one sequence space.
+SEQ_STEP = 2
+FIRST_SEQ = 1
+# How long a channel waits for a missing sequence number before skipping it.
+DEFAULT_GAP_TIMEOUT_S = 5.0
+MAX_CHANNELS = 4096
+# Delivery cursors kept for channels evicted from the MAX_CHANNELS window.
+MAX_EVICTED_CURSORS = 4 * MAX_CHANNELS
+# ABN_STRICT_SEQ=0 renumbers stale / duplicate seqs instead of rejecting them,
+# for older clients that send the same seq on every message.
+STRICT_SEQ = os.environ.get("ABN_STRICT_SEQ", "1") != "0"
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class SeqConflict(ValueError):
+    """A stale or duplicate seq on a channel (409 over HTTP)."""
+
+
+class ChannelState:
+    """Reorder buffer and delivery cursor of one channel."""
+    def __init__(self):
+        self.expected = FIRST_SEQ
+        self.last_assigned = FIRST_SEQ - SEQ_STEP
+        self.pending: Dict[int, Tuple[Dict[str, Any], asyncio.Future, Optional[Handler]]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.gap_timer: Optional[asyncio.TimerHandle] = None
+
+
+class CoreMailbox:
+    """
+    asyncio mailbox of one target core.
+
+    Each channel is drained by its own worker task strictly in sequence
+    order (out-of-order arrivals wait in a reorder buffer); a per-core
+    semaphore bounds how many channels run the core's handler at once. A
+    sender gets a future per message, so it can pipeline several messages
+    and await the replies while the receiver works.
+
+    A channel evicted past MAX_CHANNELS keeps its cursor, so it resumes at
+    the next seq instead of waiting out a gap. With `strict_seq` (the
+    default) a reused seq is rejected; senders must number messages 1, 3,
+    5, ... or omit seq and let the mailbox assign it.
+    """
+
+    def __init__(self, core_id: str, handler: Optional[Handler], max_concurrency: int = 4,
+                 gap_timeout_s: float = DEFAULT_GAP_TIMEOUT_S, strict_seq: bool = STRICT_SEQ):
+        self.core_id = core_id
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self.gap_timeout_s = gap_timeout_s
+        self.strict_seq = strict_seq
+        self.channels: "OrderedDict[str, ChannelState]" = OrderedDict()
+        self._evicted: "OrderedDict[str, int]" = OrderedDict()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self.delivered = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_concurrency), loop
+        return self._slots
+
+    def _channel(self, channel_id: str) -> ChannelState:
+        state = self.channels.get(channel_id)
+        if state is None:
+            state = self.channels[channel_id] = ChannelState()
+            cursor = self._evicted.pop(channel_id, None)
+            if cursor is not None:
+                state.expected, state.last_assigned = cursor, cursor - SEQ_STEP
+            while len(self.channels) > MAX_CHANNELS:
+                # Forget the least recently used idle channel, remembering where it was
+                for cid, old in self.channels.items():
+                    # Never the channel being created (it is idle too)
+                    if cid != channel_id and not old.pending and old.task is None:
+                        del self.channels[cid]
+                        self._evicted[cid] = old.expected
+                        if len(self._evicted) > MAX_EVICTED_CURSORS:
+                            self._evicted.popitem(last=False)
+                        break
+                else:
+                    break
+        self.channels.move_to_end(channel_id)
+        return state
+
+    def deliver(self, channel_id: str, envelope: Dict[str, Any], handler: Optional[Handler] = None) -> asyncio.Future:
+        """
+        Queues a message and returns the future of the handler's reply. A
+        missing seq is assigned as the next one on the channel (written back
+        into the envelope); stale or duplicate seqs fail the future (or,
+        without strict_seq, are renumbered as the next one). `handler`
+        overrides the core's default handler for this message.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        state = self._channel(channel_id)
+
+        seq = envelope.get("seq")
+        if seq is None:
+            seq = state.last_assigned + SEQ_STEP
+            envelope["seq"] = seq
+        seq = int(seq)
+        if (seq < state.expected or seq in state.pending) and not self.strict_seq:
+            seq = state.last_assigned + SEQ_STEP
+            envelope["seq"] = seq
+        if seq < state.expected or seq in state.pending:
+            future.set_exception(SeqConflict(f"Stale or duplicate seq {seq} on {channel_id} (expected {state.expected})"))
+            return future
+        state.last_assigned = max(state.last_assigned, seq)
+        state.pending[seq] = (envelope, future, handler or self.handler)
+
+        if state.task is None:
+            state.task = loop.create_task(self._drain(channel_id, state))
+        return future
+
+    def _skip_gap(self, channel_id: str, state: ChannelState):
+        state.gap_timer = None
+        if state.pending and state.expected not in state.pending:
+            lowest = min(state.pending)
+            print(f"[{self.core_id}] {channel_id}: seq {state.expected}..{lowest - SEQ_STEP} never arrived, skipping")
+            self.skipped += (lowest - state.expected) // SEQ_STEP
+            state.expected = lowest
+            if state.task is None:
+                state.task = asyncio.get_running_loop().create_task(self._drain(channel_id, state))
+
+    async def _drain(self, channel_id: str, state: ChannelState):
+        try:
+            while state.expected in state.pending:
+                envelope, future, handler = state.pending.pop(state.expected)
+                state.expected += SEQ_STEP
+                if handler is None:
+                    reply = None
+                else:
+                    async with self._semaphore():
+                        try:
+                            reply = await handler(envelope)
+                        except Exception as e:
+                            self.failed += 1
+                            if not future.done():
+                                future.set_exception(e)
+                            continue
+                self.delivered += 1
+                if not future.done():
+                    future.set_result(reply)
+        finally:
+            state.task = None
+            if state.pending and state.gap_timer is None:
+                state.gap_timer = asyncio.get_running_loop().call_later(
+                    self.gap_timeout_s, self._skip_gap, channel_id, state)
+            elif not state.pending and state.gap_timer is not None:
+                state.gap_timer.cancel()
+                state.gap_timer = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "channels": len(self.channels),
+            "queued": sum(len(s.pending) for s in self.channels.values()),
+            "active": sum(1 for s in self.channels.values() if s.task is not None),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
+
+
+class MailboxRouter:
+    """One CoreMailbox per target core, created on first delivery from the agent registry."""
+
+    def __init__(self, resolve: Optional[Callable[[str], Any]] = None, max_concurrency: int = 4):
+        self._resolve = resolve
+        self.max_concurrency = max_concurrency
+        self.mailboxes: Dict[str, CoreMailbox] = {}
+
+    def _agent(self, core_id: str):
+        if self._resolve is not None:
+            return self._resolve(core_id)
+        from agent_registry import registry
+        from lib.abn_transport import remote_cores
+        # Co-located core first, else one registered from another host
+        agent = registry.get_agent(core_id)
+        return agent if agent is not None else remote_cores.get(core_id)
+
+    def mailbox(self, core_id: str) -> CoreMailbox:
+        box = self.mailboxes.get(core_id)
+        if box is None or box.handler is None:
+            # Re-resolve until the core has registered a handler
+            agent = self._agent(core_id)
+            handler = getattr(agent, "handle_abn_message", None) if agent is not None else None
+            if box is None:
+                box = self.mailboxes[core_id] = CoreMailbox(core_id, handler, self.max_concurrency)
+            box.handler = handler
+        return box
+
+    def deliver(self, channel_id: str, envelope: Dict[str, Any], task_id: Optional[str] = None) -> asyncio.Future:
+        """Queues on the target core's mailbox; with a task id, the run's own core instance handles it."""
+        core_id = envelope.get("target_core")
+        handler = None
+        if task_id:
+            scoped = run_scopes.get(task_id, core_id)
+            handler = getattr(scoped, "handle_abn_message", None) if scoped is not None else None
+        box = self.mailbox(core_id)
+        if handler is None and task_id:
+            from lib.abn_transport import RemoteCore
+            if isinstance(getattr(box.handler, "__self__", None), RemoteCore):
+                # The remote host routes by task id itself
+                handler = functools.partial(box.handler, task_id=task_id)
+        return box.deliver(channel_id, envelope, handler)
+
+    def forget_channel(self, channel_id: str):
+        """Drops a (revoked) channel's cursor; queued messages are cancelled."""
+        for box in self.mailboxes.values():
+            box._evicted.pop(channel_id, None)
+            state = box.channels.pop(channel_id, None)
+            if state:
+                for _, future, _ in state.pending.values():
+                    future.cancel()
+                if state.gap_timer is not None:
+                    state.gap_timer.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {core: box.metrics() for core, box in self.mailboxes.items()}
+
+
+abn_mailboxes = MailboxRouter()
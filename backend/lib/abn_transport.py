@@ -0,0 +1,254 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+from fastapi import HTTPException
+
+from models import ABNOpenRequest, ABNOpenResponse
+from lib.auth import create_deliver_token
+from lib.blob_store import BlobStore, DEFAULT_INLINE_LIMIT, blob_ref, large_fields
+
+# Keep-alive pool of one HTTP transport (per event loop).
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_KEEPALIVE_CONNECTIONS = 16
+DEFAULT_HTTP_TIMEOUT_S = 120.0
+# Upload URLs (per channel) and uploaded digests an HTTP transport remembers.
+MAX_REMEMBERED_UPLOADS = 1024
+# An upload URL this close to expiry is not used; the field is sent inline instead.
+UPLOAD_URL_MARGIN_S = 60
+# Set (to "0") on gateway rejections of a message that never reached the target's
+# mailbox, so the sender can reuse its seq; errors from the target itself lack it.
+QUEUED_HEADER = "X-ABN-Queued"
+NOT_QUEUED = {QUEUED_HEADER: "0"}
+
+
+def was_not_queued(error: BaseException) -> bool:
+    """True for a gateway rejection raised before the message was queued."""
+    headers = getattr(error, "headers", None) or {}
+    return isinstance(error, HTTPException) and headers.get(QUEUED_HEADER) == "0"
+
+
+class ABNTransport(ABC):
+    """How an ABNClient reaches the gateway: open channels and post messages."""
+
+    @abstractmethod
+    async def open_channel(self, req: ABNOpenRequest, task_token: str) -> ABNOpenResponse:
+        """Opens a channel with the task token (PDP check, channel token mint)."""
+
+    @abstractmethod
+    async def post_message(self, channel_id: str, envelope: Dict[str, Any], abn_token: str) -> asyncio.Future:
+        """Queues a message; the returned future resolves to the target's reply."""
+
+    @abstractmethod
+    async def send_batch(self, channel_id: str, envelopes: List[Dict[str, Any]], abn_token: str) -> Dict[str, Any]:
+        """Delivers envelopes in order in one call; returns {"replies": [...], "errors": {index: detail}}."""
+
+    async def close(self):
+        pass
+
+
+class InProcessTransport(ABNTransport):
+    """
+    Calls the gateway router functions directly, for cores living in the
+    gateway's process: no serialization, the envelope dict is handed over as is.
+    """
+
+    async def open_channel(self, req: ABNOpenRequest, task_token: str) -> ABNOpenResponse:
+        from routers.gateway import open_abn_channel
+        return await open_abn_channel(req, authorization=task_token)
+
+    async def post_message(self, channel_id: str, envelope: Dict[str, Any], abn_token: str) -> asyncio.Future:
+        from routers.gateway import accept_abn_message
+        return accept_abn_message(channel_id, envelope, abn_token)
+
+    async def send_batch(self, channel_id: str, envelopes: List[Dict[str, Any]], abn_token: str) -> Dict[str, Any]:
+        from routers.gateway import accept_abn_batch
+        return await accept_abn_batch(channel_id, envelopes, abn_token)
+
+
+class _PooledHTTP:
+    """A keep-alive httpx.AsyncClient per event loop (clients cannot cross loops)."""
+
+    def __init__(self, base_url: str, max_connections: int, timeout_s: float,
+                 client_transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=min(DEFAULT_KEEPALIVE_CONNECTIONS, max_connections))
+        self.timeout_s = timeout_s
+        self.client_transport = client_transport
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._clients[loop] = httpx.AsyncClient(
+                    base_url=self.base_url, limits=self.limits, timeout=self.timeout_s,
+                    transport=self.client_transport)
+            return client
+
+    async def request(self, method: str, path: str, **kwargs) -> Any:
+        response = await self.client().request(method, path, **kwargs)
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            # Same exception type the in-process gateway raises
+            headers = NOT_QUEUED if response.headers.get(QUEUED_HEADER) == "0" else None
+            raise HTTPException(status_code=response.status_code, detail=detail, headers=headers)
+        return response.json()
+
+    async def close(self):
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+class HTTPTransport(ABNTransport):
+    """
+    Talks to a remote gateway over pooled keep-alive HTTP; messages on a
+    channel may be pipelined. Envelope fields larger than `inline_limit`
+    are uploaded once through the channel's presigned URL and sent as
+    `{"$blob": digest}` references.
+    """
+
+    def __init__(self, base_url: str, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 timeout_s: float = DEFAULT_HTTP_TIMEOUT_S, client_transport: Optional[httpx.AsyncBaseTransport] = None,
+                 inline_limit: int = DEFAULT_INLINE_LIMIT):
+        self.http = _PooledHTTP(base_url, max_connections, timeout_s, client_transport)
+        self.inline_limit = inline_limit
+        self._upload_urls: "OrderedDict[str, str]" = OrderedDict()
+        self._uploaded: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _remember(cache: OrderedDict, key: str, value=None):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > MAX_REMEMBERED_UPLOADS:
+            cache.popitem(last=False)
+
+    def _upload_url(self, channel_id: str) -> Optional[str]:
+        with self._lock:
+            url = self._upload_urls.get(channel_id)
+        if url is None:
+            return None
+        expires = parse_qs(urlsplit(url).query).get("expires", ["0"])[0]
+        return url if int(expires) > time.time() + UPLOAD_URL_MARGIN_S else None
+
+    async def _externalize(self, channel_id: str, envelope: Dict[str, Any]) -> Dict[str, Any]:
+        """Uploads the envelope's large fields and swaps them for blob references."""
+        fields = large_fields(envelope, self.inline_limit)
+        url = self._upload_url(channel_id) if fields else None
+        if url is None:
+            # No (valid) upload URL for this channel: the gateway takes the fields inline
+            return envelope
+
+        out = dict(envelope)
+
+        async def upload(key: str, data: bytes, content_type: str):
+            digest = BlobStore.digest(data)
+            with self._lock:
+                known = digest in self._uploaded
+            if not known:
+                await self.http.request("PUT", url, content=data,
+                                        headers={"Content-Type": "application/octet-stream"})
+                with self._lock:
+                    self._remember(self._uploaded, digest)
+            out[key] = blob_ref(digest, len(data), content_type)
+
+        await asyncio.gather(*(upload(key, data, content_type) for key, (data, content_type) in fields.items()))
+        return out
+
+    async def open_channel(self, req: ABNOpenRequest, task_token: str) -> ABNOpenResponse:
+        data = await self.http.request("POST", "/abn/open", json=req.model_dump(),
+                                       headers={"Authorization": task_token})
+        response = ABNOpenResponse(**data)
+        if response.presigned_upload_url:
+            with self._lock:
+                self._remember(self._upload_urls, response.channel_id, response.presigned_upload_url)
+        return response
+
+    async def post_message(self, channel_id: str, envelope: Dict[str, Any], abn_token: str) -> asyncio.Future:
+        # Uploads finish before the message is queued, so posting order is kept
+        envelope = await self._externalize(channel_id, envelope)
+
+        async def send():
+            data = await self.http.request("POST", f"/abn/channel/{channel_id}/messages", json=envelope,
+                                           headers={"Authorization": abn_token})
+            return data.get("reply")
+        return asyncio.ensure_future(send())
+
+    async def send_batch(self, channel_id: str, envelopes: List[Dict[str, Any]], abn_token: str) -> Dict[str, Any]:
+        envelopes = [await self._externalize(channel_id, envelope) for envelope in envelopes]
+        data = await self.http.request("POST", f"/abn/channel/{channel_id}/messages/batch", json=envelopes,
+                                       headers={"Authorization": abn_token})
+        return {"replies": data.get("replies", []), "errors": {int(i): e for i, e in data.get("errors", {}).items()}}
+
+    async def close(self):
+        await self.http.close()
+
+
+class RemoteCore:
+    """
+    Gateway-side stand-in for a core registered from another host: the
+    mailbox hands it messages like a local agent, and it forwards them to
+    the host's /abn/deliver with a short-lived deliver-scoped token (which
+    also carries the run's task id, so the host can route to run instances).
+    """
+
+    def __init__(self, core_id: str, endpoint: str, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 timeout_s: float = DEFAULT_HTTP_TIMEOUT_S, client_transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.core_id = core_id
+        self.endpoint = endpoint
+        self.http = _PooledHTTP(endpoint, max_connections, timeout_s, client_transport)
+
+    async def handle_abn_message(self, envelope: Dict[str, Any], task_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        token = create_deliver_token(envelope.get("channel_id", ""), envelope.get("origin_core"), self.core_id, task_id)
+        data = await self.http.request("POST", "/abn/deliver", json=envelope, headers={"Authorization": token})
+        return data.get("reply")
+
+
+class RemoteCoreRegistry:
+    """Cores registered through /cores/register with an endpoint on another host."""
+
+    def __init__(self):
+        self._cores: Dict[str, RemoteCore] = {}
+        self._lock = threading.Lock()
+
+    def register(self, core_id: str, endpoint: str, **kwargs) -> RemoteCore:
+        with self._lock:
+            core = self._cores.get(core_id)
+            if core is None or core.endpoint != endpoint:
+                core = self._cores[core_id] = RemoteCore(core_id, endpoint, **kwargs)
+            return core
+
+    def unregister(self, core_id: str):
+        with self._lock:
+            self._cores.pop(core_id, None)
+
+    def get(self, core_id: str) -> Optional[RemoteCore]:
+        return self._cores.get(core_id)
+
+
+remote_cores = RemoteCoreRegistry()
+
+
+def transport_from_env() -> ABNTransport:
+    """HTTP to ABN_GATEWAY_URL when set (core on its own host), else the in-process fast path."""
+    url = os.environ.get("ABN_GATEWAY_URL")
+    return HTTPTransport(url) if url else InProcessTransport()
+
+
+default_transport = transport_from_env()
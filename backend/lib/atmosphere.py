@@ -0,0 +1,66 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+# International Standard Atmosphere, imperial units (ft, degR, lbf/ft^2, slug/ft^3)
+T0_R = 518.67
+P0_PSF = 2116.22
+R_AIR = 1716.49            # ft*lbf / (slug*degR)
+GAMMA = 1.4
+G0_FTS2 = 32.174
+LAPSE_R_PER_FT = 0.00356616
+TROPOPAUSE_FT = 36089.24
+STRATOSPHERE_TOP_FT = 65616.8
+STD_TEMP_F = 59.0
+R_TO_F = 459.67
+_EXPONENT = G0_FTS2 / (LAPSE_R_PER_FT * R_AIR)
+
+
+def isa(altitude_ft, temp_offset_f=0.0) -> Dict[str, np.ndarray]:
+    """
+    ISA troposphere + lower stratosphere (to 20 km) at geopotential altitude,
+    vectorized over any broadcastable altitude / offset arrays.
+
+    The temperature offset shifts temperature at constant pressure, as for a
+    hot / cold day at a given pressure altitude. Altitudes outside the model
+    are clamped to its range.
+    """
+    h = np.clip(np.asarray(altitude_ft, dtype=float), 0.0, STRATOSPHERE_TOP_FT)
+    dT = np.asarray(temp_offset_f, dtype=float)
+
+    t_std = T0_R - LAPSE_R_PER_FT * np.minimum(h, TROPOPAUSE_FT)
+    pressure = P0_PSF * (t_std / T0_R) ** _EXPONENT
+    pressure = pressure * np.exp(-G0_FTS2 * np.maximum(h - TROPOPAUSE_FT, 0.0) / (R_AIR * t_std))
+
+    temperature = t_std + dT
+    return {
+        "density_slug_ft3": pressure / (R_AIR * temperature),
+        "pressure_psf": pressure,
+        "temperature_f": temperature - R_TO_F,
+        "speed_of_sound_fts": np.sqrt(GAMMA * R_AIR * temperature),
+    }
+
+
+SEA_LEVEL_DENSITY = float(isa(0.0)["density_slug_ft3"])
+
+
+def density_ratio(altitude_ft, temp_offset_f=0.0) -> np.ndarray:
+    """sigma = rho / rho_sea_level, the form the PAVPhysics formulas take."""
+    h = np.clip(np.asarray(altitude_ft, dtype=float), 0.0, STRATOSPHERE_TOP_FT)
+    t_std = T0_R - LAPSE_R_PER_FT * np.minimum(h, TROPOPAUSE_FT)
+    # rho / rho0 = (p / p0) * (T0 / T)
+    p_ratio = (t_std / T0_R) ** _EXPONENT * np.exp(-G0_FTS2 * np.maximum(h - TROPOPAUSE_FT, 0.0) / (R_AIR * t_std))
+    return p_ratio * T0_R / (t_std + np.asarray(temp_offset_f, dtype=float))
+
+
+def ambient_offset_f(altitude_ft, temp_f: Optional[float] = None) -> np.ndarray:
+    """
+    ISA temperature offset for an ambient (outside air) temperature measured
+    at altitude_ft: pressure stays the ISA value there, temperature becomes
+    temp_f. None means a standard day (offset 0).
+    """
+    if temp_f is None:
+        return np.zeros_like(np.asarray(altitude_ft, dtype=float))
+    h = np.clip(np.asarray(altitude_ft, dtype=float), 0.0, STRATOSPHERE_TOP_FT)
+    t_std = T0_R - LAPSE_R_PER_FT * np.minimum(h, TROPOPAUSE_FT)
+    return np.asarray(temp_f, dtype=float) + R_TO_F - t_std
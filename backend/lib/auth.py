@@ -1,11 +1,91 @@
 import jwt
 import os
+import time
+import hashlib
 import datetime
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
 
 JWT_SECRET = os.getenv("JWT_SECRET", "super-secret-dev-key")
 ALGORITHM = "HS256"
 
+# Decoded tokens kept in memory, and how long a revoked channel id is remembered.
+MAX_VERIFIED_TOKENS = 4096
+REVOKED_RETENTION_S = 24 * 3600
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of verified JWT claims keyed by the SHA-256 of the token.
+    An entry is only served until the token's own `exp`, so a cache hit never
+    outlives what jwt.decode would have accepted.
+    """
+    def __init__(self, max_entries: int = MAX_VERIFIED_TOKENS):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None and claims.get("exp", 0) > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return claims
+            if claims is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: Dict[str, Any]):
+        with self._lock:
+            self._entries[self._key(token)] = claims
+            self._entries.move_to_end(self._key(token))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict_subject(self, sub: str) -> int:
+        """Drops every cached token issued for `sub` (e.g. 'channel:<id>')."""
+        with self._lock:
+            stale = [k for k, claims in self._entries.items() if claims.get("sub") == sub]
+            for k in stale:
+                del self._entries[k]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+verified_tokens = VerifiedTokenCache()
+_revoked_channels: Dict[str, float] = {}
+_revoked_lock = threading.Lock()
+
+
+def revoke_channel_tokens(channel_id: str):
+    """Rejects every token for the channel from now on and drops its cached claims."""
+    now = time.time()
+    with _revoked_lock:
+        _revoked_channels[channel_id] = now
+        for cid in [c for c, at in _revoked_channels.items() if now - at > REVOKED_RETENTION_S]:
+            del _revoked_channels[cid]
+    verified_tokens.evict_subject(f"channel:{channel_id}")
+
+
+def is_channel_revoked(channel_id: str) -> bool:
+    return channel_id in _revoked_channels
+
 def create_task_token(task_id: str, cores: List[str], allow_direct: bool = False, expires_in_hours: int = 1) -> str:
     payload = {
         "iss": "orchestrator.beam.me",
@@ -16,7 +96,8 @@ def create_task_token(task_id: str, cores: List[str], allow_direct: bool = False
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
 
-def create_abn_token(channel_id: str, origin_core: str, target_core: str, budget: int, allowed_msg_types: List[str], expires_in_hours: int = 1) -> str:
+def create_abn_token(channel_id: str, origin_core: str, target_core: str, budget: int, allowed_msg_types: List[str], expires_in_hours: int = 1,
+                     task_id: Optional[str] = None) -> str:
     payload = {
         "iss": "orchestrator.beam.me",
         "sub": f"channel:{channel_id}",
@@ -26,17 +107,63 @@ def create_abn_token(channel_id: str, origin_core: str, target_core: str, budget
         "allowed_msg_types": allowed_msg_types,
         "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=expires_in_hours)
     }
+    if task_id:
+        # Lets the gateway route the channel's messages to the run's own cores
+        payload["task_id"] = task_id
+    return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
+
+def create_core_token(core_id: str, expires_in_hours: int = 24) -> str:
+    """
+    Service token of a core's host, required to register (or move) the
+    endpoint the gateway forwards that core's messages to.
+    """
+    payload = {
+        "iss": "orchestrator.beam.me",
+        "sub": f"core:{core_id}",
+        "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=expires_in_hours)
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
+
+def create_deliver_token(channel_id: str, origin_core: str, target_core: str, task_id: Optional[str] = None,
+                         expires_in_s: int = 60) -> str:
+    """
+    Short-lived token the gateway attaches when forwarding one message to a
+    remote core's host (/abn/deliver). Its own scope, so an ordinary channel
+    token cannot be used to bypass the gateway.
+    """
+    payload = {
+        "iss": "orchestrator.beam.me",
+        "sub": f"deliver:{channel_id}",
+        "origin_core": origin_core,
+        "target_core": target_core,
+        "exp": datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in_s)
+    }
+    if task_id:
+        payload["task_id"] = task_id
     return jwt.encode(payload, JWT_SECRET, algorithm=ALGORITHM)
 
 def verify_token(token: str, expected_prefix: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Decodes and checks a token. Repeat presentations of the same token are
+    served from verified_tokens until its exp; tokens of revoked channels
+    are always rejected.
+    """
     try:
         token = token.replace("Bearer ", "")
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        
+        payload = verified_tokens.get(token)
+        if payload is None:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+            verified_tokens.put(token, payload)
+
+        sub = payload.get("sub", "")
+        scope, _, channel_id = sub.partition(":")
+        if scope in ("channel", "deliver") and is_channel_revoked(channel_id):
+            raise Exception("Channel has been revoked")
+
         if expected_prefix:
-            if not payload.get("sub", "").startswith(expected_prefix):
+            if not sub.startswith(expected_prefix):
                  raise Exception(f"Invalid token scope. Expected {expected_prefix}")
                  
-        return payload
+        return dict(payload)
     except Exception as e:
         raise Exception(f"Token verification failed: {str(e)}")
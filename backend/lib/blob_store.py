@@ -0,0 +1,265 @@
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+import zlib
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zlib fallback; blobs record their codec, so both can be read
+    zstandard = None
+
+from lib.auth import JWT_SECRET
+from lib.data_dir import data_path
+
+# Envelope fields serialized larger than this are stored as blobs and referenced.
+DEFAULT_INLINE_LIMIT = 4096
+DEFAULT_URL_TTL_S = 3600
+# Largest body accepted by a presigned upload.
+DEFAULT_MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Routing fields always stay inline.
+ENVELOPE_FIELDS = {"trace_id", "channel_id", "seq", "origin_core", "target_core", "msg_type"}
+BLOB_KEY = "$blob"
+
+
+class BlobStore:
+    """
+    Local content-addressed store for large ABN payloads.
+
+    Blobs live under `root/sha256/<aa>/<digest>`, compressed with zstd when
+    available (zlib otherwise) and deduplicated by the SHA-256 of their raw
+    bytes: storing identical content again is a no-op. Writes are atomic
+    (temp file + rename) and reads are checked against the digest.
+
+    `externalize` swaps large envelope fields for `{"$blob": digest, ...}`
+    references and `materialize` resolves them again; presigned URLs are
+    HMAC-signed with the ABN secret and expire. Uploads are streamed to disk
+    through `writer()` and capped at `max_upload_bytes`.
+    """
+
+    def __init__(self, root: str, inline_limit: int = DEFAULT_INLINE_LIMIT, level: int = 3,
+                 secret: str = JWT_SECRET, max_upload_bytes: int = DEFAULT_MAX_UPLOAD_BYTES):
+        self.root = root
+        self.inline_limit = inline_limit
+        self.max_upload_bytes = max_upload_bytes
+        self.level = level
+        self._secret = secret.encode()
+        self.stats = {"puts": 0, "deduplicated": 0, "bytes_in": 0, "bytes_stored": 0}
+
+    # --- Storage ---
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, digest: str) -> str:
+        """Store-relative path of a blob (what envelopes and transcripts record)."""
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return f"sha256/{digest[:2]}/{digest}"
+
+    def _file(self, digest: str) -> str:
+        return os.path.join(self.root, self.path(digest))
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._file(digest))
+
+    def _compress(self, data: bytes) -> bytes:
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, min(self.level * 2, 9))
+
+    def _compressobj(self):
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=self.level).compressobj()
+        return zlib.compressobj(min(self.level * 2, 9))
+
+    @staticmethod
+    def _decompress(blob: bytes) -> bytes:
+        if blob.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                raise RuntimeError("Blob is zstd-compressed but zstandard is not installed")
+            # Streamed frames carry no content size, so decompress as a stream
+            return zstandard.ZstdDecompressor().decompressobj().decompress(blob)
+        return zlib.decompress(blob)
+
+    def put(self, data: bytes) -> Dict[str, Any]:
+        """Stores `data` once; returns its digest, path and sizes."""
+        digest = self.digest(data)
+        target = self._file(digest)
+        deduplicated = os.path.exists(target)
+        stored = os.path.getsize(target) if deduplicated else 0
+        if not deduplicated:
+            packed = self._compress(data)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(packed)
+            os.replace(tmp, target)
+            stored = len(packed)
+            self.stats["bytes_stored"] += stored
+        self.stats["puts"] += 1
+        self.stats["deduplicated"] += int(deduplicated)
+        self.stats["bytes_in"] += len(data)
+        return {"hash": digest, "path": self.path(digest), "size_bytes": len(data),
+                "stored_bytes": stored, "deduplicated": deduplicated}
+
+    def writer(self) -> "BlobWriter":
+        """Incremental put for uploads too large to buffer in memory."""
+        return BlobWriter(self)
+
+    def get(self, digest: str) -> bytes:
+        """Raw bytes of a blob; KeyError if unknown, ValueError if corrupted."""
+        try:
+            with open(self._file(digest), "rb") as f:
+                data = self._decompress(f.read())
+        except FileNotFoundError:
+            raise KeyError(digest)
+        if self.digest(data) != digest:
+            raise ValueError(f"Blob {digest} failed its integrity check")
+        return data
+
+    # --- Envelope references ---
+
+    @staticmethod
+    def _encode(value: Any) -> Tuple[bytes, str]:
+        if isinstance(value, str):
+            return value.encode("utf-8"), "text/plain"
+        return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"), "application/json"
+
+    def externalize(self, envelope: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of the envelope with fields larger than inline_limit replaced by blob references."""
+        out = dict(envelope)
+        for key, (data, content_type) in large_fields(envelope, self.inline_limit).items():
+            out[key] = blob_ref(self.put(data)["hash"], len(data), content_type)
+        return out
+
+    def materialize(self, envelope: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of the envelope with blob references resolved; KeyError names a missing blob."""
+        if not any(is_blob_ref(v) for v in envelope.values()):
+            return envelope
+        out = {}
+        for key, value in envelope.items():
+            if is_blob_ref(value):
+                data = self.get(value[BLOB_KEY])
+                out[key] = data.decode("utf-8") if value.get("content_type") == "text/plain" else json.loads(data)
+            else:
+                out[key] = value
+        return out
+
+    def message_ref(self, message: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """
+        (payload_hash, payload_path) for a transcript row. Messages carrying
+        blob references are stored as a small manifest so the row points at
+        the full message; plain messages are only hashed.
+        """
+        data, _ = self._encode(message)
+        if any(is_blob_ref(v) for v in message.values()):
+            stored = self.put(data)
+            return stored["hash"], stored["path"]
+        return self.digest(data), None
+
+    # --- Presigned URLs ---
+
+    def _sign(self, action: str, subject: str, expires: int) -> str:
+        return hmac.new(self._secret, f"{action}:{subject}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def presign(self, action: str, subject: str, ttl_s: int = DEFAULT_URL_TTL_S) -> Dict[str, Any]:
+        """Signature for `upload` (subject = channel id) or `download` (subject = digest)."""
+        expires = int(time.time()) + ttl_s
+        return {"expires": expires, "signature": self._sign(action, subject, expires)}
+
+    def check_signature(self, action: str, subject: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._sign(action, subject, expires), signature or "")
+
+    def upload_url(self, channel_id: str, ttl_s: int = DEFAULT_URL_TTL_S) -> str:
+        signed = self.presign("upload", channel_id, ttl_s)
+        return f"/abn/blobs?channel_id={channel_id}&expires={signed['expires']}&signature={signed['signature']}"
+
+    def download_url(self, digest: str, ttl_s: int = DEFAULT_URL_TTL_S) -> str:
+        signed = self.presign("download", digest, ttl_s)
+        return f"/abn/blobs/{digest}?expires={signed['expires']}&signature={signed['signature']}"
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "codec": "zstd" if zstandard is not None else "zlib"}
+
+
+class BlobWriter:
+    """
+    One streamed upload: chunks are hashed and compressed into a temp file
+    under the store, which is renamed into place (or dropped as a duplicate)
+    on commit.
+    """
+
+    def __init__(self, store: BlobStore):
+        self.store = store
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._compressor = store._compressobj()
+        tmp_dir = os.path.join(store.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(dir=tmp_dir, prefix=".upload-")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        self._file.write(self._compressor.compress(chunk))
+
+    def commit(self) -> Dict[str, Any]:
+        self._file.write(self._compressor.flush())
+        self._file.close()
+        digest = self._hash.hexdigest()
+        target = self.store._file(digest)
+        deduplicated = os.path.exists(target)
+        if deduplicated:
+            os.remove(self._tmp)
+            stored = os.path.getsize(target)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            stored = os.path.getsize(self._tmp)
+            os.replace(self._tmp, target)
+            self.store.stats["bytes_stored"] += stored
+        self._tmp = None
+        self.store.stats["puts"] += 1
+        self.store.stats["deduplicated"] += int(deduplicated)
+        self.store.stats["bytes_in"] += self.size
+        return {"hash": digest, "path": self.store.path(digest), "size_bytes": self.size,
+                "stored_bytes": stored, "deduplicated": deduplicated}
+
+    def abort(self):
+        """Discards an unfinished upload; no-op after commit."""
+        if self._tmp is not None:
+            self._file.close()
+            os.remove(self._tmp)
+            self._tmp = None
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and BLOB_KEY in value
+
+
+def blob_ref(digest: str, size_bytes: int, content_type: str) -> Dict[str, Any]:
+    return {BLOB_KEY: digest, "size_bytes": size_bytes, "content_type": content_type}
+
+
+def large_fields(envelope: Dict[str, Any], inline_limit: int) -> Dict[str, Tuple[bytes, str]]:
+    """Encoded (bytes, content type) of the envelope fields too large to send inline."""
+    out = {}
+    for key, value in envelope.items():
+        if key in ENVELOPE_FIELDS or is_blob_ref(value) or isinstance(value, (int, float, bool)) or value is None:
+            continue
+        data, content_type = BlobStore._encode(value)
+        if len(data) > inline_limit:
+            out[key] = (data, content_type)
+    return out
+
+
+blob_store = BlobStore(os.environ.get("ABN_BLOB_DIR", data_path("abn-blobs")),
+                       max_upload_bytes=int(os.environ.get("ABN_BLOB_MAX_BYTES", DEFAULT_MAX_UPLOAD_BYTES)))
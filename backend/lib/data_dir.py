@@ -0,0 +1,9 @@
+import os
+
+# Persistent backend state (ABN blobs, write-behind spool) lives under here.
+DATA_DIR = os.environ.get("BEAM_DATA_DIR",
+                          os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+
+
+def data_path(*parts: str) -> str:
+    return os.path.join(DATA_DIR, *parts)
@@ -3,6 +3,8 @@ import os
 import importlib.util
 import numpy as np
 
+from lib.atmosphere import density_ratio, ambient_offset_f
+
 # This module acts as a bridge. 
 # It tries to load the PAVPhysics class from the user-code repository.
 # If not found, it falls back to a local definition (or raises an error).
@@ -43,49 +45,114 @@ if os.path.exists(FULL_PATH):
         print(f"[System] Warning: Failed to load external physics lib from {FULL_PATH}: {e}")
 
 # 2. Fallback Definition (if user repo not present or broken)
+class FallbackPAVPhysics:
+    """Fallback implementation if user-code is missing."""
+    @staticmethod
+    def get_air_density(altitude_ft=0, temp_f=None, sigma=1.0):
+        # ISA pressure at altitude, ambient temperature temp_f there (ISA standard day if None)
+        return RHO_STD * sigma * float(density_ratio(altitude_ft, ambient_offset_f(altitude_ft, temp_f)))
+
+    @staticmethod
+    def calc_lift_coefficient(W, rho, V_ft_s, S):
+        if V_ft_s < 1: return 0.0
+        return (2 * W) / (rho * (V_ft_s**2) * S)
+
+    @staticmethod
+    def calc_drag(W, rho, V_ft_s, S, AR, e, CDw, Aw):
+        if V_ft_s < 10: return float('inf')
+        CL = FallbackPAVPhysics.calc_lift_coefficient(W, rho, V_ft_s, S)
+        if CL == 0: return float('inf')
+        try:
+            # Drag = Induced + Profile
+            # Drag = Lift * (CL / (pi * AR * e) + (CDw * Aw) / (CL * S))
+            induced = CL / (np.pi * AR * e)
+            profile = (CDw * Aw) / (CL * S)
+            return W * (induced + profile)
+        except:
+            return float('inf')
+
+    @staticmethod
+    def calc_hover_power_kw(W, Ae, eta_vtol=0.7, sigma=0.93):
+        rho = sigma * RHO_STD
+        # Negative weight / non-positive disc area, density or efficiency: infeasible
+        if W < 0 or Ae <= 0 or rho <= 0 or eta_vtol <= 0:
+            return float('inf')
+        try:
+            p_ideal_ft_lbs = (W ** 1.5) / np.sqrt(2 * rho * Ae)
+            return (p_ideal_ft_lbs / 550.0) / eta_vtol * 0.7457
+        except:
+            return float('inf')
+            
+    @staticmethod
+    def calc_cruise_power_kw(drag_lbs, V_ft_s, eta_cruise=0.8):
+        if eta_cruise <= 0: return float('inf')
+        power_hp = (drag_lbs * V_ft_s) / (550 * eta_cruise)
+        return power_hp * 0.7457
+    
+    @staticmethod
+    def calc_dynamic_pressure(rho, V):
+        return 0.5 * rho * (V**2)
+
 if PAVPhysics is None:
     print("[System] Using fallback PAVPhysics implementation.")
-    
-    class PAVPhysics:
-        """Fallback implementation if user-code is missing."""
-        @staticmethod
-        def get_air_density(altitude_ft=0, temp_f=59, sigma=1.0):
-            return RHO_STD * sigma
-
-        @staticmethod
-        def calc_lift_coefficient(W, rho, V_ft_s, S):
-            if V_ft_s < 1: return 0.0
-            return (2 * W) / (rho * (V_ft_s**2) * S)
-
-        @staticmethod
-        def calc_drag(W, rho, V_ft_s, S, AR, e, CDw, Aw):
-            if V_ft_s < 10: return float('inf')
-            CL = PAVPhysics.calc_lift_coefficient(W, rho, V_ft_s, S)
-            if CL == 0: return float('inf')
-            try:
-                # Drag = Induced + Profile
-                # Drag = Lift * (CL / (pi * AR * e) + (CDw * Aw) / (CL * S))
-                induced = CL / (np.pi * AR * e)
-                profile = (CDw * Aw) / (CL * S)
-                return W * (induced + profile)
-            except:
-                return float('inf')
-
-        @staticmethod
-        def calc_hover_power_kw(W, Ae, eta_vtol=0.7, sigma=0.93):
-            rho = sigma * RHO_STD
-            try:
-                p_ideal_ft_lbs = (W ** 1.5) / np.sqrt(2 * rho * Ae)
-                return (p_ideal_ft_lbs / 550.0) / eta_vtol * 0.7457
-            except:
-                return float('inf')
-                
-        @staticmethod
-        def calc_cruise_power_kw(drag_lbs, V_ft_s, eta_cruise=0.8):
-            if eta_cruise <= 0: return float('inf')
-            power_hp = (drag_lbs * V_ft_s) / (550 * eta_cruise)
-            return power_hp * 0.7457
-        
-        @staticmethod
-        def calc_dynamic_pressure(rho, V):
-            return 0.5 * rho * (V**2)
+    PAVPhysics = FallbackPAVPhysics
+
+
+def _out(x):
+    """Returns a NumPy scalar for 0-d results so scalar callers keep working."""
+    return x[()] if isinstance(x, np.ndarray) and x.ndim == 0 else x
+
+
+class VectorPAVPhysics:
+    """
+    Array version of the PAVPhysics formulas (same imperial units).
+
+    Every argument broadcasts with NumPy rules. The stall / low-speed branches
+    and the error paths of the scalar fallback are applied with masks, so a
+    bad point yields inf instead of raising or poisoning the whole array.
+    Invalid inputs (e.g. negative hover weight) give inf in both versions.
+    """
+    @staticmethod
+    def get_air_density(altitude_ft=0, temp_f=None, sigma=1.0):
+        sigma = np.asarray(sigma, dtype=float)
+        return _out(RHO_STD * sigma * density_ratio(altitude_ft, ambient_offset_f(altitude_ft, temp_f)))
+
+    @staticmethod
+    def calc_lift_coefficient(W, rho, V_ft_s, S):
+        W, rho, V, S = (np.asarray(a, dtype=float) for a in (W, rho, V_ft_s, S))
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            CL = (2 * W) / (rho * V**2 * S)
+        return _out(np.where(V < 1, 0.0, CL))
+
+    @staticmethod
+    def calc_drag(W, rho, V_ft_s, S, AR, e, CDw, Aw):
+        W, rho, V, S, AR, e, CDw, Aw = (np.asarray(a, dtype=float) for a in (W, rho, V_ft_s, S, AR, e, CDw, Aw))
+        CL = np.asarray(VectorPAVPhysics.calc_lift_coefficient(W, rho, V, S))
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            induced = CL / (np.pi * AR * e)
+            profile = (CDw * Aw) / (CL * S)
+            drag = W * (induced + profile)
+        invalid = (V < 10) | (CL == 0) | ~np.isfinite(drag)
+        return _out(np.where(invalid, np.inf, drag))
+
+    @staticmethod
+    def calc_hover_power_kw(W, Ae, eta_vtol=0.7, sigma=0.93):
+        W, Ae, eta, sigma = (np.asarray(a, dtype=float) for a in (W, Ae, eta_vtol, sigma))
+        rho = sigma * RHO_STD
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            p_ideal_ft_lbs = W**1.5 / np.sqrt(2 * rho * Ae)
+            power = (p_ideal_ft_lbs / 550.0) / eta * 0.7457
+        invalid = (W < 0) | (Ae <= 0) | (rho <= 0) | (eta <= 0) | ~np.isfinite(power)
+        return _out(np.where(invalid, np.inf, power))
+
+    @staticmethod
+    def calc_cruise_power_kw(drag_lbs, V_ft_s, eta_cruise=0.8):
+        drag, V, eta = (np.asarray(a, dtype=float) for a in (drag_lbs, V_ft_s, eta_cruise))
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            power = (drag * V) / (550 * eta) * 0.7457
+        return _out(np.where(eta <= 0, np.inf, power))
+
+    @staticmethod
+    def calc_dynamic_pressure(rho, V):
+        rho, V = np.asarray(rho, dtype=float), np.asarray(V, dtype=float)
+        return _out(0.5 * rho * V**2)
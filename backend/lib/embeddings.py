@@ -1,20 +1,76 @@
 import os
+import re
+import zlib
 import openai
+import numpy as np
+from typing import List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
 openai.api_key = os.environ.get("OPENAI_API_KEY")
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+LOCAL_EMBEDDING_DIM = 1024
+_WORD_RE = re.compile(r"\w+")
+
 def generate_embedding(text: str):
     """Generates an embedding vector for the given text using OpenAI."""
     text = text.replace("\n", " ")
     try:
         response = openai.embeddings.create(
             input=[text],
-            model="text-embedding-3-small"
+            model=EMBEDDING_MODEL
         )
         return response.data[0].embedding
     except Exception as e:
         print(f"Error generating embedding: {e}")
         return None
+
+def embedding_backend() -> str:
+    """
+    'openai' or 'local'. Set KB_EMBEDDING_BACKEND to force one; defaults to
+    OpenAI when an API key is configured.
+    """
+    backend = os.environ.get("KB_EMBEDDING_BACKEND")
+    if backend:
+        return backend
+    return "openai" if os.environ.get("OPENAI_API_KEY") else "local"
+
+def generate_embeddings(texts: List[str], batch_size: int = 256) -> Optional[np.ndarray]:
+    """Embeds many texts with OpenAI in batched requests. Returns an (n, d) array or None."""
+    vectors = []
+    try:
+        for start in range(0, len(texts), batch_size):
+            batch = [t.replace("\n", " ") for t in texts[start:start + batch_size]]
+            response = openai.embeddings.create(input=batch, model=EMBEDDING_MODEL)
+            vectors.extend(d.embedding for d in response.data)
+    except Exception as e:
+        print(f"Error generating embeddings: {e}")
+        return None
+    return np.asarray(vectors, dtype=np.float32)
+
+def local_embeddings(texts: List[str], dim: int = LOCAL_EMBEDDING_DIM) -> np.ndarray:
+    """
+    Offline hashed bag-of-words embedding (words + character trigrams).
+    Deterministic across processes, so it can be persisted like remote vectors.
+    """
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in _WORD_RE.findall(text.lower()):
+            out[row, zlib.crc32(word.encode()) % dim] += 1.0
+            padded = f"#{word}#"
+            for j in range(len(padded) - 2):
+                out[row, zlib.crc32(padded[j:j + 3].encode()) % dim] += 0.5
+    return out
+
+def embed_texts(texts: List[str]):
+    """
+    Embeds texts with the configured backend, falling back to the local
+    embedding if the remote call fails. Returns (model_name, vectors).
+    """
+    if embedding_backend() == "openai":
+        vectors = generate_embeddings(texts)
+        if vectors is not None:
+            return EMBEDDING_MODEL, vectors
+    return f"local-hash-{LOCAL_EMBEDDING_DIM}", local_embeddings(texts)
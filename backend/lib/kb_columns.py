@@ -0,0 +1,127 @@
+import json
+import os
+import glob
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Catalogs at least this large are persisted as a memory-mapped column file
+# next to the Knowledge Base so worker processes share the pages.
+MMAP_MIN_ITEMS = int(os.environ.get("KB_MMAP_MIN_ITEMS", "5000"))
+
+Range = Tuple[Optional[float], Optional[float]]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class NumericCatalog:
+    """
+    Typed numeric columns for one Knowledge Base category.
+
+    Every field holding a number in at least one item becomes a float64 column
+    (NaN where an item lacks it). Range filters and top-k ordering run as
+    vectorized NumPy operations and return the matching items.
+    """
+    def __init__(self, items: List[Dict[str, Any]], fields: List[str], matrix: np.ndarray):
+        self.items = items
+        self.fields = fields
+        self._matrix = matrix
+        self._field_index = {name: i for i, name in enumerate(fields)}
+
+    @classmethod
+    def build(cls, items: List[Any], cache_path: Optional[str] = None) -> "NumericCatalog":
+        items = [item for item in items if isinstance(item, dict)]
+
+        if cache_path and os.path.exists(cache_path + ".npy"):
+            try:
+                with open(cache_path + ".json", "r") as f:
+                    fields = json.load(f)["fields"]
+                matrix = np.load(cache_path + ".npy", mmap_mode="r")
+                if matrix.shape == (len(fields), len(items)):
+                    return cls(items, fields, matrix)
+            except Exception as e:
+                print(f"Ignoring unreadable column cache {cache_path}: {e}")
+
+        fields: List[str] = []
+        seen = set()
+        for item in items:
+            for key, value in item.items():
+                if key not in seen and _is_number(value):
+                    seen.add(key)
+                    fields.append(key)
+
+        matrix = np.full((len(fields), len(items)), np.nan)
+        for row, name in enumerate(fields):
+            matrix[row] = [item[name] if _is_number(item.get(name)) else np.nan for item in items]
+
+        if cache_path and len(items) >= MMAP_MIN_ITEMS:
+            matrix = cls._persist(cache_path, fields, matrix)
+        return cls(items, fields, matrix)
+
+    @staticmethod
+    def _persist(cache_path: str, fields: List[str], matrix: np.ndarray) -> np.ndarray:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # Drop column files written for older versions of the same category.
+            prefix = cache_path.rsplit(".", 1)[0]
+            for stale in glob.glob(prefix + ".*"):
+                if not stale.startswith(cache_path + "."):
+                    os.remove(stale)
+            tmp = cache_path + ".tmp.npy"
+            np.save(tmp, matrix)
+            os.replace(tmp, cache_path + ".npy")
+            with open(cache_path + ".json", "w") as f:
+                json.dump({"fields": fields}, f)
+            return np.load(cache_path + ".npy", mmap_mode="r")
+        except Exception as e:
+            print(f"Could not persist column cache {cache_path}: {e}")
+            return matrix
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns the float64 column for name (all NaN if the field is unknown)."""
+        row = self._field_index.get(name)
+        if row is None:
+            return np.full(len(self.items), np.nan)
+        return self._matrix[row]
+
+    def mask(self, where: Optional[Dict[str, Range]] = None) -> np.ndarray:
+        """Boolean mask of items with every field inside its inclusive (min, max) range."""
+        keep = np.ones(len(self.items), dtype=bool)
+        for name, (lo, hi) in (where or {}).items():
+            col = self.column(name)
+            keep &= ~np.isnan(col)
+            if lo is not None:
+                keep &= col >= lo
+            if hi is not None:
+                keep &= col <= hi
+        return keep
+
+    def select(self, where: Optional[Dict[str, Range]] = None, order_by: Optional[str] = None,
+               descending: bool = False, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Indices of matching items, optionally ordered by a column and cut to the top `limit`.
+        Items missing the order_by field sort last.
+        """
+        idx = np.flatnonzero(self.mask(where))
+        if limit is not None and limit <= 0:
+            return idx[:0]
+        if order_by is not None and len(idx):
+            keys = self.column(order_by)[idx]
+            keys = -keys if descending else keys.copy()
+            keys[np.isnan(keys)] = np.inf
+            if limit is not None and limit < len(idx):
+                part = np.argpartition(keys, limit - 1)[:limit]
+                idx, keys = idx[part], keys[part]
+            idx = idx[np.lexsort((idx, keys))]
+        if limit is not None:
+            idx = idx[:limit]
+        return idx
+
+    def query(self, where: Optional[Dict[str, Range]] = None, order_by: Optional[str] = None,
+              descending: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [self.items[i] for i in self.select(where, order_by, descending, limit)]
@@ -0,0 +1,135 @@
+import json
+import os
+import glob
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from lib.embeddings import embed_texts, embedding_backend, generate_embeddings, local_embeddings, EMBEDDING_MODEL
+
+# Rough prompt-size estimate used for token budgets (no tokenizer dependency).
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class SemanticIndex:
+    """
+    Embedding index over every entry of a Knowledge Base file.
+
+    Entries are embedded once per snapshot and the vectors are persisted under
+    knowledge/.cache/ keyed by the file digest, so restarts do not re-embed.
+    Queries are a single matrix-vector product followed by a top-k selection.
+    """
+    def __init__(self, entries: List[Dict[str, Any]], texts: List[str], model: str, vectors: np.ndarray):
+        self.entries = entries
+        self.texts = texts
+        self.model = model
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.vectors = (vectors / norms).astype(np.float32)
+        self.categories = np.array([e["category"] for e in entries], dtype=object)
+        self.tokens = np.array([estimate_tokens(t) for t in texts], dtype=np.int64)
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    @classmethod
+    def build(cls, data: Dict[str, Any], cache_path: Optional[str] = None) -> "SemanticIndex":
+        entries, texts = [], []
+        for category, items in data.items():
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                entries.append({"category": category, "item": item})
+                texts.append(json.dumps(item, separators=(",", ":")))
+
+        cached = cls._load(cache_path, len(texts))
+        if cached is not None:
+            model, vectors = cached
+        elif texts:
+            model, vectors = embed_texts([f"{e['category']}: {t}" for e, t in zip(entries, texts)])
+            cls._persist(cache_path, model, vectors)
+        else:
+            model, vectors = "empty", np.zeros((0, 1), dtype=np.float32)
+        return cls(entries, texts, model, vectors)
+
+    @staticmethod
+    def _load(cache_path: Optional[str], count: int):
+        if not cache_path:
+            return None
+        want_remote = embedding_backend() == "openai"
+        for path in glob.glob(cache_path + ".*.npz"):
+            try:
+                with np.load(path, allow_pickle=False) as f:
+                    vectors = f["vectors"]
+                    model = str(f["model"])
+                if len(vectors) == count and (model == EMBEDDING_MODEL) == want_remote:
+                    return model, vectors
+            except Exception as e:
+                print(f"Ignoring unreadable embedding cache {path}: {e}")
+        return None
+
+    @staticmethod
+    def _persist(cache_path: Optional[str], model: str, vectors: np.ndarray):
+        if not cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            prefix = cache_path.rsplit(".", 1)[0]
+            for stale in glob.glob(prefix + ".*.npz"):
+                os.remove(stale)
+            tmp = f"{cache_path}.{model}.tmp.npz"
+            np.savez(tmp, vectors=vectors, model=np.array(model))
+            os.replace(tmp, f"{cache_path}.{model}.npz")
+        except Exception as e:
+            print(f"Could not persist embedding cache {cache_path}: {e}")
+
+    def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        vec = self._query_cache.get(query)
+        if vec is not None:
+            self._query_cache.move_to_end(query)
+            return vec
+        if self.model == EMBEDDING_MODEL:
+            vectors = generate_embeddings([query])
+            if vectors is None:
+                return None
+        else:
+            vectors = local_embeddings([query], dim=self.vectors.shape[1])
+        vec = vectors[0] / (np.linalg.norm(vectors[0]) or 1.0)
+        self._query_cache[query] = vec
+        if len(self._query_cache) > 512:
+            self._query_cache.popitem(last=False)
+        return vec
+
+    def search(self, query: str, categories: Optional[List[str]] = None, k: int = 5,
+               token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Top-k entries most similar to query, best first, optionally restricted
+        to categories and cut so the serialized entries fit token_budget.
+        """
+        if not self.entries or k <= 0:
+            return []
+        q = self._embed_query(query)
+        if q is None:
+            return []
+
+        scores = self.vectors @ q
+        if categories is not None:
+            scores = np.where(np.isin(self.categories, list(categories)), scores, -np.inf)
+        candidates = int(np.isfinite(scores).sum())
+        k = min(k, candidates)
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results, used = [], 0
+        for i in top:
+            if token_budget is not None and used + self.tokens[i] > token_budget:
+                continue
+            used += int(self.tokens[i])
+            entry = self.entries[i]
+            results.append({"category": entry["category"], "score": float(scores[i]), "item": entry["item"]})
+        return results
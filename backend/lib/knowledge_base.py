@@ -1,45 +1,450 @@
 import json
 import os
-from typing import List, Dict, Any, Optional
+import re
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Callable, FrozenSet
 
-class KnowledgeBase:
+from lib.kb_columns import NumericCatalog, Range
+from lib.kb_semantic import SemanticIndex
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Upper bound on cached prompt fragments per snapshot (category + query combinations).
+MAX_FRAGMENTS = 256
+
+
+class FrozenDict(dict):
     """
-    A simple JSON-backed knowledge base tool.
-    Allows agents to load and search structured data.
+    Read-only dict used for shared Knowledge Base snapshots.
+    Subclasses dict so json.dumps and isinstance checks keep working.
+    Copies and pickles come back as plain (mutable) dicts.
     """
-    def __init__(self, file_path: str):
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Knowledge Base data is read-only")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __hash__(self):
+        return id(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+    """Read-only list counterpart of FrozenDict (copies and pickles are plain lists)."""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Knowledge Base data is read-only")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __iadd__ = _readonly
+    __imul__ = _readonly
+    append = _readonly
+    extend = _readonly
+    insert = _readonly
+    remove = _readonly
+    pop = _readonly
+    clear = _readonly
+    sort = _readonly
+    reverse = _readonly
+
+    def __hash__(self):
+        return id(self)
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively converts parsed JSON into FrozenDict / FrozenList structures."""
+    if isinstance(value, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Plain, mutable deep copy of frozen snapshot data."""
+    if isinstance(value, dict):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_thaw(v) for v in value]
+    return value
+
+
+class KnowledgeSnapshot:
+    """
+    One immutable, parsed version of a Knowledge Base file.
+    Derived structures (indexes, caches) are attached per snapshot so they
+    are dropped automatically when the file is reloaded.
+    """
+    def __init__(self, file_path: str, data: FrozenDict, digest: str, mtime_ns: int, size: int, version: int):
         self.file_path = file_path
-        self.data = self._load_data()
+        self.data = data
+        self.digest = digest
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.version = version
+        self._derived: Dict[Any, Any] = {}
+        self._building: Dict[Any, threading.Event] = {}
+        self._lock = threading.Lock()
 
-    def _load_data(self) -> Dict[str, Any]:
-        if not os.path.exists(self.file_path):
-            print(f"Knowledge Base file not found: {self.file_path}")
-            return {}
+    def derived(self, key: Any, factory: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for key, building it once with factory().
+        The factory runs outside the snapshot lock (it may be slow, e.g.
+        embedding calls); concurrent callers for the same key wait for that
+        build, and other keys are unaffected.
+        """
         try:
-            with open(self.file_path, 'r') as f:
-                return json.load(f)
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key in self._derived:
+                return self._derived[key]
+            building = self._building.get(key)
+            if building is None:
+                building = self._building[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            building.wait()
+            # The build failed if nothing was published: try it ourselves
+            return self.derived(key, factory)
+        try:
+            value = factory()
+            with self._lock:
+                self._derived[key] = value
+        finally:
+            with self._lock:
+                del self._building[key]
+            building.set()
+        return value
+
+
+class FragmentCache:
+    """Thread-safe LRU of serialized prompt fragments for one snapshot."""
+    def __init__(self, max_items: int = MAX_FRAGMENTS):
+        self.max_items = max_items
+        self._items: "OrderedDict[Any, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[str]:
+        with self._lock:
+            text = self._items.get(key)
+            if text is not None:
+                self._items.move_to_end(key)
+            return text
+
+    def put(self, key: Any, text: str) -> str:
+        """Stores text unless another thread got there first; returns the cached text."""
+        with self._lock:
+            text = self._items.setdefault(key, text)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+            return text
+
+    def __len__(self):
+        return len(self._items)
+
+
+class KnowledgeBaseRegistry:
+    """
+    Process-wide cache of parsed Knowledge Base files.
+    Each file is parsed once and shared by every agent. A file is re-read only
+    when its mtime or size changes, and re-parsed only if its content hash changed.
+    """
+    def __init__(self):
+        self._snapshots: Dict[str, KnowledgeSnapshot] = {}
+        self._lock = threading.Lock()
+        self._versions = 0
+
+    def get(self, file_path: str) -> KnowledgeSnapshot:
+        path = os.path.abspath(file_path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return self._missing(path)
+
+        snapshot = self._snapshots.get(path)
+        if snapshot and snapshot.mtime_ns == st.st_mtime_ns and snapshot.size == st.st_size:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshots.get(path)
+            if snapshot and snapshot.mtime_ns == st.st_mtime_ns and snapshot.size == st.st_size:
+                return snapshot
+            return self._load(path, st, snapshot)
+
+    def invalidate(self, file_path: Optional[str] = None):
+        """Drops cached snapshots (all of them if no path is given)."""
+        with self._lock:
+            if file_path is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(os.path.abspath(file_path), None)
+
+    def _load(self, path: str, st: os.stat_result, previous: Optional[KnowledgeSnapshot]) -> KnowledgeSnapshot:
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
         except Exception as e:
             print(f"Error loading Knowledge Base: {e}")
-            return {}
+            return previous or self._missing(path)
+
+        digest = hashlib.sha256(raw).hexdigest()
+        if previous and previous.digest == digest:
+            # Touched but unchanged: keep the parsed data and its derived caches.
+            previous.mtime_ns = st.st_mtime_ns
+            previous.size = st.st_size
+            return previous
+
+        try:
+            data = json.loads(raw)
+        except Exception as e:
+            print(f"Error loading Knowledge Base: {e}")
+            # Keep serving the last good version while the file is being edited.
+            return previous or self._missing(path)
+
+        if not isinstance(data, dict):
+            print(f"Error loading Knowledge Base: top level of {path} is not an object")
+            data = {}
+
+        self._versions += 1
+        snapshot = KnowledgeSnapshot(path, _freeze(data), digest, st.st_mtime_ns, st.st_size, self._versions)
+        self._snapshots[path] = snapshot
+        return snapshot
+
+    def _missing(self, path: str) -> KnowledgeSnapshot:
+        snapshot = self._snapshots.get(path)
+        if snapshot is None or snapshot.digest != "":
+            print(f"Knowledge Base file not found: {path}")
+            snapshot = KnowledgeSnapshot(path, FrozenDict(), "", -1, -1, 0)
+            self._snapshots[path] = snapshot
+        return snapshot
+
+
+kb_registry = KnowledgeBaseRegistry()
+
+
+class TextIndex:
+    """
+    Tokenized inverted index over one category, built once per snapshot.
+
+    Keeps the substring semantics of KnowledgeBase.search: every word token in
+    the query narrows the candidate set (exact term, prefix, suffix or infix
+    depending on whether the query cuts through a word at that point), and the
+    surviving candidates are confirmed with a plain `in` check on the item text.
+    """
+    def __init__(self, items: List[Any]):
+        self.items = items
+        self.texts = [self._item_text(item) for item in items]
+
+        postings: Dict[str, set] = {}
+        for i, text in enumerate(self.texts):
+            for term in set(_TOKEN_RE.findall(text)):
+                postings.setdefault(term, set()).add(i)
+        self.postings: Dict[str, FrozenSet[int]] = {t: frozenset(ids) for t, ids in postings.items()}
+        self.vocab = sorted(self.postings)
+        self.reversed_vocab = sorted(t[::-1] for t in self.postings)
+
+        trigrams: Dict[str, set] = {}
+        for term in self.vocab:
+            for j in range(len(term) - 2):
+                trigrams.setdefault(term[j:j + 3], set()).add(term)
+        self.trigrams = trigrams
+
+        self._term_postings = lru_cache(maxsize=2048)(self._term_postings_uncached)
+
+    @staticmethod
+    def _item_text(item: Any) -> str:
+        if isinstance(item, dict):
+            return " ".join([str(v).lower() for v in item.values()])
+        return str(item).lower()
+
+    def search(self, query: str) -> List[Any]:
+        """Returns items whose text contains the (lower-cased) query, in catalog order."""
+        tokens = list(_TOKEN_RE.finditer(query))
+        if not tokens:
+            # Pure punctuation / whitespace: nothing to index on.
+            return [item for item, text in zip(self.items, self.texts) if query in text]
+
+        candidates: Optional[FrozenSet[int]] = None
+        for match in sorted(tokens, key=lambda m: -len(m.group())):
+            ids = self._term_postings(match.group(), match.start() > 0, match.end() < len(query))
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+        return [self.items[i] for i in sorted(candidates) if query in self.texts[i]]
+
+    def _term_postings_uncached(self, token: str, starts_term: bool, ends_term: bool) -> FrozenSet[int]:
+        # A query token with a non-word character on its left must start a term,
+        # one with a non-word character on its right must end a term.
+        if starts_term and ends_term:
+            return self.postings.get(token, frozenset())
+        if starts_term:
+            terms = self._range(self.vocab, token)
+        elif ends_term:
+            terms = [t[::-1] for t in self._range(self.reversed_vocab, token[::-1])]
+        else:
+            terms = self._containing(token)
+
+        ids = set()
+        for term in terms:
+            ids.update(self.postings[term])
+        return frozenset(ids)
+
+    @staticmethod
+    def _range(sorted_terms: List[str], prefix: str) -> List[str]:
+        lo = bisect.bisect_left(sorted_terms, prefix)
+        hi = bisect.bisect_left(sorted_terms, prefix + "\U0010ffff")
+        return sorted_terms[lo:hi]
+
+    def _containing(self, token: str) -> List[str]:
+        if len(token) < 3:
+            return [t for t in self.vocab if token in t]
+        terms = None
+        for j in range(len(token) - 2):
+            grams = self.trigrams.get(token[j:j + 3])
+            if not grams:
+                return []
+            terms = set(grams) if terms is None else terms & grams
+        return [t for t in terms if token in t]
+
+
+class KnowledgeBase:
+    """
+    A simple JSON-backed knowledge base tool.
+    Allows agents to load and search structured data.
+    Instances are cheap handles onto the shared kb_registry snapshot, so edits
+    to the JSON file are picked up on the next access.
+    """
+    def __init__(self, file_path: str):
+        self.file_path = os.path.abspath(file_path)
+
+    @property
+    def snapshot(self) -> KnowledgeSnapshot:
+        return kb_registry.get(self.file_path)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return self.snapshot.data
 
     def search(self, category: str, query: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Search for items in a specific category (e.g., 'motors').
         If query is provided, filters by text match in values.
         """
-        items = self.data.get(category, [])
+        return self._search(self.snapshot, category, query)
+
+    @staticmethod
+    def _search(snapshot: KnowledgeSnapshot, category: str, query: Optional[str]) -> List[Dict[str, Any]]:
+        items = snapshot.data.get(category, [])
         if not query:
-            return items
-
-        query = query.lower()
-        results = []
-        for item in items:
-            # Convert all values to string and check for query
-            values_str = " ".join([str(v).lower() for v in item.values()])
-            if query in values_str:
-                results.append(item)
-        
-        return results
+            return list(items) if isinstance(items, list) else items
+
+        if not isinstance(items, list):
+            items = [items]
+        index = snapshot.derived(("text_index", category), lambda: TextIndex(items))
+        return index.search(query.lower())
+
+    @property
+    def version(self) -> int:
+        """Changes whenever the underlying file is re-parsed with new content."""
+        return self.snapshot.version
+
+    def fragment(self, category: str, query: Optional[str] = None, indent: int = 2) -> str:
+        """
+        Prompt-ready JSON for search(category, query), serialized once per
+        snapshot version instead of on every agent execution.
+        """
+        snapshot = self.snapshot
+        cache = snapshot.derived("fragments", FragmentCache)
+        key = (category, query, indent)
+        text = cache.get(key)
+        if text is None:
+            text = cache.put(key, json.dumps(self._search(snapshot, category, query), indent=indent))
+        return text
+
+    def columns(self, category: str) -> NumericCatalog:
+        """
+        Numeric columns for a category (e.g. motors.max_thrust_g) as NumPy arrays.
+        Large catalogs are backed by a memory-mapped file under knowledge/.cache/.
+        """
+        snapshot = self.snapshot
+        items = snapshot.data.get(category, [])
+        if not isinstance(items, list):
+            items = []
+        cache_path = None
+        if snapshot.digest:
+            stem = os.path.splitext(os.path.basename(self.file_path))[0]
+            cache_path = os.path.join(os.path.dirname(self.file_path), ".cache",
+                                      f"{stem}.{category}.{snapshot.digest[:16]}")
+        return snapshot.derived(("columns", category), lambda: NumericCatalog.build(items, cache_path))
+
+    def query(self, category: str, where: Optional[Dict[str, Range]] = None, order_by: Optional[str] = None,
+              descending: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Vectorized range / top-k query over numeric fields.
+        Ex: query("motors", where={"max_thrust_g": (1500, None)}, order_by="weight_g", limit=5)
+        """
+        return self.columns(category).query(where, order_by, descending, limit)
+
+    def retrieve(self, query: str, categories: Optional[List[str]] = None, k: int = 5,
+                 token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Semantic top-k retrieval across entries (optionally limited to categories).
+        Returns [{"category", "score", "item"}] best first, trimmed to token_budget.
+        Entry embeddings are computed once per snapshot and persisted in knowledge/.cache/.
+        """
+        snapshot = self.snapshot
+        cache_path = None
+        if snapshot.digest:
+            stem = os.path.splitext(os.path.basename(self.file_path))[0]
+            cache_path = os.path.join(os.path.dirname(self.file_path), ".cache", f"{stem}.{snapshot.digest[:16]}")
+        index = snapshot.derived("semantic_index", lambda: SemanticIndex.build(snapshot.data, cache_path))
+        return index.search(query, categories, k, token_budget)
+
+    def retrieve_fragment(self, query: str, categories: Optional[List[str]] = None, k: int = 5,
+                          token_budget: Optional[int] = None, indent: int = 2) -> str:
+        """
+        Prompt-ready JSON of the retrieved entries grouped by category.
+        Falls back to the full categories if nothing could be retrieved.
+        """
+        grouped: Dict[str, List[Any]] = {}
+        for hit in self.retrieve(query, categories, k, token_budget):
+            grouped.setdefault(hit["category"], []).append(hit["item"])
+        if not grouped:
+            grouped = {c: self.search(c) for c in (categories or self.get_categories())}
+        return json.dumps(grouped, indent=indent)
 
     def get_categories(self) -> List[str]:
         return list(self.data.keys())
@@ -1,27 +1,187 @@
-from typing import Optional
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from lib.embeddings import embed_texts, generate_embeddings, local_embeddings, LOCAL_EMBEDDING_DIM
+
+# Resolved need descriptions kept per index, and the least cosine similarity
+# at which a need without any keyword hit is still routed.
+MAX_CACHED_NEEDS = 1024
+DEFAULT_MIN_SIMILARITY = 0.35
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# A keyword ending in this is a stem ("simulat*" hits "simulation"); others match whole words.
+STEM_MARK = "*"
+
+
+def _word_forms(word: str) -> List[str]:
+    """The word and its possible singulars ("motors", "crashes", "batteries")."""
+    forms = [word]
+    if word.endswith("ies") and len(word) > 4:
+        forms.append(word[:-3] + "y")
+    if word.endswith("es") and len(word) > 3:
+        forms.append(word[:-2])
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 2:
+        forms.append(word[:-1])
+    return forms
+
+
+class CapabilityIndex:
+    """
+    Keyword and embedding index over agent profiles.
+
+    Each profile's `keywords` match whole words of a need (or their plural:
+    "motor" hits "motors", but "cad" never hits "cadence"); a keyword marked
+    as a stem hits every word it prefixes ("simulat*" hits "simulation"). The
+    profile text (name, role, description, instructions, tools) is embedded
+    once. Scoring a need is one (agents x keywords) and one (agents x dim)
+    matrix-vector product.
+    """
+
+    def __init__(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        self.agent_ids = [agent_id for agent_id, _ in entries]
+        keywords = sorted({k.lower() for _, profile in entries for k in profile.get("keywords", [])})
+        columns = {k: i for i, k in enumerate(keywords)}
+        self.words = {k: i for k, i in columns.items() if not k.endswith(STEM_MARK)}
+        self.stems = {k[:-len(STEM_MARK)]: i for k, i in columns.items() if k.endswith(STEM_MARK)}
+        self.max_stem = max((len(s) for s in self.stems), default=0)
+        self.keyword_matrix = np.zeros((len(entries), len(keywords)), dtype=np.float32)
+        for row, (_, profile) in enumerate(entries):
+            for k in profile.get("keywords", []):
+                self.keyword_matrix[row, columns[k.lower()]] = 1.0
+
+        texts = [self._profile_text(profile) for _, profile in entries]
+        if texts:
+            self.model, vectors = embed_texts(texts)
+        else:
+            self.model, vectors = f"local-hash-{LOCAL_EMBEDDING_DIM}", np.zeros((0, LOCAL_EMBEDDING_DIM), dtype=np.float32)
+        self.vectors = self._normalize(np.asarray(vectors, dtype=np.float32))
+
+    @staticmethod
+    def _profile_text(profile: Dict[str, Any]) -> str:
+        parts = [profile.get("name", ""), profile.get("role", ""), profile.get("description", "")]
+        parts += profile.get("instructions", [])
+        parts += [t.replace("_", " ") for t in profile.get("tools", [])]
+        return ". ".join(p for p in parts if p)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _keyword_vector(self, need: str) -> np.ndarray:
+        hits = np.zeros(self.keyword_matrix.shape[1], dtype=np.float32)
+        for word in _WORD_RE.findall(need.lower()):
+            for form in _word_forms(word):
+                column = self.words.get(form)
+                if column is not None:
+                    hits[column] = 1.0
+            for length in range(1, min(len(word), self.max_stem) + 1):
+                column = self.stems.get(word[:length])
+                if column is not None:
+                    hits[column] = 1.0
+        return hits
+
+    def _embed(self, need: str) -> Optional[np.ndarray]:
+        if self.model.startswith("local-hash"):
+            vector = local_embeddings([need])[0]
+        else:
+            vectors = generate_embeddings([need])
+            if vectors is None or vectors.shape[-1] != self.vectors.shape[-1]:
+                return None
+            vector = vectors[0]
+        return self._normalize(vector)
+
+    def score(self, need: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(keyword hits, cosine similarity) per agent."""
+        hits = self.keyword_matrix @ self._keyword_vector(need)
+        query = self._embed(need)
+        similarity = self.vectors @ query if query is not None else np.zeros(len(self.agent_ids), dtype=np.float32)
+        return hits, similarity
+
 
 class AgentMatchmaker:
     """
     Simulates the Orchestrator's capability to route requests to the best available agent.
+
+    Built from the profiles of the registered agents that accept ABN
+    messages; the index is rebuilt when the registry changes and resolved
+    needs are cached, so repeat routing is a dictionary lookup.
     """
-    
+
+    def __init__(self, agents=None, min_similarity: float = DEFAULT_MIN_SIMILARITY,
+                 max_cached_needs: int = MAX_CACHED_NEEDS):
+        self._agents = agents
+        self.min_similarity = min_similarity
+        self.max_cached_needs = max_cached_needs
+        self._index: Optional[CapabilityIndex] = None
+        self._index_version = None
+        self._cache: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def agents(self):
+        if self._agents is None:
+            from agent_registry import registry
+            self._agents = registry
+        return self._agents
+
+    def index(self) -> CapabilityIndex:
+        version = getattr(self.agents, "version", None)
+        with self._lock:
+            if self._index is None or version != self._index_version:
+                entries = [(agent_id, agent.profile) for agent_id, agent in self.agents.items()
+                           if getattr(agent, "profile", None) and hasattr(agent, "handle_abn_message")]
+                self._index = CapabilityIndex(entries)
+                self._index_version = version
+                self._cache.clear()
+            return self._index
+
+    def rank(self, need_description: str) -> List[Tuple[str, float]]:
+        """
+        Agents for a need, best first, with their scores: every agent with a
+        keyword hit (ranked by hits + similarity), else the most similar
+        agent if it clears min_similarity.
+        """
+        index = self.index()
+        key = " ".join(need_description.lower().split())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        ranked: List[Tuple[str, float]] = []
+        if index.agent_ids:
+            hits, similarity = index.score(key)
+            if hits.any():
+                score = hits + similarity
+                order = np.argsort(-score, kind="stable")
+                ranked = [(index.agent_ids[i], float(score[i])) for i in order if hits[i] > 0]
+            else:
+                best = int(np.argmax(similarity))
+                if similarity[best] >= self.min_similarity:
+                    ranked = [(index.agent_ids[best], float(similarity[best]))]
+
+        with self._lock:
+            self._cache[key] = ranked
+            while len(self._cache) > self.max_cached_needs:
+                self._cache.popitem(last=False)
+        return ranked
+
+    def find_agents(self, need_description: str, limit: Optional[int] = None) -> List[str]:
+        """All agents whose capability the need mentions, best match first."""
+        matches = [agent_id for agent_id, _ in self.rank(need_description)]
+        return matches[:limit] if limit else matches
+
     def find_best_agent(self, need_description: str) -> Optional[str]:
-        need = need_description.lower()
-        
-        # Simple rule-based routing for MVP
-        if "safety" in need or "stability" in need or "validate" in need:
-            return "engineering-flightcontrol-v1"
-            
-        if "propulsion" in need or "motor" in need:
-            return "engineering-propulsion-v1"
-            
-        if "review" in need or "qa" in need or "security" in need:
-            return "qa-codereview-v1"
-            
-        if "cost" in need:
-            # Placeholder if we add CostModelAgent later
-            return None
-            
-        return None
+        matches = self.find_agents(need_description, limit=1)
+        return matches[0] if matches else None
 
 matchmaker = AgentMatchmaker()
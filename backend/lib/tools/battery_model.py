@@ -0,0 +1,100 @@
+import re
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+
+def pack_arrays(batteries: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """capacity_mah, c_rating and series cell count ('6S') of a battery inventory as arrays."""
+    def cells(text):
+        m = re.search(r"(\d+)\s*S", str(text or ""), re.IGNORECASE)
+        return float(m.group(1)) if m else np.nan
+
+    return {
+        "capacity_mah": np.array([float(b.get("capacity_mah", np.nan)) for b in batteries]),
+        "c_rating": np.array([float(b.get("c_rating", np.nan)) for b in batteries]),
+        "cells": np.array([cells(b.get("voltage")) for b in batteries]),
+    }
+
+
+class BatteryModel:
+    """
+    LiPo discharge model evaluated over a state-of-charge grid instead of time.
+
+    Per cell: open-circuit voltage linear in SOC, internal resistance sized so
+    the pack sags `sag_at_rated_v` per cell at its rated C current, and a
+    constant-power load solved for current (I = (V - sqrt(V^2 - 4RP)) / 2R).
+    Peukert's law inflates the charge drawn at currents above 1C. Discharge
+    stops at the usable-capacity floor or when loaded cell voltage hits the
+    cutoff, whichever comes first.
+
+    Every argument broadcasts; a power profile is a trailing axis of phase
+    powers with matching time `weights`.
+    """
+
+    def __init__(self, peukert: float = 1.05, usable_fraction: float = 0.8, v_full: float = 4.2,
+                 v_empty: float = 3.5, cutoff_v: float = 3.3, sag_at_rated_v: float = 0.5, soc_steps: int = 32):
+        self.peukert = peukert
+        self.usable_fraction = usable_fraction
+        self.v_full = v_full
+        self.v_empty = v_empty
+        self.cutoff_v = cutoff_v
+        self.sag_at_rated_v = sag_at_rated_v
+        # Midpoints of equal SOC slices between full and the usable floor
+        edges = np.linspace(1.0, 1.0 - usable_fraction, soc_steps + 1)
+        self.soc = (edges[:-1] + edges[1:]) / 2.0
+        self.d_soc = usable_fraction / soc_steps
+
+    def evaluate(self, capacity_mah, c_rating, cells, power_w, weights=None) -> Dict[str, np.ndarray]:
+        """
+        Flight time, peak current and headroom. With `weights`, the last axis of
+        power_w is a profile of phases flown for those fractions of the time.
+        """
+        ah = np.asarray(capacity_mah, dtype=float) / 1000.0
+        c = np.asarray(c_rating, dtype=float)
+        n = np.asarray(cells, dtype=float)
+        power = np.asarray(power_w, dtype=float)
+        if weights is None:
+            power = power[..., None]
+            w = np.ones(1)
+        else:
+            w = np.asarray(weights, dtype=float)
+            w = w / w.sum()
+        ah, c, n = ah[..., None], c[..., None], n[..., None]
+
+        max_current = ah * c
+        r_cell = self.sag_at_rated_v / max_current
+        ocv = self.v_empty + (self.v_full - self.v_empty) * self.soc  # (soc,)
+
+        # Axes: (..., phase, soc)
+        ocv_b = ocv[None, :]
+        p_cell = (power / n)[..., None]
+        r = r_cell[..., None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            disc = ocv_b ** 2 - 4.0 * r * p_cell
+            current = (ocv_b - np.sqrt(disc)) / (2.0 * r)
+            loaded_v = ocv_b - current * r
+            one_c = ah[..., None]
+            drawn = current * np.maximum(current / one_c, 1.0) ** (self.peukert - 1.0)
+
+        ok = (disc >= 0) & (loaded_v >= self.cutoff_v) & np.isfinite(current)
+        ok_all = ok.all(axis=-2)                                            # every phase sustainable
+        alive = np.cumprod(ok_all, axis=-1).astype(bool)                    # stop at first failure
+        mean_draw = np.einsum("...ps,p->...s", np.where(ok, drawn, 0.0), w)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            hours = np.where(alive, ah * self.d_soc / mean_draw, 0.0).sum(axis=-1)
+
+        # Worst case: highest-power phase at the lowest SOC reached
+        last = np.maximum(alive.sum(axis=-1) - 1, 0)
+        peak = np.take_along_axis(np.where(ok, current, np.inf).max(axis=-2), last[..., None], axis=-1)[..., 0]
+        max_current = max_current[..., 0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            headroom = max_current / peak - 1.0
+        return {
+            "flight_time_min": hours * 60.0,
+            "peak_current_a": peak,
+            "max_current_a": max_current,
+            "current_headroom": headroom,
+            "usable_fraction_reached": alive.mean(axis=-1) * self.usable_fraction,
+            "feasible": alive[..., 0] & np.isfinite(peak),
+        }
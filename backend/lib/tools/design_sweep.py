@@ -0,0 +1,187 @@
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from lib.drone_physics import VectorPAVPhysics, MPH_TO_FTS
+
+AXES = ["weight_lbs", "wing_area_ft2", "aspect_ratio", "altitude_ft", "speed_mph"]
+
+# Worker pools shared across requests, one per worker count
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _process_pool(max_workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None:
+            pool = _pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+        return pool
+
+
+def _discard_pool(max_workers: int, pool: ProcessPoolExecutor):
+    with _pools_lock:
+        if _pools.get(max_workers) is pool:
+            del _pools[max_workers]
+    pool.shutdown(wait=False)
+
+
+def _evaluate_chunk(args) -> Dict[str, Any]:
+    """
+    Evaluates a block of design configurations over every speed.
+    Module level so it can run in a worker process.
+    """
+    start, stop, config_axes, speeds_mph, fixed, want_curves = args
+    # Configurations of the flat index range [start, stop), built without the full grid
+    idx = np.unravel_index(np.arange(start, stop), tuple(len(a) for a in config_axes))
+    # Configurations along axis 0, speeds along axis 1
+    W, S, AR, alt = (a[i][:, None] for a, i in zip(config_axes, idx))
+    V = (np.asarray(speeds_mph, dtype=float) * MPH_TO_FTS)[None, :]
+    rho = VectorPAVPhysics.get_air_density(alt, fixed["temp_f"])
+
+    cl = VectorPAVPhysics.calc_lift_coefficient(W, rho, V, S)
+    drag = VectorPAVPhysics.calc_drag(W, rho, V, S, AR, fixed["efficiency_factor"],
+                                      fixed["cd_profile"], fixed["wetted_area_ft2"])
+    power = VectorPAVPhysics.calc_cruise_power_kw(drag, V, fixed["eta_cruise"])
+
+    best = np.argmin(power, axis=1)
+    rows = np.arange(power.shape[0])
+    min_power = power[rows, best]
+    min_speed = np.where(np.isfinite(min_power), np.asarray(speeds_mph, dtype=float)[best], np.nan)
+
+    out = {"start": start, "min_power_kw": min_power, "min_power_speed_mph": min_speed}
+    if want_curves:
+        q = VectorPAVPhysics.calc_dynamic_pressure(rho, V)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cd = np.where(np.isfinite(drag), drag / (q * S), np.inf)
+        out.update({"lift_coefficient": cl, "drag_coefficient": cd, "drag_lbs": drag, "power_kw": power})
+    return out
+
+
+def _json_array(a: np.ndarray) -> list:
+    """Nested lists with inf / nan replaced by None (JSON has no representation for them)."""
+    a = np.asarray(a, dtype=float)
+    return np.where(np.isfinite(a), a, None).tolist()
+
+
+def _grid_strides(shape: Sequence[int], max_points: int) -> List[int]:
+    """Per-axis strides that bring a grid down to at most max_points (coarsening the longest axis first)."""
+    strides = [1] * len(shape)
+    sizes = list(shape)
+    while math.prod(sizes) > max_points:
+        axis = int(np.argmax(sizes))
+        strides[axis] += 1
+        sizes[axis] = -(-shape[axis] // strides[axis])
+    return strides
+
+
+class DesignSweepTool:
+    """
+    Tool for parametric design-space sweeps on top of VectorPAVPhysics.
+    Evaluates the full Cartesian grid of weight x wing area x aspect ratio x
+    altitude x cruise speed, chunked to bound memory, and fans very large
+    grids out to a process pool.
+    """
+
+    def __init__(self, chunk_points: int = 250_000, parallel_threshold: int = 4_000_000,
+                 max_points: int = 50_000_000, max_curve_points: int = 200_000,
+                 max_grid_points: int = 100_000, max_workers: Optional[int] = None):
+        self.chunk_points = chunk_points
+        self.max_curve_points = max_curve_points
+        self.max_grid_points = max_grid_points
+        self.parallel_threshold = parallel_threshold
+        self.max_points = max_points
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+
+    def sweep(self, speed_mph: Sequence[float], weight_lbs: Sequence[float], wing_area_ft2: Sequence[float],
+              aspect_ratio: Sequence[float], altitude_ft: Sequence[float] = (0.0,),
+              efficiency_factor: float = 0.8, cd_profile: float = 0.02, wetted_area_ft2: float = 15.0,
+              eta_cruise: float = 0.8, temp_f: Optional[float] = None, include_curves: bool = True) -> Dict[str, Any]:
+        axes = {
+            "weight_lbs": np.atleast_1d(np.asarray(weight_lbs, dtype=float)),
+            "wing_area_ft2": np.atleast_1d(np.asarray(wing_area_ft2, dtype=float)),
+            "aspect_ratio": np.atleast_1d(np.asarray(aspect_ratio, dtype=float)),
+            "altitude_ft": np.atleast_1d(np.asarray(altitude_ft, dtype=float)),
+            "speed_mph": np.atleast_1d(np.asarray(speed_mph, dtype=float)),
+        }
+        shape = tuple(len(axes[name]) for name in AXES)
+        n_configs = int(np.prod(shape[:-1]))
+        n_speeds = shape[-1]
+        points = n_configs * n_speeds
+        if points == 0:
+            raise ValueError("Every sweep axis needs at least one value.")
+        if points > self.max_points:
+            raise ValueError(f"Sweep has {points:,} points; the limit is {self.max_points:,}.")
+
+        # Full curves are only returned for grids small enough to ship as JSON
+        want_curves = include_curves and points <= self.max_curve_points
+
+        fixed = {
+            "efficiency_factor": efficiency_factor,
+            "cd_profile": cd_profile,
+            "wetted_area_ft2": wetted_area_ft2,
+            "eta_cruise": eta_cruise,
+            "temp_f": temp_f,
+        }
+
+        configs_per_chunk = max(1, self.chunk_points // n_speeds)
+        config_axes = [axes[name] for name in AXES[:-1]]
+        jobs = [
+            (i, min(i + configs_per_chunk, n_configs), config_axes, axes["speed_mph"], fixed, want_curves)
+            for i in range(0, n_configs, configs_per_chunk)
+        ]
+
+        if points >= self.parallel_threshold and len(jobs) > 1 and self.max_workers > 1:
+            pool = _process_pool(self.max_workers)
+            try:
+                chunks = list(pool.map(_evaluate_chunk, jobs))
+            except BrokenProcessPool:
+                # A worker died; drop the pool so the next request starts a fresh one
+                _discard_pool(self.max_workers, pool)
+                raise
+        else:
+            chunks = [_evaluate_chunk(job) for job in jobs]
+
+        min_power = np.concatenate([c["min_power_kw"] for c in chunks]).reshape(shape[:-1])
+        min_speed = np.concatenate([c["min_power_speed_mph"] for c in chunks]).reshape(shape[:-1])
+
+        result = {
+            "axes": {name: axes[name].tolist() for name in AXES},
+            "shape": list(shape),
+            "points": points,
+        }
+
+        strides = _grid_strides(shape[:-1], self.max_grid_points)
+        coarse = tuple(slice(None, None, k) for k in strides)
+        result["min_power_kw"] = _json_array(min_power[coarse])
+        result["min_power_speed_mph"] = _json_array(min_speed[coarse])
+        if any(k > 1 for k in strides):
+            result["grid"] = {
+                "strides": strides,
+                "axes": {name: axes[name][::k].tolist() for name, k in zip(AXES[:-1], strides)},
+                "note": f"Optima grid downsampled to at most {self.max_grid_points:,} configurations.",
+            }
+
+        if include_curves and not want_curves:
+            result["curves_omitted"] = f"Grid exceeds {self.max_curve_points:,} points; only optima returned."
+        if want_curves:
+            result["curves"] = {
+                key: _json_array(np.concatenate([c[key] for c in chunks]).reshape(shape))
+                for key in ("lift_coefficient", "drag_coefficient", "drag_lbs", "power_kw")
+            }
+
+        finite = np.isfinite(min_power)
+        if finite.any():
+            flat = int(np.argmin(np.where(finite, min_power, np.inf)))
+            idx = np.unravel_index(flat, min_power.shape)
+            result["optimum"] = {
+                **{name: float(axes[name][i]) for name, i in zip(AXES[:-1], idx)},
+                "speed_mph": float(min_speed[idx]),
+                "power_kw": float(min_power[idx]),
+            }
+        return result
@@ -0,0 +1,204 @@
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import sympy as sp
+from sympy.parsing.sympy_parser import parse_expr, standard_transformations, convert_xor
+
+_TRANSFORMS = standard_transformations + (convert_xor,)
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z_0-9]*")
+_COEFF_RE = re.compile(r"(\d)\s*(?=[A-Za-z_])")
+_DEFAULT_RE = re.compile(r"~\s*(-?\d+(?:\.\d+)?)")
+# Variable descriptions that name a unit rather than a quantity, e.g. "v (m/s)"
+_UNIT_RE = re.compile(r"m_s|kg|joules|m|s")
+
+# Common words for variables whose KB description is only a unit, e.g. "v (m/s)"
+ALIASES = {
+    "mass": "m", "velocity": "v", "speed": "v", "final_velocity": "v", "initial_velocity": "u",
+    "acceleration": "a", "time": "t", "displacement": "s", "distance": "s", "height": "h",
+    "force": "F_net", "net_force": "F_net", "gravity": "g", "weight": "W", "momentum": "p",
+    "kinetic_energy": "KE", "potential_energy": "PE", "normal_force": "N", "friction": "F_f",
+    "friction_force": "F_f", "coefficient_of_friction": "mu",
+}
+
+
+def _variable_name(description: str) -> Tuple[str, str]:
+    """'u (initial velocity)' -> ('u', 'initial velocity')."""
+    name, _, rest = description.partition("(")
+    return name.strip(), rest.rstrip(")").strip()
+
+
+class Formula:
+    """One KB formula as a sympy expression (lhs - rhs == 0) with cached solved forms."""
+
+    def __init__(self, name: str, category: str, text: str, variables: List[str]):
+        self.name = name
+        self.category = category
+        self.text = text
+        names = {_variable_name(v)[0] for v in variables}
+        self.expr = self._parse(text, names)
+        self.symbols = {s.name: s for s in self.expr.free_symbols}
+        # Per-instance caches (keyed by unknown / (unknown, knowns)); they go away with the formula
+        self._solved: Dict[str, Tuple[sp.Expr, ...]] = {}
+        self._compiled: Dict[Tuple[str, Tuple[str, ...]], list] = {}
+
+    @staticmethod
+    def _parse(text: str, names: set) -> sp.Expr:
+        def split(match):
+            # Implicit products of single-letter variables ("at", "2as")
+            tok = match.group(0)
+            if tok in names or not all(c in names for c in tok):
+                return tok
+            return "*".join(tok)
+
+        lhs, rhs = (_COEFF_RE.sub(r"\1*", _IDENT_RE.sub(split, side)) for side in text.split("=", 1))
+        local = {n: sp.Symbol(n) for n in set(_IDENT_RE.findall(lhs + rhs))}
+        return parse_expr(lhs, local_dict=local, transformations=_TRANSFORMS) - \
+            parse_expr(rhs, local_dict=local, transformations=_TRANSFORMS)
+
+    def solved(self, unknown: str) -> Tuple[sp.Expr, ...]:
+        roots = self._solved.get(unknown)
+        if roots is None:
+            roots = self._solved[unknown] = tuple(sp.solve(self.expr, self.symbols[unknown]))
+        return roots
+
+    def compiled(self, unknown: str, knowns: Tuple[str, ...]):
+        """NumPy function of the knowns (in the given order) returning every root."""
+        key = (unknown, knowns)
+        funcs = self._compiled.get(key)
+        if funcs is None:
+            args = [self.symbols[k] for k in knowns]
+            funcs = self._compiled[key] = [sp.lambdify(args, sol, "numpy") for sol in self.solved(unknown)]
+        return funcs
+
+    def evaluate(self, unknown: str, knowns: Dict[str, Any]) -> Tuple[Optional[np.ndarray], Optional[sp.Expr]]:
+        """Value of `unknown` (broadcast over array knowns) and the solved form that produced it."""
+        names = tuple(sorted(n for n in self.symbols if n != unknown))
+        funcs = self.compiled(unknown, names)
+        if not funcs:
+            return None, None
+        with np.errstate(invalid="ignore", divide="ignore"):
+            roots = [np.asarray(f(*(np.asarray(knowns[n], dtype=float) for n in names)), dtype=float)
+                     for f in funcs]
+        roots = np.broadcast_arrays(*roots)
+        # Physical root: the first non-negative real one, else the first real one
+        choice = np.full(roots[0].shape, -1)
+        for i in range(len(roots) - 1, -1, -1):
+            choice = np.where(np.isfinite(roots[i]), i, choice)
+        for i in range(len(roots) - 1, -1, -1):
+            choice = np.where(np.isfinite(roots[i]) & (roots[i] >= 0), i, choice)
+        stacked = np.stack(list(roots) + [np.full(roots[0].shape, np.nan)])
+        value = np.take_along_axis(stacked, choice[None], axis=0)[0]
+        used = np.unique(choice[choice >= 0])
+        expr = self.solved(unknown)[int(used[0])] if len(used) == 1 else None
+        return value, expr
+
+
+class FormulaEngine:
+    """
+    Deterministic solver over the classical mechanics formula KB.
+
+    Formulas are parsed once, solved forms per unknown come from sympy.solve
+    and are compiled with lambdify, both cached on the formula (so for the
+    life of the engine's KB snapshot).
+    `solve` forward-chains: any formula with exactly one missing variable is
+    evaluated until the target is known. Inputs may be arrays (batched).
+    """
+
+    def __init__(self, formulas: List[Formula], aliases: Dict[str, str], defaults: Dict[str, float],
+                 units: Optional[Dict[str, str]] = None):
+        self.formulas = formulas
+        self.aliases = aliases
+        self.defaults = defaults
+        self.units = units or {}
+
+    @classmethod
+    def build(cls, data: Dict[str, Any]) -> "FormulaEngine":
+        formulas, aliases, defaults, units = [], dict(ALIASES), {}, {}
+        for category, items in data.items():
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                if "formula" not in item:
+                    continue
+                try:
+                    formulas.append(Formula(item.get("name", item["formula"]), category, item["formula"],
+                                            item.get("variables", [])))
+                except (SyntaxError, TypeError, sp.SympifyError) as e:
+                    print(f"Skipping unparsable formula {item.get('formula')}: {e}")
+                    continue
+                for description in item.get("variables", []):
+                    name, detail = _variable_name(description)
+                    default = _DEFAULT_RE.search(detail)
+                    if default:
+                        defaults[name] = float(default.group(1))
+                        detail = detail[:default.start()]
+                    words = re.sub(r"[^a-z0-9]+", "_", detail.lower()).strip("_")
+                    if _UNIT_RE.fullmatch(words):
+                        units.setdefault(name, detail.strip())
+                    elif words:
+                        aliases.setdefault(words, name)
+        return cls(formulas, aliases, defaults, units)
+
+    def canonical(self, key: str) -> Optional[str]:
+        if any(key in f.symbols for f in self.formulas):
+            return key
+        return self.aliases.get(re.sub(r"[^a-z0-9]+", "_", key.lower()).strip("_"))
+
+    def identify_unknown(self, text: str) -> Optional[str]:
+        """Variable named after 'find' / 'calculate' / 'what is' in a problem statement."""
+        match = re.search(r"(?:find|calculate|compute|determine|what\s+is|what's)\s+(?:the\s+)?([a-z_ ]+)", text.lower())
+        if not match:
+            return None
+        words = match.group(1).split()
+        for n in range(min(3, len(words)), 0, -1):
+            name = self.canonical("_".join(words[:n]))
+            if name:
+                return name
+        return None
+
+    def solve(self, unknown: str, knowns: Dict[str, Any], max_passes: int = 5) -> Optional[Dict[str, Any]]:
+        if unknown in knowns:
+            return None
+        known = {**{k: v for k, v in self.defaults.items() if k != unknown}, **knowns}
+        # Formulas that give the target directly are tried first
+        ordered = sorted(self.formulas, key=lambda f: unknown not in f.symbols)
+        derived = []
+        for _ in range(max_passes):
+            progress = False
+            for f in ordered:
+                missing = [n for n in f.symbols if n not in known]
+                if len(missing) != 1:
+                    continue
+                value, expr = f.evaluate(missing[0], known)
+                if value is None or not np.isfinite(value).any():
+                    continue
+                known[missing[0]] = value
+                derived.append((f, missing[0], expr))
+                progress = True
+                if missing[0] == unknown:
+                    break
+            if unknown in known or not progress:
+                break
+        if unknown not in known:
+            return None
+
+        # Keep only the chain that actually feeds the answer
+        needed, steps = {unknown}, []
+        for f, target, expr in reversed(derived):
+            if target in needed:
+                needed |= set(f.symbols) - {target}
+                steps.append({"formula": f.text, "name": f.name, "solved_for": target,
+                              "expression": f"{target} = {expr}" if expr is not None else f.text,
+                              "value": _plain(known[target])})
+        inputs = {k: _plain(known[k]) for k in needed if k in known and k not in {s["solved_for"] for s in steps}}
+        return {"variable": unknown, "value": _plain(known[unknown]), "unit": self.units.get(unknown),
+                "steps": steps[::-1], "knowns": inputs}
+
+
+def _plain(value):
+    """JSON-friendly scalar or list (nan -> None)."""
+    a = np.asarray(value, dtype=float)
+    if a.ndim == 0:
+        return float(a) if np.isfinite(a) else None
+    return np.where(np.isfinite(a), a, None).tolist()
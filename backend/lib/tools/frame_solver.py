@@ -0,0 +1,294 @@
+import re
+import time
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+G0 = 9.80665
+RHO_AIR_SI = 1.225
+DOF_PER_NODE = 6
+_FLOAT = r"(\d+(?:\.\d+)?)"
+
+
+def rectangular_section(width_m: float, height_m: float, youngs_modulus_pa: float,
+                        poisson_ratio: float = 0.35) -> Dict[str, float]:
+    """Section properties of a solid rectangular arm (width horizontal, height vertical)."""
+    b, h = float(width_m), float(height_m)
+    a, t = max(b, h), min(b, h)
+    return {
+        "E": youngs_modulus_pa,
+        "G": youngs_modulus_pa / (2.0 * (1.0 + poisson_ratio)),
+        "A": b * h,
+        "Iy": b * h ** 3 / 12.0,   # bending about local y -> vertical deflection
+        "Iz": h * b ** 3 / 12.0,   # bending about local z -> lateral deflection
+        "J": a * t ** 3 * (1.0 / 3.0 - 0.21 * (t / a) * (1.0 - t ** 4 / (12.0 * a ** 4))),
+        "c_y": b / 2.0,
+        "c_z": h / 2.0,
+        "torsion_shear_factor": (3.0 + 1.8 * t / a) / (a * t ** 2),  # tau_max = T * factor
+        "width": b,
+        "height": h,
+    }
+
+
+def multirotor_frame(rotor_count: int = 4, arm_length_m: float = 0.12, segments: int = 4) -> Dict[str, Any]:
+    """
+    Star frame: a clamped hub node with `rotor_count` radial arms in the XY plane,
+    each discretised into `segments` beam elements. Arm nodes are numbered
+    consecutively so each arm's stiffness block stays narrow-banded.
+    """
+    angles = np.pi / rotor_count + 2.0 * np.pi * np.arange(rotor_count) / rotor_count
+    radii = arm_length_m * np.arange(1, segments + 1) / segments
+    arm_xy = np.stack([np.cos(angles)[:, None] * radii, np.sin(angles)[:, None] * radii], axis=-1)
+    nodes = np.vstack([np.zeros((1, 3)), np.concatenate([arm_xy, np.zeros(arm_xy.shape[:2] + (1,))], axis=-1).reshape(-1, 3)])
+
+    arm_nodes = 1 + np.arange(rotor_count * segments).reshape(rotor_count, segments)
+    starts = np.concatenate([np.zeros((rotor_count, 1), dtype=int), arm_nodes[:, :-1]], axis=1)
+    elements = np.stack([starts.ravel(), arm_nodes.ravel()], axis=1)
+    return {
+        "nodes": nodes,
+        "elements": elements,
+        "supports": [0],
+        "tips": arm_nodes[:, -1],
+        "arm_directions": np.stack([np.cos(angles), np.sin(angles), np.zeros(rotor_count)], axis=1),
+        "arm_length_m": arm_length_m,
+    }
+
+
+class FrameSolver:
+    """
+    Linear 3D frame (Euler-Bernoulli beam) stiffness-method solver.
+
+    Element matrices are built for all elements at once, scattered into the
+    global matrix with np.add.at, and every load case is solved against a
+    single factorisation as a multi-column right-hand side. Drone frames are
+    a few hundred DOF, where dense LAPACK beats sparse bookkeeping.
+    """
+
+    def __init__(self, nodes: np.ndarray, elements: np.ndarray, section: Dict[str, float], supports: Sequence[int]):
+        self.nodes = np.asarray(nodes, dtype=float)
+        self.elements = np.asarray(elements, dtype=int)
+        self.section = section
+        self.ndof = len(self.nodes) * DOF_PER_NODE
+
+        fixed = np.zeros(self.ndof, dtype=bool)
+        for node in supports:
+            fixed[node * DOF_PER_NODE:(node + 1) * DOF_PER_NODE] = True
+        self.free = np.flatnonzero(~fixed)
+
+        self.lengths, self.T = self._transforms()
+        self.k_local = self._local_stiffness()
+        self.k_global = np.einsum("eji,ejk,ekl->eil", self.T, self.k_local, self.T)
+        self.edofs = (self.elements[:, :, None] * DOF_PER_NODE + np.arange(DOF_PER_NODE)).reshape(-1, 12)
+
+        K = np.zeros((self.ndof, self.ndof))
+        rows = np.broadcast_to(self.edofs[:, :, None], self.k_global.shape)
+        cols = np.broadcast_to(self.edofs[:, None, :], self.k_global.shape)
+        np.add.at(K, (rows, cols), self.k_global)
+        self.K = K
+
+    def _transforms(self):
+        xi, xj = self.nodes[self.elements[:, 0]], self.nodes[self.elements[:, 1]]
+        d = xj - xi
+        lengths = np.linalg.norm(d, axis=1)
+        ex = d / lengths[:, None]
+        # Reference vector: global Z, or global Y for vertical members
+        ref = np.where((np.abs(ex[:, 2]) > 0.999)[:, None], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])
+        ey = np.cross(ref, ex)
+        ey /= np.linalg.norm(ey, axis=1)[:, None]
+        ez = np.cross(ex, ey)
+        R = np.stack([ex, ey, ez], axis=1)  # rows are local axes
+        T = np.zeros((len(lengths), 12, 12))
+        for b in range(4):
+            T[:, 3 * b:3 * b + 3, 3 * b:3 * b + 3] = R
+        return lengths, T
+
+    def _local_stiffness(self) -> np.ndarray:
+        s, L = self.section, self.lengths
+        EA, GJ, EIy, EIz = s["E"] * s["A"] / L, s["G"] * s["J"] / L, s["E"] * s["Iy"], s["E"] * s["Iz"]
+        k = np.zeros((len(L), 12, 12))
+
+        def put(i, j, v):
+            k[:, i, j] = v
+            k[:, j, i] = v
+
+        put(0, 0, EA); put(6, 6, EA); put(0, 6, -EA)
+        put(3, 3, GJ); put(9, 9, GJ); put(3, 9, -GJ)
+        # Bending in the local x-y plane (about z)
+        put(1, 1, 12 * EIz / L**3); put(7, 7, 12 * EIz / L**3); put(1, 7, -12 * EIz / L**3)
+        put(1, 5, 6 * EIz / L**2); put(1, 11, 6 * EIz / L**2)
+        put(5, 7, -6 * EIz / L**2); put(7, 11, -6 * EIz / L**2)
+        put(5, 5, 4 * EIz / L); put(11, 11, 4 * EIz / L); put(5, 11, 2 * EIz / L)
+        # Bending in the local x-z plane (about y)
+        put(2, 2, 12 * EIy / L**3); put(8, 8, 12 * EIy / L**3); put(2, 8, -12 * EIy / L**3)
+        put(2, 4, -6 * EIy / L**2); put(2, 10, -6 * EIy / L**2)
+        put(4, 8, 6 * EIy / L**2); put(8, 10, 6 * EIy / L**2)
+        put(4, 4, 4 * EIy / L); put(10, 10, 4 * EIy / L); put(4, 10, 2 * EIy / L)
+        return k
+
+    def solve(self, F: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        F: (ndof, n_cases) global load matrix. Returns displacements (ndof, n_cases),
+        per-element von Mises stress (n_elements, n_cases) and per-element max
+        nodal deflection in metres (n_elements, n_cases).
+        """
+        F = np.asarray(F, dtype=float).reshape(self.ndof, -1)
+        U = np.zeros_like(F)
+        U[self.free] = np.linalg.solve(self.K[np.ix_(self.free, self.free)], F[self.free])
+
+        # Element end forces in local axes: (elements, 12, cases)
+        f = np.einsum("eij,ejk,ekc->eic", self.k_local, self.T, U[self.edofs])
+        s = self.section
+        axial = np.abs(f[:, 0]) / s["A"]
+        bending = np.maximum(
+            np.abs(f[:, 4]) * s["c_z"] / s["Iy"] + np.abs(f[:, 5]) * s["c_y"] / s["Iz"],
+            np.abs(f[:, 10]) * s["c_z"] / s["Iy"] + np.abs(f[:, 11]) * s["c_y"] / s["Iz"],
+        )
+        shear = np.abs(f[:, 3]) * s["torsion_shear_factor"]
+        von_mises = np.sqrt((axial + bending) ** 2 + 3.0 * shear ** 2)
+
+        translation = np.linalg.norm(U.reshape(len(self.nodes), DOF_PER_NODE, -1)[:, :3], axis=1)
+        deflection = translation[self.elements].max(axis=1)
+        return {"displacements": U, "von_mises_pa": von_mises, "deflection_m": deflection}
+
+
+def parse_load_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reads the free-text load cases of drone_simulation.json:
+    'N per arm' -> thrust per arm, 'x G' -> load factor, 'km/h' / 'm/s' ->
+    velocity (an impact if the case name says so, aerodynamic otherwise).
+    """
+    name = str(case.get("case", ""))
+    text = " ".join(str(case.get(k, "")) for k in ("load", "velocity"))
+    parsed = {"case": name, "kind": "unknown"}
+
+    m = re.search(_FLOAT + r"\s*N\s+per\s+arm", text, re.IGNORECASE)
+    if m:
+        return {**parsed, "kind": "thrust", "force_per_arm_n": float(m.group(1))}
+    m = re.search(_FLOAT + r"\s*G\b", text)
+    if m:
+        return {**parsed, "kind": "load_factor", "g": float(m.group(1))}
+
+    m_s = re.search(_FLOAT + r"\s*m/s(?!\^)", text)
+    kmh = re.search(_FLOAT + r"\s*km/h", text, re.IGNORECASE)
+    speed = float(m_s.group(1)) if m_s else (float(kmh.group(1)) / 3.6 if kmh else None)
+    if speed is not None:
+        kind = "impact" if re.search(r"impact|crash", name + " " + str(case.get("description", "")), re.IGNORECASE) else "aero"
+        return {**parsed, "kind": kind, "speed_m_s": speed}
+    return parsed
+
+
+class FrameStressTool:
+    """
+    Evaluates every Knowledge Base load case on a multirotor frame in one
+    batched FrameSolver run and cross-checks tip deflection against the
+    WL^3/3EI cantilever formula.
+
+    Impact cases use an energy-equivalent static force F = v * sqrt(k * m)
+    with k the arm's own lateral tip stiffness; they are reported but do not
+    gate `passed` (plastic deformation is accepted in a crash).
+    """
+
+    def __init__(self, rotor_count: int = 4, arm_length_m: float = 0.12, arm_width_m: float = 0.015,
+                 arm_height_m: float = 0.0085, youngs_modulus_pa: float = 2.1e9, yield_strength_pa: float = 40e6,
+                 mass_kg: Optional[float] = None, drag_coefficient: float = 1.2, segments: int = 4):
+        self.frame = multirotor_frame(rotor_count, arm_length_m, segments)
+        self.section = rectangular_section(arm_width_m, arm_height_m, youngs_modulus_pa)
+        self.solver = FrameSolver(self.frame["nodes"], self.frame["elements"], self.section, self.frame["supports"])
+        self.rotor_count = rotor_count
+        self.yield_strength_pa = yield_strength_pa
+        self.mass_kg = mass_kg
+        self.drag_coefficient = drag_coefficient
+
+    def _tip_load(self, direction: np.ndarray, magnitude: float, tips: Sequence[int]) -> np.ndarray:
+        F = np.zeros(self.solver.ndof)
+        for node in tips:
+            F[node * DOF_PER_NODE:node * DOF_PER_NODE + 3] += magnitude * direction
+        return F
+
+    def run(self, load_cases: List[Dict[str, Any]], min_safety_factor: float = 1.2) -> Dict[str, Any]:
+        start = time.perf_counter()
+        parsed = [parse_load_case(c) for c in load_cases]
+        tips = self.frame["tips"]
+        up = np.array([0.0, 0.0, 1.0])
+
+        hover = next((p["force_per_arm_n"] for p in parsed if p["kind"] == "thrust"), None)
+        mass = self.mass_kg or (hover * self.rotor_count / G0 if hover else 1.0)
+        hover = hover or mass * G0 / self.rotor_count
+
+        columns, cases = [], []
+        for p, raw in zip(parsed, load_cases):
+            if p["kind"] == "thrust":
+                columns.append(self._tip_load(up, p["force_per_arm_n"], tips))
+                tip_force = p["force_per_arm_n"]
+            elif p["kind"] == "load_factor":
+                # Thrust for upward acceleration of g * G on top of gravity
+                tip_force = hover * (1.0 + p["g"])
+                columns.append(self._tip_load(up, tip_force, tips))
+            elif p["kind"] == "aero":
+                # Hover thrust plus drag on every arm, lumped onto the nodes
+                q = 0.5 * RHO_AIR_SI * p["speed_m_s"] ** 2
+                w = q * self.drag_coefficient * self.section["height"]
+                tributary = np.zeros(len(self.frame["nodes"]))
+                np.add.at(tributary, self.frame["elements"].ravel(), np.repeat(self.solver.lengths / 2.0, 2))
+                F = self._tip_load(up, hover, tips)
+                F[0::DOF_PER_NODE] += w * tributary
+                columns.append(F)
+                tip_force = None
+            elif p["kind"] == "impact":
+                # Unit lateral load at one arm tip; scaled after the solve once k is known
+                arm = self.frame["arm_directions"][0]
+                columns.append(self._tip_load(np.cross(up, arm), 1.0, tips[:1]))
+                tip_force = None
+            else:
+                continue
+            cases.append({**p, "load": raw.get("load") or raw.get("velocity"), "tip_force_n": tip_force})
+
+        if not cases:
+            return {"cases": [], "passed": False, "error": "No load case could be parsed."}
+
+        res = self.solver.solve(np.stack(columns, axis=1))
+        stress, deflection = res["von_mises_pa"], res["deflection_m"]
+        L, E = self.frame["arm_length_m"], self.section["E"]
+
+        reports = []
+        for c, case in enumerate(cases):
+            scale = 1.0
+            if case["kind"] == "impact":
+                tip = tips[0] * DOF_PER_NODE
+                direction = np.cross(up, self.frame["arm_directions"][0])
+                k = 1.0 / float(res["displacements"][tip:tip + 3, c] @ direction)
+                scale = case["speed_m_s"] * np.sqrt(k * mass)
+                case["tip_force_n"] = scale
+            s, d = stress[:, c] * scale, deflection[:, c] * scale
+            worst = int(np.argmax(s))
+            report = {
+                "case": case["case"],
+                "load": case["load"],
+                "kind": case["kind"],
+                "gating": case["kind"] != "impact",
+                "max_von_mises_pa": float(s[worst]),
+                "max_deflection_mm": float(d.max() * 1e3),
+                "safety_factor": float(self.yield_strength_pa / s[worst]) if s[worst] > 0 else float("inf"),
+                "critical_element": worst,
+                "element_stress_pa": s.tolist(),
+                "element_deflection_mm": (d * 1e3).tolist(),
+            }
+            if case["tip_force_n"] is not None:
+                inertia = self.section["Iz"] if case["kind"] == "impact" else self.section["Iy"]
+                report["tip_force_n"] = float(case["tip_force_n"])
+                report["beam_theory_deflection_mm"] = float(case["tip_force_n"] * L**3 / (3 * E * inertia) * 1e3)
+            reports.append(report)
+
+        gating = [r for r in reports if r["gating"]] or reports
+        governing = min(gating, key=lambda r: r["safety_factor"])
+        return {
+            "cases": reports,
+            "max_stress_pa": governing["max_von_mises_pa"],
+            "max_deflection_mm": max(r["max_deflection_mm"] for r in gating),
+            "safety_factor": governing["safety_factor"],
+            "governing_case": governing["case"],
+            "passed": governing["safety_factor"] >= min_safety_factor,
+            "model": {"nodes": len(self.frame["nodes"]), "elements": len(self.frame["elements"]),
+                      "dof": self.solver.ndof, "mass_kg": mass},
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
@@ -0,0 +1,177 @@
+import time
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+G0 = 9.80665
+
+# State rows: altitude, climb rate, roll, roll rate, left thrust, right thrust,
+# altitude error integral, roll error integral, filtered (gyro) roll rate
+Z, VZ, PHI, P, TL, TR, IZ, IPHI, PF = range(9)
+
+
+def baseline_gains(mass_kg: float, inertia_kg_m2: float, attitude_bandwidth: float = 15.0,
+                   altitude_bandwidth: float = 4.0, damping: float = 0.8) -> Dict[str, float]:
+    """
+    Pole-placement PID gains in SI units (N, N*m) for the double-integrator
+    roll and altitude plants: kp = J w^2, kd = 2 zeta J w, ki = kp w / 4.
+    """
+    return {
+        "kp_att": inertia_kg_m2 * attitude_bandwidth ** 2,
+        "ki_att": inertia_kg_m2 * attitude_bandwidth ** 3 / 4.0,
+        "kd_att": 2.0 * damping * inertia_kg_m2 * attitude_bandwidth,
+        "kp_alt": mass_kg * altitude_bandwidth ** 2,
+        "ki_alt": mass_kg * altitude_bandwidth ** 3 / 4.0,
+        "kd_alt": 2.0 * damping * mass_kg * altitude_bandwidth,
+    }
+
+
+def _step_metrics(y: np.ndarray, ref: float, t: np.ndarray, band: float) -> Dict[str, np.ndarray]:
+    """
+    Overshoot (%), settling time (s, inf if not settled inside the window) and
+    a stability flag (bounded, with the last quarter of the run within 10% of ref)
+    for trajectories y: (steps, batch).
+    """
+    finite = np.isfinite(y).all(axis=0)
+    with np.errstate(invalid="ignore"):
+        overshoot = np.clip((np.nanmax(y, axis=0) / ref - 1.0) * 100.0, 0.0, None)
+        outside = ~(np.abs(y - ref) <= band * abs(ref))
+    # Index of the last sample outside the band; settled after it
+    last_out = len(t) - 1 - np.argmax(outside[::-1], axis=0)
+    settling = np.where(outside.any(axis=0), t[np.minimum(last_out + 1, len(t) - 1)], 0.0)
+    settling = np.where(outside[-1] | ~finite, np.inf, settling)
+    with np.errstate(invalid="ignore"):
+        tail = np.abs(y[-max(1, len(t) // 4):] - ref).max(axis=0)
+    stable = finite & (tail <= 0.1 * abs(ref))
+    return {"overshoot_percent": np.where(finite, overshoot, np.inf), "settling_time_s": settling, "stable": stable}
+
+
+class HoverDynamicsTool:
+    """
+    Batched planar hover simulator: altitude + roll rigid-body dynamics,
+    PID loops (derivative on a low-pass filtered gyro rate), first-order
+    motor lag and per-side thrust saturation, integrated with fixed-step RK4.
+
+    Every argument of `simulate` broadcasts, so thousands of gain sets or
+    configurations run as one (9, batch) state array.
+    """
+
+    def __init__(self, dt: float = 0.002, duration_s: float = 3.0, settle_band: float = 0.02,
+                 gyro_tau_s: float = 0.01):
+        self.dt = dt
+        self.gyro_tau_s = gyro_tau_s
+        self.duration_s = duration_s
+        self.settle_band = settle_band
+
+    def simulate(self, mass_kg, max_thrust_n, arm_length_m, motor_tau_s, gains: Dict[str, Any],
+                 inertia_kg_m2=None, roll_step_rad: float = 0.2, altitude_step_m: float = 1.0) -> Dict[str, Any]:
+        start = time.perf_counter()
+        m, t_max, arm, tau = (np.asarray(a, dtype=float) for a in (mass_kg, max_thrust_n, arm_length_m, motor_tau_s))
+        inertia = 0.25 * m * arm ** 2 if inertia_kg_m2 is None else np.asarray(inertia_kg_m2, dtype=float)
+        g = {k: np.asarray(v, dtype=float) for k, v in gains.items()}
+        batch = np.broadcast_shapes(m.shape, t_max.shape, arm.shape, tau.shape, inertia.shape,
+                                    *(v.shape for v in g.values()))
+        m, t_max, arm, tau, inertia = (np.broadcast_to(a, batch).ravel() for a in (m, t_max, arm, tau, inertia))
+        g = {k: np.broadcast_to(v, batch).ravel() for k, v in g.items()}
+        side_max = t_max / 2.0
+
+        def commands(x):
+            # Collective: hover feed-forward + altitude PID; differential: roll PID
+            collective = m * G0 + g["kp_alt"] * (altitude_step_m - x[Z]) + g["ki_alt"] * x[IZ] - g["kd_alt"] * x[VZ]
+            torque = g["kp_att"] * (roll_step_rad - x[PHI]) + g["ki_att"] * x[IPHI] - g["kd_att"] * x[PF]
+            raw_l = (collective - torque / arm) / 2.0
+            raw_r = (collective + torque / arm) / 2.0
+            cmd_l, cmd_r = np.clip(raw_l, 0.0, side_max), np.clip(raw_r, 0.0, side_max)
+            return cmd_l, cmd_r, (cmd_l != raw_l) | (cmd_r != raw_r)
+
+        def deriv(x):
+            cmd_l, cmd_r, saturated = commands(x)
+            thrust = x[TL] + x[TR]
+            dx = np.stack([
+                x[VZ],
+                thrust * np.cos(x[PHI]) / m - G0,
+                x[P],
+                (x[TR] - x[TL]) * arm / inertia,
+                (cmd_l - x[TL]) / tau,
+                (cmd_r - x[TR]) / tau,
+                altitude_step_m - x[Z],
+                roll_step_rad - x[PHI],
+                (x[P] - x[PF]) / self.gyro_tau_s,
+            ])
+            return dx, saturated
+
+        steps = int(round(self.duration_s / self.dt))
+        x = np.zeros((9, m.size))
+        x[TL] = x[TR] = m * G0 / 2.0  # start in trimmed hover
+        roll = np.empty((steps + 1, m.size))
+        alt = np.empty((steps + 1, m.size))
+        saturated_steps = np.zeros(m.size)
+        roll[0], alt[0] = x[PHI], x[Z]
+
+        h = self.dt
+        with np.errstate(over="ignore", invalid="ignore"):
+            for i in range(steps):
+                k1, sat = deriv(x)
+                k2, _ = deriv(x + 0.5 * h * k1)
+                k3, _ = deriv(x + 0.5 * h * k2)
+                k4, _ = deriv(x + h * k3)
+                x = x + (h / 6.0) * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+                saturated_steps += sat
+                roll[i + 1], alt[i + 1] = x[PHI], x[Z]
+
+        t = np.arange(steps + 1) * h
+        roll_m = _step_metrics(roll, roll_step_rad, t, self.settle_band)
+        alt_m = _step_metrics(alt, altitude_step_m, t, self.settle_band)
+        stable = roll_m["stable"] & alt_m["stable"]
+
+        shape = batch or (1,)
+        return {
+            "roll_overshoot_percent": roll_m["overshoot_percent"].reshape(shape),
+            "roll_settling_time_s": roll_m["settling_time_s"].reshape(shape),
+            "altitude_overshoot_percent": alt_m["overshoot_percent"].reshape(shape),
+            "altitude_settling_time_s": alt_m["settling_time_s"].reshape(shape),
+            "saturation_fraction": (saturated_steps / steps).reshape(shape),
+            "stable": stable.reshape(shape),
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
+
+    def gain_margin(self, mass_kg: float, max_thrust_n: float, arm_length_m: float = 0.12,
+                    motor_tau_s: float = 0.03, gains: Optional[Dict[str, float]] = None,
+                    scales: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Scales the attitude gains over `scales` in one batch and reports the
+        nominal step response plus the stable scale range (upper end in dB).
+        """
+        inertia = 0.25 * mass_kg * arm_length_m ** 2
+        gains = gains or baseline_gains(mass_kg, inertia)
+        scales = np.geomspace(0.25, 16.0, 49) if scales is None else np.asarray(scales, dtype=float)
+        scales = np.union1d(scales, [1.0])
+        batch_gains = {k: (v * scales if k.endswith("_att") else v) for k, v in gains.items()}
+        res = self.simulate(mass_kg, max_thrust_n, arm_length_m, motor_tau_s, batch_gains, inertia)
+
+        nominal = int(np.flatnonzero(scales == 1.0)[0])
+        stable = res["stable"]
+        upper = lower = None
+        if stable[nominal]:
+            # Contiguous stable band around the nominal gains
+            hi = nominal
+            while hi + 1 < len(scales) and stable[hi + 1]:
+                hi += 1
+            lo = nominal
+            while lo > 0 and stable[lo - 1]:
+                lo -= 1
+            upper, lower = float(scales[hi]), float(scales[lo])
+
+        def clean(v):
+            return float(v) if np.isfinite(v) else None
+
+        return {
+            "gains": {k: float(v) for k, v in gains.items()},
+            "nominal": {k: (bool(v[nominal]) if k == "stable" else clean(v[nominal]))
+                        for k, v in res.items() if k != "elapsed_ms"},
+            "stable_gain_scale": [lower, upper],
+            "gain_margin_db": float(20.0 * np.log10(upper)) if upper else None,
+            "gain_reduction_margin_db": float(-20.0 * np.log10(lower)) if lower else None,
+            "simulations": int(len(scales)),
+            "elapsed_ms": res["elapsed_ms"],
+        }
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+G0 = 9.80665
+RHO_AIR_SI = 1.225
+PERCENTILES = [1, 5, 50, 95, 99]
+
+# One-sigma manufacturing tolerances (relative unless suffixed with a unit)
+DEFAULT_TOLERANCES = {
+    "motor_thrust": 0.05,
+    "prop": 0.02,
+    "mass": 0.03,
+    "arm_length": 0.01,
+    "cg_offset_m": 0.005,
+}
+
+
+def safety_limits(stability_margins: List[Dict[str, Any]], environmental_limits: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Pulls the numeric limits out of the safety_regulations.json categories."""
+    limits = {"min_thrust_to_weight": 1.5, "min_hover_throttle": 20.0, "max_hover_throttle": 60.0, "max_wind_m_s": 12.0}
+    for margin in stability_margins or []:
+        metric = str(margin.get("metric", "")).lower()
+        if "thrust-to-weight" in metric and "min" in margin:
+            limits["min_thrust_to_weight"] = float(margin["min"])
+        elif "hover throttle" in metric:
+            limits["min_hover_throttle"] = float(margin.get("min_percent", limits["min_hover_throttle"]))
+            limits["max_hover_throttle"] = float(margin.get("max_percent", limits["max_hover_throttle"]))
+    for limit in environmental_limits or []:
+        if "wind" in str(limit.get("condition", "")).lower() and "limit_m_s" in limit:
+            limits["max_wind_m_s"] = float(limit["limit_m_s"])
+    return limits
+
+
+def request_seed(*inputs: Any) -> int:
+    """Stable seed derived from JSON-able inputs, so the same request samples the same fleet."""
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+    return int(digest[:16], 16)
+
+
+class VarianceAnalysisTool:
+    """
+    Monte Carlo manufacturing-variance analysis for a multirotor.
+
+    Motor thrust, prop, mass, arm-length and CG tolerances are sampled as
+    (samples, rotors) arrays in one pass. Each sample trims for its CG offset
+    with a least-norm thrust allocation, then reports thrust-to-weight, worst
+    motor hover throttle and control authority (worst-motor thrust headroom
+    while holding position at the wind limit).
+    """
+
+    def __init__(self, samples: int = 100_000, seed: Optional[int] = None,
+                 drag_coefficient: float = 1.0, frontal_area_m2: float = 0.02):
+        self.samples = samples
+        self.seed = seed
+        self.drag_coefficient = drag_coefficient
+        self.frontal_area_m2 = frontal_area_m2
+
+    def run(self, rotor_count: int, max_thrust_per_motor_g: float, all_up_weight_g: float,
+            limits: Dict[str, float], arm_length_m: float = 0.12,
+            tolerances: Optional[Dict[str, float]] = None, seed: Optional[int] = None) -> Dict[str, Any]:
+        """`seed` overrides the tool's seed for this run."""
+        start = time.perf_counter()
+        tol = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+        S, n = self.samples, int(rotor_count)
+
+        # --- Sample the build ---
+        t_max = (max_thrust_per_motor_g / 1000.0 * G0
+                 * (1.0 + tol["motor_thrust"] * rng.standard_normal((S, n)))
+                 * (1.0 + tol["prop"] * rng.standard_normal((S, n))))
+        mass = all_up_weight_g / 1000.0 * (1.0 + tol["mass"] * rng.standard_normal(S))
+        arms = arm_length_m * (1.0 + tol["arm_length"] * rng.standard_normal((S, n)))
+        cg = tol["cg_offset_m"] * rng.standard_normal((S, 2))
+
+        angles = np.pi / n + 2.0 * np.pi * np.arange(n) / n
+        x, y = arms * np.cos(angles), arms * np.sin(angles)
+
+        weight = mass * G0
+        thrust_to_weight = t_max.sum(axis=1) / weight
+
+        # --- Trim: least-norm allocation with sum(T) = F and sum(T r) = F cg ---
+        B = np.stack([np.ones_like(x), x, y], axis=1)  # (S, 3, n)
+        BBt = B @ B.transpose(0, 2, 1)
+
+        def allocate(total_force):
+            b = total_force[:, None] * np.concatenate([np.ones((S, 1)), cg], axis=1)
+            return (B.transpose(0, 2, 1) @ np.linalg.solve(BBt, b[..., None]))[..., 0]
+
+        hover = allocate(weight)
+        with np.errstate(invalid="ignore"):
+            hover_throttle = np.sqrt(np.clip(hover / t_max, 0.0, None)).max(axis=1) * 100.0
+
+        wind = limits.get("max_wind_m_s", 0.0)
+        drag = 0.5 * RHO_AIR_SI * wind ** 2 * self.drag_coefficient * self.frontal_area_m2
+        windy = allocate(np.sqrt(weight ** 2 + drag ** 2))
+        control_authority = 1.0 - (windy / t_max).max(axis=1)
+
+        failures = {
+            "thrust_to_weight": thrust_to_weight < limits["min_thrust_to_weight"],
+            "hover_throttle": (hover_throttle < limits["min_hover_throttle"]) | (hover_throttle > limits["max_hover_throttle"]),
+            "control_authority": control_authority < 0.0,
+        }
+        any_failure = np.logical_or.reduce(list(failures.values()))
+
+        metrics = {
+            "thrust_to_weight": thrust_to_weight,
+            "hover_throttle_percent": hover_throttle,
+            "control_authority": control_authority,
+        }
+        return {
+            "samples": S,
+            "limits": limits,
+            "tolerances": tol,
+            "percentiles": {
+                name: dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(values, PERCENTILES).round(4).tolist()))
+                for name, values in metrics.items()
+            },
+            "failure_probability": {name: float(mask.mean()) for name, mask in failures.items()},
+            "overall_failure_probability": float(any_failure.mean()),
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
+
+    @staticmethod
+    def verdict(failure_probability: float, safe_below: float = 0.01, marginal_below: float = 0.10) -> str:
+        if failure_probability < safe_below:
+            return "SAFE"
+        if failure_probability < marginal_below:
+            return "MARGINAL"
+        return "UNSAFE"
@@ -0,0 +1,191 @@
+import re
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from lib.knowledge_base import KnowledgeBase
+
+LIPO_CELL_V = 3.7
+
+
+def _axis(spec: Dict[str, Any]) -> np.ndarray:
+    return float(spec["start"]) + float(spec["step"]) * np.arange(int(spec["count"]))
+
+
+def _locate(x: np.ndarray, start: np.ndarray, step: np.ndarray, last: np.ndarray):
+    """Cell index and fractional position on a uniform grid of last + 1 points, clamped to its ends."""
+    f = np.clip((x - start) / step, 0.0, last)
+    i = np.minimum(f.astype(int), last - 1)
+    return i, f - i
+
+
+class PropPerformanceTables:
+    """
+    Propeller thrust / shaft-power tables (airspeed rows x RPM columns on
+    uniform grids) stacked into padded (table, airspeed, rpm) arrays so any
+    mix of tables, RPMs and airspeeds interpolates in one broadcast.
+
+    Tables hold sea-level values; thrust and power scale with the density
+    ratio sigma. `operating_point` solves the RPM for a required thrust from
+    an inverse table (thrust fraction -> RPM per airspeed row) built once at
+    load time, so no root finding happens per query.
+    """
+
+    def __init__(self, props: List[Dict[str, Any]], thrust_steps: int = 256, newton_steps: int = 2):
+        self.newton_steps = newton_steps
+        self.props = list(props)
+        self.ids = {p["id"]: i for i, p in enumerate(self.props)}
+        self.sizes = {}
+        for i, p in enumerate(self.props):
+            self.sizes.setdefault(p.get("size"), i)
+
+        count = len(self.props)
+        n_v = max((int(p["airspeed_m_s"]["count"]) for p in self.props), default=1)
+        n_r = max((int(p["rpm"]["count"]) for p in self.props), default=2)
+        # Axis parameters per table as flat arrays (column gathers are far cheaper than row gathers)
+        self.rpm_start, self.rpm_step, self.rpm_last = (
+            np.array([float(p["rpm"][k]) for p in self.props]) for k in ("start", "step", "count"))
+        self.v_start, self.v_step, self.v_last = (
+            np.array([float(p["airspeed_m_s"][k]) for p in self.props]) for k in ("start", "step", "count"))
+        self.rpm_last = self.rpm_last.astype(int) - 1
+        self.v_last = self.v_last.astype(int) - 1
+        self.thrust_g = np.zeros((count, n_v, n_r))
+        self.power_w = np.zeros((count, n_v, n_r))
+        for i, p in enumerate(self.props):
+            t, w = np.asarray(p["thrust_g"], dtype=float), np.asarray(p["power_w"], dtype=float)
+            shape = (int(p["airspeed_m_s"]["count"]), int(p["rpm"]["count"]))
+            if t.shape != shape or w.shape != shape:
+                raise ValueError(f"Prop table {p['id']}: expected {shape} grid, got {t.shape} / {w.shape}")
+            self.thrust_g[i, :shape[0], :shape[1]] = t
+            self.power_w[i, :shape[0], :shape[1]] = w
+
+        # Inverse tables: RPM at evenly spaced fractions of each row's peak thrust
+        self.thrust_steps = thrust_steps
+        self.row_max_thrust_g = self.thrust_g.max(axis=-1)
+        self.rpm_at_fraction = np.zeros((count, n_v, thrust_steps))
+        fractions = np.linspace(0.0, 1.0, thrust_steps)
+        for i in range(count):
+            rpm = _axis(self.props[i]["rpm"])
+            for j in range(self.v_last[i] + 1):
+                row = np.maximum.accumulate(self.thrust_g[i, j, :len(rpm)])
+                # First RPM at which the (monotone) row reaches each thrust level
+                self.rpm_at_fraction[i, j] = np.interp(fractions * row[-1], row, rpm)
+                flat = fractions * row[-1] <= row[0]
+                self.rpm_at_fraction[i, j, flat] = rpm[0]
+
+    @classmethod
+    def from_kb(cls, kb: KnowledgeBase) -> "PropPerformanceTables":
+        """Tables for a prop_performance.json KB, built once per file version."""
+        snapshot = kb.snapshot
+        return snapshot.derived("prop_tables", lambda: cls(snapshot.data.get("props", [])))
+
+    def table_index(self, motors: List[Dict[str, Any]]) -> np.ndarray:
+        """Table per motor: its `prop_table` id, else the first table of its recommended prop size (-1 if none)."""
+        index = []
+        for m in motors:
+            i = self.ids.get(m.get("prop_table"))
+            if i is None:
+                size = re.search(r"\d+(?:\.\d+)?", str(m.get("recommended_prop") or ""))
+                i = self.sizes.get(f"{size.group(0)}-inch") if size else None
+            index.append(-1 if i is None else i)
+        return np.array(index, dtype=int)
+
+    def _airspeed_cell(self, table, airspeed_m_s):
+        t = np.asarray(table, dtype=int)
+        iv, fv = _locate(np.asarray(airspeed_m_s, dtype=float), self.v_start[t], self.v_step[t], self.v_last[t])
+        return t, iv, fv
+
+    def _forward(self, grid: np.ndarray, t, iv, fv, rpm):
+        """Bilinear value of a (table, airspeed, rpm) grid and its slope along RPM."""
+        step = self.rpm_step[t]
+        ir, fr = _locate(rpm, self.rpm_start[t], step, self.rpm_last[t])
+        flat = grid.reshape(-1)
+        n_v, n_r = grid.shape[1:]
+        base = (t * n_v + iv) * n_r + ir
+        a, b = flat[base], flat[base + 1]
+        c, d = flat[base + n_r], flat[base + n_r + 1]
+        lo, hi = a + (b - a) * fr, c + (d - c) * fr
+        slope = ((b - a) * (1 - fv) + (d - c) * fv) / step
+        return lo + (hi - lo) * fv, slope
+
+    def interpolate(self, table, rpm, airspeed_m_s=0.0, sigma=1.0) -> Dict[str, np.ndarray]:
+        """Bilinear thrust (g) and shaft power (W) for broadcastable table indices / RPMs / airspeeds."""
+        t, iv, fv = self._airspeed_cell(table, airspeed_m_s)
+        t, iv, fv, rpm = np.broadcast_arrays(t, iv, fv, np.asarray(rpm, dtype=float))
+        s = np.asarray(sigma, dtype=float)
+        return {"thrust_g": self._forward(self.thrust_g, t, iv, fv, rpm)[0] * s,
+                "power_w": self._forward(self.power_w, t, iv, fv, rpm)[0] * s}
+
+    def max_thrust_g(self, table, airspeed_m_s=0.0, sigma=1.0) -> np.ndarray:
+        """Thrust at the top of each table's RPM range."""
+        t, iv, fv = self._airspeed_cell(table, airspeed_m_s)
+        flat, n_v = self.row_max_thrust_g.reshape(-1), self.row_max_thrust_g.shape[1]
+        base = t * n_v + iv
+        peak = flat[base] * (1 - fv) + flat[base + 1] * fv
+        return peak * np.asarray(sigma, dtype=float)
+
+    def operating_point(self, table, thrust_g, airspeed_m_s=0.0, sigma=1.0, max_rpm=None) -> Dict[str, np.ndarray]:
+        """
+        RPM and shaft power that produce `thrust_g` at `airspeed_m_s`. feasible is
+        False where the thrust exceeds the table (or `max_rpm`, e.g. kv x volts).
+        """
+        s = np.asarray(sigma, dtype=float)
+        thrust_g = np.asarray(thrust_g, dtype=float)
+        t, iv, fv = self._airspeed_cell(table, airspeed_m_s)
+        need = thrust_g / s
+        t, iv, fv, need = np.broadcast_arrays(t, iv, fv, need)
+        peak = self.max_thrust_g(t, airspeed_m_s)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = np.nan_to_num(np.clip(need / peak, 0.0, 1.0)) * (self.thrust_steps - 1)
+        iu = np.minimum(np.floor(u), self.thrust_steps - 2).astype(int)
+        fu = u - iu
+
+        # Initial guess from the inverse table, polished with Newton steps on the forward table
+        inv = self.rpm_at_fraction.reshape(-1)
+        base = (t * self.rpm_at_fraction.shape[1] + iv) * self.thrust_steps + iu
+        lo = inv[base] + (inv[base + 1] - inv[base]) * fu
+        hi = inv[base + self.thrust_steps] + (inv[base + self.thrust_steps + 1] - inv[base + self.thrust_steps]) * fu
+        rpm = lo + (hi - lo) * fv
+        bottom = self.rpm_start[t]
+        top = bottom + self.rpm_step[t] * self.rpm_last[t]
+        for _ in range(self.newton_steps):
+            thrust, slope = self._forward(self.thrust_g, t, iv, fv, rpm)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = np.where(slope > 0, (np.minimum(need, peak) - thrust) / slope, 0.0)
+            rpm = np.clip(rpm + step, bottom, top)
+
+        feasible = need <= peak
+        if max_rpm is not None:
+            feasible = feasible & (rpm <= np.asarray(max_rpm, dtype=float))
+        thrust = self._forward(self.thrust_g, t, iv, fv, rpm)[0] * s
+        power = self._forward(self.power_w, t, iv, fv, rpm)[0] * s
+        with np.errstate(divide="ignore", invalid="ignore"):
+            efficiency = np.where(power > 0, thrust / power, np.nan)
+        result = {"rpm": rpm, "power_w": power, "thrust_g": thrust, "g_per_w": efficiency, "feasible": feasible}
+        if max_rpm is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result["throttle_percent"] = rpm / np.asarray(max_rpm, dtype=float) * 100.0
+        return result
+
+    def operating_points(self, motors: List[Dict[str, Any]], thrust_g, airspeed_m_s=0.0, sigma=1.0,
+                         cells=None, loaded_rpm_fraction: float = 0.85) -> Dict[str, np.ndarray]:
+        """
+        Operating points for a whole motor inventory in one call. The motor axis
+        is last: thrust_g / airspeed / cells broadcast against shape (motors,),
+        e.g. thrust levels of shape (K, 1) give (K, motors) results. Motors
+        without a table come back infeasible with NaN values. With `cells` the
+        RPM ceiling is kv x cells x 3.7 V x loaded_rpm_fraction.
+        """
+        index = self.table_index(motors)
+        has = index >= 0
+        if not has.any():
+            nan = np.full(np.broadcast_shapes(index.shape, np.shape(thrust_g), np.shape(airspeed_m_s)), np.nan)
+            return {"rpm": nan, "power_w": nan, "thrust_g": nan, "g_per_w": nan, "feasible": nan > 0}
+        max_rpm = None
+        if cells is not None:
+            kv = np.array([float(m.get("kv") or np.nan) for m in motors])
+            max_rpm = kv * np.asarray(cells, dtype=float) * LIPO_CELL_V * loaded_rpm_fraction
+        point = self.operating_point(np.maximum(index, 0), thrust_g, airspeed_m_s, sigma, max_rpm)
+        for key, value in point.items():
+            point[key] = (value & has) if key == "feasible" else np.where(has, value, np.nan)
+        return point
@@ -0,0 +1,275 @@
+import re
+import time
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from lib.atmosphere import density_ratio, ambient_offset_f
+from lib.drone_physics import VectorPAVPhysics
+from lib.tools.battery_model import BatteryModel, pack_arrays
+from lib.tools.prop_performance import PropPerformanceTables
+
+G_PER_LB = 453.592
+IN2_PER_FT2 = 144.0
+LIPO_CELL_V = 3.7
+# Combinations broadcast at once (~17 float64 metric arrays each); the motor axis is chunked to fit.
+DEFAULT_GRID_CHUNK = 500_000
+_NUMBER_RE = re.compile(r"(\d+(?:\.\d+)?)")
+
+
+def _first_number(text: Any) -> float:
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        return float(text)
+    match = _NUMBER_RE.search(str(text or ""))
+    return float(match.group(1)) if match else np.nan
+
+
+def _cell_range(text: Any):
+    """'4S-6S' -> (4, 6), '6S' -> (6, 6), unknown -> (nan, nan)."""
+    cells = [float(c) for c in re.findall(r"(\d+)\s*S", str(text or ""), flags=re.IGNORECASE)]
+    if not cells:
+        return np.nan, np.nan
+    return min(cells), max(cells)
+
+
+def _column(items: List[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.array([_first_number(item.get(key)) for item in items], dtype=float)
+
+
+class PropulsionOptimizerTool:
+    """
+    Deterministic motor x ESC x battery x rotor-count search.
+
+    Every combination is evaluated at once as a NumPy broadcast: all-up weight,
+    thrust-to-weight, hover power (PAVPhysics momentum theory), per-motor current
+    at full thrust vs the ESC rating, and an ideal hover endurance. Combinations
+    that pass those checks go through the BatteryModel (Peukert, voltage sag,
+    usable-capacity cutoff) for endurance and pack current headroom at full
+    power, then are reduced to the Pareto front over (endurance max,
+    thrust-to-weight max, all-up weight min).
+
+    `optimize` walks the motor axis in chunks of about `grid_chunk`
+    combinations and keeps a running Pareto front, so memory stays bounded
+    for large catalogs.
+
+    With prop performance tables, hover power, RPM and throttle of the
+    surviving combinations come from the prop's thrust/power table (shaft
+    power / motor_efficiency) instead of momentum theory.
+
+    sigma defaults to the density ratio at altitude_ft: ISA pressure there,
+    with temp_f as the ambient temperature (ISA standard day if None).
+    """
+
+    def __init__(self, eta_vtol: float = 0.7, sigma: Optional[float] = None, usable_capacity: float = 0.8,
+                 current_margin: float = 1.0, altitude_ft: float = 0.0, temp_f: Optional[float] = None,
+                 battery_model: Optional[BatteryModel] = None, battery_chunk: int = 100_000,
+                 motor_efficiency: float = 0.85, loaded_rpm_fraction: float = 0.85,
+                 grid_chunk: int = DEFAULT_GRID_CHUNK):
+        self.eta_vtol = eta_vtol
+        if sigma is None:
+            sigma = float(density_ratio(altitude_ft, ambient_offset_f(altitude_ft, temp_f)))
+        self.sigma = sigma
+        self.usable_capacity = usable_capacity
+        self.current_margin = current_margin
+        # A coarse SOC grid is within 0.1% of the 32-step default and ~2.5x cheaper for a full sweep
+        self.battery_model = battery_model or BatteryModel(usable_fraction=usable_capacity, soc_steps=12)
+        self.battery_chunk = battery_chunk
+        self.motor_efficiency = motor_efficiency
+        self.loaded_rpm_fraction = loaded_rpm_fraction
+        self.grid_chunk = grid_chunk
+
+    def evaluate(self, motors: List[Dict[str, Any]], escs: List[Dict[str, Any]], batteries: List[Dict[str, Any]],
+                 rotor_counts: Sequence[int] = (4, 6, 8), base_weight_g: float = 0.0) -> Dict[str, np.ndarray]:
+        """
+        Metrics for every combination, flattened in (motor, esc, battery, rotors)
+        order. endurance_min here is the ideal capacity / hover-current estimate.
+        """
+        # Motors on axis 0, ESCs axis 1, batteries axis 2, rotor counts axis 3
+        m_w = _column(motors, "weight_g")[:, None, None, None]
+        m_thrust = _column(motors, "max_thrust_g")[:, None, None, None]
+        prop_in = np.array([_first_number(m.get("recommended_prop")) for m in motors], dtype=float)[:, None, None, None]
+        m_cells = np.array([_cell_range(m.get("voltage")) for m in motors], dtype=float).reshape(-1, 2)
+        cells_lo, cells_hi = m_cells[:, 0, None, None, None], m_cells[:, 1, None, None, None]
+
+        e_w = _column(escs, "weight_g")[None, :, None, None]
+        e_amps = _column(escs, "current_a")[None, :, None, None]
+
+        b_w = _column(batteries, "weight_g")[None, None, :, None]
+        b_ah = (_column(batteries, "capacity_mah") / 1000.0)[None, None, :, None]
+        b_c = _column(batteries, "c_rating")[None, None, :, None]
+        b_cells = np.array([_cell_range(b.get("voltage"))[0] for b in batteries], dtype=float)[None, None, :, None]
+        b_volts = b_cells * LIPO_CELL_V
+
+        n = np.asarray(rotor_counts, dtype=float)[None, None, None, :]
+
+        auw_g = base_weight_g + n * (m_w + e_w) + b_w
+        thrust_to_weight = n * m_thrust / auw_g
+        disc_area_ft2 = np.pi * (prop_in / 2.0) ** 2 / IN2_PER_FT2
+
+        hover_kw = VectorPAVPhysics.calc_hover_power_kw(auw_g / G_PER_LB, n * disc_area_ft2, self.eta_vtol, self.sigma)
+        motor_max_kw = VectorPAVPhysics.calc_hover_power_kw(m_thrust / G_PER_LB, disc_area_ft2, self.eta_vtol, self.sigma)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hover_current_a = hover_kw * 1000.0 / b_volts
+            motor_max_current_a = motor_max_kw * 1000.0 / b_volts
+            endurance_min = self.usable_capacity * b_ah / hover_current_a * 60.0
+            hover_throttle = np.sqrt(auw_g / (n * m_thrust)) * 100.0
+        pack_max_current_a = b_ah * b_c
+
+        shape = np.broadcast_shapes(auw_g.shape, hover_current_a.shape, e_amps.shape, cells_lo.shape)
+        idx = np.indices(shape)
+        metrics = {
+            "motor_index": idx[0], "esc_index": idx[1], "battery_index": idx[2], "rotor_index": idx[3],
+            "rotor_count": n + np.zeros(shape),
+            "auw_g": auw_g, "thrust_to_weight": thrust_to_weight,
+            "hover_power_kw": hover_kw, "hover_current_a": hover_current_a, "motor_max_power_kw": motor_max_kw,
+            "hover_throttle_percent": hover_throttle,
+            "motor_max_current_a": motor_max_current_a, "esc_current_a": e_amps,
+            "pack_max_current_a": pack_max_current_a, "endurance_min": endurance_min,
+            "voltage_ok": (b_cells >= cells_lo) & (b_cells <= cells_hi),
+        }
+        return {k: np.broadcast_to(v, shape).ravel().copy() for k, v in metrics.items()}
+
+    def optimize(self, motors: List[Dict[str, Any]], escs: List[Dict[str, Any]], batteries: List[Dict[str, Any]],
+                 rotor_counts: Sequence[int] = (4, 6, 8), base_weight_g: float = 0.0,
+                 min_thrust_to_weight: float = 1.5, max_results: int = 10,
+                 prop_tables: Optional[PropPerformanceTables] = None) -> Dict[str, Any]:
+        start = time.perf_counter()
+        if not (motors and escs and batteries and len(rotor_counts)):
+            return {"front": [], "evaluated": 0, "feasible": 0, "elapsed_ms": 0.0}
+
+        packs = pack_arrays(batteries)
+        motor_tables = prop_tables.table_index(motors) if prop_tables is not None and len(prop_tables.props) else None
+        per_motor = len(escs) * len(batteries) * len(rotor_counts)
+        motors_per_chunk = max(1, self.grid_chunk // per_motor)
+        front: Optional[Dict[str, np.ndarray]] = None
+        evaluated = feasible = 0
+        for lo in range(0, len(motors), motors_per_chunk):
+            m, candidates = self._survivors(motors, escs, batteries, rotor_counts, base_weight_g,
+                                            min_thrust_to_weight, lo, lo + motors_per_chunk,
+                                            packs, prop_tables, motor_tables)
+            evaluated += m["auw_g"].size
+            feasible += len(candidates)
+            rows = {key: m[key][candidates] for key in m}
+            if front is not None:
+                rows = {key: np.concatenate([front[key], rows[key]]) for key in rows}
+            # Running front: the global front is a subset of the chunk fronts
+            keep = self.pareto_front(self._objectives(rows))
+            front = {key: v[keep] for key, v in rows.items()}
+
+        best = self.pareto_front(self._objectives(front), max_results)
+        return {
+            "front": [self._describe(front, i, motors, escs, batteries) for i in best],
+            "evaluated": int(evaluated),
+            "feasible": int(feasible),
+            "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+        }
+
+    @staticmethod
+    def _objectives(m: Dict[str, np.ndarray]) -> np.ndarray:
+        return np.stack([m["endurance_min"], m["thrust_to_weight"], -m["auw_g"]], axis=1)
+
+    def _survivors(self, motors, escs, batteries, rotor_counts, base_weight_g, min_thrust_to_weight,
+                   lo: int, hi: int, packs, prop_tables, motor_tables):
+        """Metrics of motors[lo:hi] x everything, and the flat indices of the feasible combinations."""
+        m = self.evaluate(motors[lo:hi], escs, batteries, rotor_counts, base_weight_g)
+        m["motor_index"] += lo
+        feasible = (
+            m["voltage_ok"]
+            & (m["thrust_to_weight"] >= min_thrust_to_weight)
+            & (m["motor_max_current_a"] * self.current_margin <= m["esc_current_a"])
+            & np.isfinite(m["endurance_min"])
+        )
+        candidates = np.flatnonzero(feasible)
+
+        # Prop tables and the battery discharge model on the survivors only
+        # (hover, with full power still available)
+        for key in ("peak_current_a", "current_headroom", "hover_rpm"):
+            m[key] = np.full(feasible.size, np.nan)
+        m["hover_ok"] = np.ones(feasible.size, dtype=bool)
+        for start in range(0, len(candidates), self.battery_chunk):
+            idx = candidates[start:start + self.battery_chunk]
+            if motor_tables is not None:
+                self._apply_prop_tables(m, idx, prop_tables, motor_tables, motors, packs)
+            b = m["battery_index"][idx]
+            profile = np.stack([m["hover_power_kw"][idx], m["rotor_count"][idx] * m["motor_max_power_kw"][idx]], axis=1)
+            res = self.battery_model.evaluate(packs["capacity_mah"][b], packs["c_rating"][b], packs["cells"][b],
+                                              profile * 1000.0, weights=[1.0, 0.0])
+            m["endurance_min"][idx] = res["flight_time_min"]
+            m["peak_current_a"][idx] = res["peak_current_a"]
+            m["current_headroom"][idx] = res["current_headroom"]
+        keep = (
+            m["hover_ok"][candidates]
+            & (m["motor_max_current_a"][candidates] * self.current_margin <= m["esc_current_a"][candidates])
+            & (m["current_headroom"][candidates] >= 0)
+            & (m["endurance_min"][candidates] > 0)
+        )
+        return m, candidates[keep]
+
+    def _apply_prop_tables(self, m: Dict[str, np.ndarray], idx: np.ndarray, tables: PropPerformanceTables,
+                           motor_tables: np.ndarray, motors: List[Dict[str, Any]], packs: Dict[str, np.ndarray]):
+        """Replaces momentum-theory hover figures with prop-table operating points where a motor has a table."""
+        table = motor_tables[m["motor_index"][idx]]
+        sel, table = idx[table >= 0], table[table >= 0]
+        if not len(sel):
+            return
+        motor = m["motor_index"][sel]
+        kv, max_thrust = _column(motors, "kv")[motor], _column(motors, "max_thrust_g")[motor]
+        cells = packs["cells"][m["battery_index"][sel]]
+        n = m["rotor_count"][sel]
+        hover = tables.operating_point(table, m["auw_g"][sel] / n, 0.0, self.sigma,
+                                       max_rpm=kv * cells * LIPO_CELL_V * self.loaded_rpm_fraction)
+        full = tables.operating_point(table, max_thrust, 0.0, self.sigma)
+
+        m["hover_power_kw"][sel] = n * hover["power_w"] / self.motor_efficiency / 1000.0
+        m["motor_max_power_kw"][sel] = full["power_w"] / self.motor_efficiency / 1000.0
+        m["hover_current_a"][sel] = m["hover_power_kw"][sel] * 1000.0 / (cells * LIPO_CELL_V)
+        m["motor_max_current_a"][sel] = m["motor_max_power_kw"][sel] * 1000.0 / (cells * LIPO_CELL_V)
+        m["hover_throttle_percent"][sel] = hover["throttle_percent"]
+        m["hover_rpm"][sel] = hover["rpm"]
+        m["hover_ok"][sel] = hover["feasible"]
+
+    @staticmethod
+    def pareto_front(objectives: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Row indices of non-dominated points (all objectives maximized), best
+        first by the objective columns in lexicographic order.
+
+        Repeatedly takes the lexicographic maximum of the remaining points (which
+        cannot be dominated) and drops everything it dominates, so the cost is
+        O(front size x points) and the first `limit` picks are exact.
+        """
+        remaining = np.arange(len(objectives))
+        picked = []
+        while len(remaining) and (limit is None or len(picked) < limit):
+            pts = objectives[remaining]
+            best = np.lexsort(pts.T[::-1])[-1]
+            top = pts[best]
+            picked.append(remaining[best])
+            dominated = np.all(pts <= top, axis=1)
+            remaining = remaining[~dominated]
+        return np.array(picked, dtype=int)
+
+    @staticmethod
+    def _describe(m: Dict[str, np.ndarray], i: int, motors, escs, batteries) -> Dict[str, Any]:
+        motor, esc, battery = motors[m["motor_index"][i]], escs[m["esc_index"][i]], batteries[m["battery_index"][i]]
+        return {
+            "motor": {"id": motor.get("id"), "name": motor.get("name")},
+            "esc": {"id": esc.get("id"), "name": esc.get("name")},
+            "battery": {"id": battery.get("id"), "name": battery.get("name")},
+            "propeller": motor.get("recommended_prop"),
+            "rotor_count": int(m["rotor_count"][i]),
+            "all_up_weight_g": round(float(m["auw_g"][i]), 1),
+            "thrust_to_weight": round(float(m["thrust_to_weight"][i]), 2),
+            "max_thrust_per_motor_g": motor.get("max_thrust_g"),
+            "hover_power_kw": round(float(m["hover_power_kw"][i]), 4),
+            "hover_current_a": round(float(m["hover_current_a"][i]), 2),
+            "hover_throttle_percent": round(float(m["hover_throttle_percent"][i]), 1),
+            "hover_rpm": round(float(m["hover_rpm"][i])) if np.isfinite(m["hover_rpm"][i]) else None,
+            "motor_max_current_a": round(float(m["motor_max_current_a"][i]), 2),
+            "esc_current_a": float(m["esc_current_a"][i]),
+            "pack_max_current_a": round(float(m["pack_max_current_a"][i]), 1),
+            "pack_peak_current_a": round(float(m["peak_current_a"][i]), 2),
+            "pack_current_headroom": round(float(m["current_headroom"][i]), 2),
+            "endurance_min": round(float(m["endurance_min"][i]), 2),
+        }
@@ -0,0 +1,313 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from lib.data_dir import data_path
+
+# Rows pending per flush call, and how long a row may wait before it is flushed.
+DEFAULT_MAX_BATCH = 200
+DEFAULT_FLUSH_INTERVAL_S = 0.5
+# Beyond this many pending rows the flusher writes every table at once.
+DEFAULT_MAX_BACKLOG = 50_000
+# Hard cap on pending rows (e.g. while the database is down); rows past it are spooled or dropped.
+DEFAULT_MAX_ROWS = 200_000
+# At most one overflow log line per this many seconds.
+OVERFLOW_LOG_INTERVAL_S = 10.0
+
+
+class WriteBehindBuffer:
+    """
+    In-memory write-behind queue for Supabase inserts on the ABN hot path.
+
+    `insert` only appends to a per-table queue; a background thread issues
+    one bulk insert per table whenever a table reaches `max_batch` rows or
+    the oldest row has waited `flush_interval_s`. Tables flush in the order
+    they were first written, and a due table first flushes every table
+    written before it (abn_channels before the abn_transcripts rows that
+    reference them). Failed
+    batches go back to the front of their queue and are retried on the next
+    cycle.
+
+    `stop` (FastAPI shutdown / atexit) drains the queues; rows that still
+    cannot be written are spooled to `spool_path` as JSON lines and re-queued
+    by the next `start`. Without a (writable) spool they are dropped, and the
+    count is logged and kept in the `dropped` metric.
+
+    Producers never write to the database themselves: past `max_backlog`
+    they only wake the flusher, and rows past the hard `max_rows` cap go
+    straight to the spool (or are dropped) instead of growing memory.
+    Slow per-row work (e.g. storing payload blobs) can be left to a table's
+    preparer, which the flusher thread runs just before the insert.
+    """
+
+    def __init__(self, client=None, max_batch: int = DEFAULT_MAX_BATCH,
+                 flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S, max_backlog: int = DEFAULT_MAX_BACKLOG,
+                 spool_path: Optional[str] = None, max_rows: int = DEFAULT_MAX_ROWS):
+        self._client = client
+        self.max_batch = max_batch
+        self.flush_interval_s = flush_interval_s
+        self.max_backlog = max_backlog
+        self.max_rows = max_rows
+        self.spool_path = spool_path
+        self._spool_lock = threading.Lock()
+        self._last_overflow_log = 0.0
+        self._preparers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._oldest: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._atexit_registered = False
+        self._stats = {"enqueued": 0, "written": 0, "batches": 0, "failed_batches": 0,
+                       "overflowed": 0, "spooled": 0, "recovered": 0, "dropped": 0,
+                       "last_flush_ms": 0.0, "last_error": None}
+
+    @property
+    def client(self):
+        if self._client is None:
+            from lib.supabase_client import supabase
+            self._client = supabase
+        return self._client
+
+    def register_preparer(self, table: str, prepare: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        """
+        Runs `prepare` on each queued row of `table` in the flusher, before it
+        is written. It must return the row as stored and be idempotent: a
+        failed batch is retried (or spooled) as it was queued.
+        """
+        self._preparers[table] = prepare
+
+    # --- Producer side ---
+
+    def insert(self, table: str, row: Dict[str, Any]):
+        """Queues a row for `table`. Never blocks on the database."""
+        self.insert_many(table, [row])
+
+    def insert_many(self, table: str, rows: List[Dict[str, Any]]):
+        """Queues several rows at once; they are flushed together (one bulk insert when they fit a batch)."""
+        if not rows:
+            return
+        with self._cond:
+            backlog = sum(len(q) for q in self._queues.values())
+            room = max(0, self.max_rows - backlog)
+            rows, overflow = rows[:room], rows[room:]
+            if overflow:
+                self._stats["overflowed"] += len(overflow)
+            if rows:
+                queue = self._queues.setdefault(table, deque())
+                first = not queue
+                if first:
+                    self._oldest[table] = time.monotonic()
+                queue.extend(rows)
+                self._stats["enqueued"] += len(rows)
+                # Wake the flusher to arm its timer (first rows), flush a full batch or drain the backlog
+                if first or len(queue) >= self.max_batch or backlog + len(rows) > self.max_backlog:
+                    self._cond.notify()
+        self._ensure_started()
+        if overflow:
+            now = time.monotonic()
+            log = now - self._last_overflow_log >= OVERFLOW_LOG_INTERVAL_S
+            if log:
+                self._last_overflow_log = now
+            self._spill([(table, row) for row in overflow], log)
+
+    # --- Flushing ---
+
+    def _take(self, table: str) -> List[Dict[str, Any]]:
+        queue = self._queues.get(table)
+        batch = []
+        while queue and len(batch) < self.max_batch:
+            batch.append(queue.popleft())
+        if queue:
+            self._oldest[table] = time.monotonic()
+        else:
+            self._oldest.pop(table, None)
+        return batch
+
+    def _requeue(self, table: str, batch: List[Dict[str, Any]]):
+        queue = self._queues.setdefault(table, deque())
+        queue.extendleft(reversed(batch))
+        self._oldest.setdefault(table, time.monotonic())
+
+    def _write(self, table: str, batch: List[Dict[str, Any]]) -> bool:
+        start = time.perf_counter()
+        prepare = self._preparers.get(table)
+        try:
+            rows = [prepare(row) for row in batch] if prepare else batch
+            self.client.table(table).insert(rows).execute()
+        except Exception as e:
+            print(f"Write-behind flush of {len(batch)} rows to {table} failed: {e}")
+            with self._cond:
+                self._requeue(table, batch)
+                self._stats["failed_batches"] += 1
+                self._stats["last_error"] = str(e)
+            return False
+        with self._cond:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["last_flush_ms"] = (time.perf_counter() - start) * 1000.0
+        return True
+
+    def flush(self, table: Optional[str] = None) -> int:
+        """
+        Synchronously writes everything pending (for one table, or all in
+        first-write order). Stops at the first failed batch; returns rows written.
+        """
+        written = 0
+        with self._flush_lock:
+            with self._cond:
+                tables = [table] if table else list(self._queues)
+            for name in tables:
+                while True:
+                    with self._cond:
+                        batch = self._take(name)
+                    if not batch:
+                        break
+                    if not self._write(name, batch):
+                        return written
+                    written += len(batch)
+        return written
+
+    def _due(self) -> List[str]:
+        now = time.monotonic()
+        tables = list(self._queues)
+        due = [i for i, t in enumerate(tables) if self._queues[t] and (
+            len(self._queues[t]) >= self.max_batch or now - self._oldest.get(t, now) >= self.flush_interval_s)]
+        if not due:
+            if sum(len(q) for q in self._queues.values()) > self.max_backlog:
+                return [t for t in tables if self._queues[t]]
+            return []
+        # Rows may reference tables first written earlier (transcripts -> channels): flush those first
+        return [t for t in tables[:max(due) + 1] if self._queues[t]]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and not self._due():
+                    pending = [self._oldest[t] for t, q in self._queues.items() if q and t in self._oldest]
+                    timeout = None
+                    if pending:
+                        timeout = max(0.0, min(pending) + self.flush_interval_s - time.monotonic())
+                    self._cond.wait(timeout)
+                if self._stopping:
+                    return
+                due = self._due()
+            failed = False
+            for table in due:
+                if not self.flush(table) and self.pending(table):
+                    # Later tables may depend on this one's rows; retry it first
+                    failed = True
+                    break
+            if failed:
+                # Back off before retrying a failing table
+                with self._cond:
+                    self._cond.wait(self.flush_interval_s)
+
+    # --- Lifecycle ---
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+    def start(self):
+        """Starts the flusher thread and re-queues rows spooled by a previous shutdown."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._recover_spool()
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout_s: float = 10.0):
+        """Stops the flusher, drains the queues and spools whatever could not be written."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout_s)
+        self._thread = None
+        self.flush()
+        self._spool()
+
+    def _spool(self):
+        with self._cond:
+            rows = [(table, row) for table, q in self._queues.items() for row in q]
+            self._queues.clear()
+            self._oldest.clear()
+        if rows:
+            self._spill(rows)
+
+    def _spill(self, rows: List[Tuple[str, Dict[str, Any]]], log: bool = True):
+        """Appends (table, row) pairs to the spool; without a (writable) spool they are dropped."""
+        error = "no spool configured"
+        if self.spool_path:
+            try:
+                with self._spool_lock:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.spool_path)), exist_ok=True)
+                    with open(self.spool_path, "a") as f:
+                        for table, row in rows:
+                            f.write(json.dumps({"table": table, "row": row}, default=str) + "\n")
+                error = None
+            except OSError as e:
+                error = str(e)
+        with self._cond:
+            self._stats["dropped" if error else "spooled"] += len(rows)
+        if not log:
+            return
+        if error:
+            print(f"Write-behind dropped {len(rows)} unwritten rows ({error})")
+        else:
+            print(f"Write-behind spooled {len(rows)} unwritten rows to {self.spool_path}")
+
+    def _recover_spool(self):
+        # Caller holds self._cond
+        if not self.spool_path:
+            return
+        recovered = 0
+        with self._spool_lock:
+            if not os.path.exists(self.spool_path):
+                return
+            with open(self.spool_path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        queue = self._queues.setdefault(entry["table"], deque())
+                        if not queue:
+                            self._oldest[entry["table"]] = time.monotonic()
+                        queue.append(entry["row"])
+                        recovered += 1
+            os.remove(self.spool_path)
+        self._stats["recovered"] += recovered
+
+    # --- Metrics ---
+
+    def pending(self, table: Optional[str] = None) -> int:
+        with self._cond:
+            if table:
+                return len(self._queues.get(table, ()))
+            return sum(len(q) for q in self._queues.values())
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                **self._stats,
+                "backlog": sum(len(q) for q in self._queues.values()),
+                "backlog_by_table": {t: len(q) for t, q in self._queues.items()},
+                "oldest_pending_s": max((now - t for t in self._oldest.values()), default=0.0),
+                "running": bool(self._thread and self._thread.is_alive()),
+            }
+
+
+write_behind = WriteBehindBuffer(spool_path=os.environ.get("ABN_WRITE_BEHIND_SPOOL",
+                                                           data_path("write_behind_spool.jsonl")))
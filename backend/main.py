@@ -1,6 +1,7 @@
 import os
 import sys
 import re
+from contextlib import asynccontextmanager
 
 # Ensure backend directory is in python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -10,10 +11,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 # Import Routers
-from routers import orchestrator, gateway
+from routers import orchestrator, gateway, physics
 
 # Import Agents (Original functionality)
 from agent_registry import registry
+from lib.write_behind import write_behind
 from agents.hmao.orchestrator import GlobalOrchestrator
 from agents.hmao.cores.analysis_core import AnalysisCore
 from agents.hmao.cores.engineering_core import EngineeringCore
@@ -29,7 +31,14 @@ from agents.drone.research_agent import ResearchAgent
 
 load_dotenv()
 
-app = FastAPI(title="Beam.me Backend", version="2.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    write_behind.start()
+    yield
+    # Drain buffered ABN transcripts / channels before the process exits
+    write_behind.stop()
+
+app = FastAPI(title="Beam.me Backend", version="2.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +51,7 @@ app.add_middleware(
 # Register ABN Routers
 app.include_router(orchestrator.router, tags=["Orchestrator"])
 app.include_router(gateway.router, tags=["Gateway"])
+app.include_router(physics.router, tags=["Physics"])
 
 # Register Agents
 registry.register(GlobalOrchestrator("sys"))
@@ -152,109 +162,8 @@ async def get_history():
 
 @app.get("/api/agents")
 async def get_agents():
-    # Return mock profiles for the frontend visualization
-    return [
-        {
-            "id": "hmao-orchestrator",
-            "name": "Orchestrator",
-            "role": "Mission Control",
-            "icon": "🧠",
-            "description": "Manages the overall mission lifecycle and delegates tasks.",
-            "instructions": ["Ensure safety", "Optimize budget"],
-            "tools": ["planner", "delegator"],
-            "relationships": {"incoming": [], "outgoing": ["engineering-core"]}
-        },
-        {
-            "id": "engineering-core",
-            "name": "Engineering Core",
-            "role": "Builder",
-            "icon": "🛠️",
-            "description": "Implements code solutions and runs simulations.",
-            "instructions": ["Write clean code", "Verify outputs"],
-            "tools": ["code_gen", "linter"],
-            "relationships": {"incoming": ["hmao-orchestrator"], "outgoing": []}
-        },
-        {
-            "id": "engineering-propulsion-v1",
-            "name": "Propulsion Sizing",
-            "role": "Drone Specialist",
-            "icon": "🚁",
-            "description": "Selects motors, props, and batteries for flight requirements.",
-            "instructions": ["Maximize endurance", "Ensure T/W ratio > 2"],
-            "tools": ["component_db", "thrust_calc"],
-            "relationships": {"incoming": ["hmao-orchestrator"], "outgoing": ["engineering-flightcontrol-v1"]}
-        },
-        {
-            "id": "engineering-flightcontrol-v1",
-            "name": "Flight Safety",
-            "role": "Safety Critic",
-            "icon": "🛡️",
-            "description": "Validates stability margins and assesses crash risk.",
-            "instructions": ["Check PID margins", "Verify vibration limits"],
-            "tools": ["stability_sim", "risk_model"],
-            "relationships": {"incoming": ["engineering-propulsion-v1"], "outgoing": []}
-        },
-        {
-            "id": "qa-codereview-v1",
-            "name": "QA Reviewer",
-            "role": "Auditor",
-            "icon": "🧐",
-            "description": "Reviews code for bugs and security issues.",
-            "instructions": ["Check PEP8", "Find security holes"],
-            "tools": ["static_analysis"],
-            "relationships": {"incoming": ["engineering-core"], "outgoing": []}
-        },
-        {
-            "id": "physics-classical-mechanics-v1",
-            "name": "Classical Mechanics",
-            "role": "Physicist",
-            "icon": "🍎",
-            "description": "Solves Newtonian physics problems (forces, motion, energy).",
-            "instructions": ["Identify Knowns/Unknowns", "Use Standard Model"],
-            "tools": ["formula_db", "solver"],
-            "relationships": {"incoming": ["hmao-orchestrator"], "outgoing": []}
-        },
-        {
-            "id": "drone-materials-v1",
-            "name": "Materials Agent",
-            "role": "Drone Specialist",
-            "icon": "🧪",
-            "description": "Proposes materials, fasteners, and manufacturing methods.",
-            "instructions": ["Check yield strength", "Optimize weight"],
-            "tools": ["ashby_charts", "supplier_db"],
-            "relationships": {"incoming": ["engineering-core"], "outgoing": ["drone-cad-v1"]}
-        },
-        {
-            "id": "drone-cad-v1",
-            "name": "CAD Builder",
-            "role": "Design Engineer",
-            "icon": "📐",
-            "description": "Generates parametric CAD models and drawings.",
-            "instructions": ["Maintain parametricity", "Export STEP/STL"],
-            "tools": ["opencascade", "freecad"],
-            "relationships": {"incoming": ["drone-materials-v1"], "outgoing": ["drone-quick-sim-v1"]}
-        },
-        {
-            "id": "drone-quick-sim-v1",
-            "name": "Quick-Sim Agent",
-            "role": "Analyst",
-            "icon": "🔥",
-            "description": "Runs fast sanity checks (FEA/CFD) on designs.",
-            "instructions": ["Check max stress", "Verify deflection"],
-            "tools": ["sfepy", "calculix"],
-            "relationships": {"incoming": ["drone-cad-v1"], "outgoing": []}
-        },
-        {
-            "id": "drone-research-v1",
-            "name": "Research Agent",
-            "role": "Researcher",
-            "icon": "📚",
-            "description": "Conducts targeted research on materials and methods.",
-            "instructions": ["Find datasheets", "Cite sources"],
-            "tools": ["web_search", "knowledge_base"],
-            "relationships": {"incoming": ["hmao-orchestrator"], "outgoing": ["drone-materials-v1"]}
-        }
-    ]
+    # Profiles declared by the registered agents (also feed the matchmaker index)
+    return registry.list_agents()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -6,6 +6,7 @@ from datetime import datetime
 class CoreRegistrationRequest(BaseModel):
     core_id: str
     public_key_pem: str
+    endpoint: Optional[str] = None # Base URL of the core's host, if not co-located with the gateway
 
 # --- TASK TOKEN ---
 class TaskRequest(BaseModel):
@@ -58,3 +59,53 @@ class Envelope(BaseModel):
     signed_by_kid: str
     signature: str
     timestamp: datetime
+
+# --- PHYSICS SWEEP ---
+# Validated before any axis is expanded (DesignSweepTool enforces the same total)
+MAX_SWEEP_AXIS_POINTS = 100_000
+MAX_SWEEP_POINTS = 50_000_000
+
+class SweepRange(BaseModel):
+    """Either explicit values or an evenly spaced start/stop/num range."""
+    values: Optional[List[float]] = Field(default=None, max_length=MAX_SWEEP_AXIS_POINTS)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    num: int = Field(default=1, ge=1, le=MAX_SWEEP_AXIS_POINTS)
+
+    def size(self) -> int:
+        """Number of values to_list() would produce, without building them."""
+        if self.values is not None:
+            return len(self.values)
+        return 1 if self.stop is None else self.num
+
+    def to_list(self) -> List[float]:
+        if self.values is not None:
+            return self.values
+        if self.start is None:
+            raise ValueError("SweepRange needs 'values' or 'start'")
+        if self.stop is None or self.num <= 1:
+            return [self.start]
+        step = (self.stop - self.start) / (self.num - 1)
+        return [self.start + i * step for i in range(self.num)]
+
+class SweepRequest(BaseModel):
+    speed_mph: SweepRange
+    weight_lbs: SweepRange
+    wing_area_ft2: SweepRange
+    aspect_ratio: SweepRange
+    altitude_ft: SweepRange = SweepRange(values=[0.0])
+    efficiency_factor: float = 0.8
+    cd_profile: float = 0.02
+    wetted_area_ft2: float = 15.0
+    eta_cruise: float = 0.8
+    temp_f: Optional[float] = None # Ambient at each altitude; None = ISA standard day
+    include_curves: bool = True
+
+    @model_validator(mode="after")
+    def check_points(self):
+        points = 1
+        for axis in (self.speed_mph, self.weight_lbs, self.wing_area_ft2, self.aspect_ratio, self.altitude_ft):
+            points *= axis.size()
+        if points > MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep has {points:,} points; the limit is {MAX_SWEEP_POINTS:,}.")
+        return self
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, HTTPException, Header, Body
+from fastapi import APIRouter, HTTPException, Header, Body, Request, Response
 from models import ABNOpenRequest, ABNOpenResponse, ABNAuthorizeRequest
-from lib.supabase_client import supabase
+from lib.write_behind import write_behind
 from lib.auth import verify_token, create_abn_token
-from .orchestrator import authorize_abn 
-from agent_registry import registry
+from .orchestrator import authorize_abn_cached, pdp_cache
+from lib.abn_mailbox import SeqConflict, abn_mailboxes
+from lib.blob_store import blob_store
+from lib.abn_transport import NOT_QUEUED
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import datetime
 import uuid
 
 router = APIRouter()
 
+# Upper bound on envelopes accepted by one batch request.
+MAX_BATCH_MESSAGES = 100
+# Transcript rows carry the message under this key until the write-behind
+# flusher stores its large fields and fills payload_hash / payload_path.
+TRANSCRIPT_MESSAGE_KEY = "_message"
+
 @router.post("/abn/open", response_model=ABNOpenResponse)
 async def open_abn_channel(
     req: ABNOpenRequest, 
@@ -27,12 +37,13 @@ async def open_abn_channel(
         target_core=req.target_core,
         proposed_budget=req.proposed_budget
     )
-    pdp_res = await authorize_abn(pdp_req)
+    pdp_res = await authorize_abn_cached(pdp_req)
     
     if not pdp_res.allow:
          raise HTTPException(status_code=403, detail="ABN Authorization Denied by PDP")
 
     channel_id = f"ch-{uuid.uuid4()}"
+    pdp_cache.bind_channel(channel_id, req.origin_core, req.target_core)
     task_id = task_claims.get("sub", "").replace("task:", "")
     
     channel_data = {
@@ -45,40 +56,50 @@ async def open_abn_channel(
         "revoked": False
     }
     
-    supabase.table("abn_channels").insert(channel_data).execute()
+    write_behind.insert("abn_channels", channel_data)
 
     abn_token = create_abn_token(
         channel_id=channel_id,
         origin_core=req.origin_core,
         target_core=req.target_core,
         budget=pdp_res.budget,
-        allowed_msg_types=pdp_res.allowed_msg_types
+        allowed_msg_types=pdp_res.allowed_msg_types,
+        task_id=task_id
     )
 
     return ABNOpenResponse(
         channel_id=channel_id,
         abn_token=abn_token,
-        presigned_upload_url=None
+        presigned_upload_url=blob_store.upload_url(channel_id)
     )
 
-@router.post("/abn/channel/{channel_id}/messages")
-async def send_abn_message(
-    channel_id: str,
-    envelope: dict = Body(...), 
-    authorization: str = Header(None)
-):
+def _verify_channel_token(channel_id: str, authorization: Optional[str]) -> dict:
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing ABN Token")
     
-    # 1. Verify ABN Token
     try:
         claims = verify_token(authorization, expected_prefix="channel:")
         if claims["sub"] != f"channel:{channel_id}":
             raise HTTPException(status_code=403, detail="Token mismatch for channel")
     except Exception:
         raise HTTPException(status_code=403, detail="Invalid ABN Token")
+    return claims
 
-    # 2. Log Transcript (Sender)
+def _resolve_blobs(envelope: dict) -> dict:
+    """Resolves blob references (payloads uploaded once, sent by hash); 422 for an unknown blob."""
+    try:
+        return blob_store.materialize(envelope)
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=f"Unknown blob {e.args[0]}; upload it first", headers=NOT_QUEUED)
+
+def _queue_message(channel_id: str, envelope: dict, task_id: Optional[str] = None) -> Tuple[asyncio.Future, Optional[dict]]:
+    """Queues one verified, blob-resolved message on the target's mailbox; returns its reply future and transcript row."""
+    # Queue for the target (per-channel sequence order; seq assigned if missing)
+    reply = abn_mailboxes.deliver(channel_id, envelope, task_id=task_id)
+    if reply.done() and reply.exception() is not None:
+        return reply, None
+
+    # Transcript (Sender); large fields are stored once and referenced, off the event loop
     transcript_data = {
         "trace_id": envelope.get("trace_id", str(uuid.uuid4())),
         "channel_id": channel_id,
@@ -86,29 +107,195 @@ async def send_abn_message(
         "origin_core": envelope.get("origin_core"),
         "target_core": envelope.get("target_core"),
         "msg_type": envelope.get("msg_type"),
-        "payload_hash": "hash-placeholder", 
-        "payload_path": None,
+        TRANSCRIPT_MESSAGE_KEY: dict(envelope),
         "policy_decision": {"allowed": True},
         "gateway_verif": {"valid": True}
     }
-    supabase.table("abn_transcripts").insert(transcript_data).execute()
+    return reply, transcript_data
 
-    # 3. Forward to Target (Synchronous RPC for Vercel)
-    target_core_id = envelope.get("target_core")
-    target_agent = registry.get_agent(target_core_id)
-    
-    response_payload = None
-    if target_agent and hasattr(target_agent, "handle_abn_message"):
-        # Invoke the agent
-        response_payload = await target_agent.handle_abn_message(envelope)
-        
-        # Log Reply if exists
-        if response_payload:
-            reply_transcript = transcript_data.copy()
-            reply_transcript["origin_core"] = target_core_id
-            reply_transcript["target_core"] = envelope.get("origin_core")
-            reply_transcript["msg_type"] = "RESPONSE"
-            reply_transcript["seq"] = (envelope.get("seq", 0) + 1)
-            supabase.table("abn_transcripts").insert(reply_transcript).execute()
+def _reply_transcript(transcript_data: dict, reply: asyncio.Future) -> Optional[dict]:
+    # Log Reply if exists
+    if reply.cancelled() or reply.exception() is not None or not reply.result():
+        return None
+    reply_transcript = transcript_data.copy()
+    reply_transcript["origin_core"] = transcript_data["target_core"]
+    reply_transcript["target_core"] = transcript_data["origin_core"]
+    reply_transcript["msg_type"] = "RESPONSE"
+    reply_transcript["seq"] = transcript_data["seq"] + 1
+    if isinstance(reply.result(), dict):
+        reply_transcript[TRANSCRIPT_MESSAGE_KEY] = reply.result()
+    return reply_transcript
+
+def _store_transcript_payload(row: dict) -> dict:
+    """Write-behind preparer: stores the row's message (large fields as blobs) and references it."""
+    if TRANSCRIPT_MESSAGE_KEY not in row:
+        return row
+    row = dict(row)
+    message = row.pop(TRANSCRIPT_MESSAGE_KEY)
+    row["payload_hash"], row["payload_path"] = blob_store.message_ref(blob_store.externalize(message))
+    return row
+
+write_behind.register_preparer("abn_transcripts", _store_transcript_payload)
+
+def accept_abn_message(channel_id: str, envelope: dict, authorization: Optional[str]) -> asyncio.Future:
+    """
+    Verifies the channel token, queues the message on the target core's
+    mailbox and logs its transcript. Returns the future of the target's
+    reply, so in-process senders can pipeline several messages per channel.
+    """
+    claims = _verify_channel_token(channel_id, authorization)
+    reply, transcript_data = _queue_message(channel_id, _resolve_blobs(envelope), claims.get("task_id"))
+    if transcript_data is None:
+        return reply
+    write_behind.insert("abn_transcripts", transcript_data)
+
+    def log_reply(done: asyncio.Future):
+        row = _reply_transcript(transcript_data, done)
+        if row:
+            write_behind.insert("abn_transcripts", row)
+
+    reply.add_done_callback(log_reply)
+    return reply
+
+async def accept_abn_batch(channel_id: str, envelopes: List[dict], authorization: Optional[str]) -> Dict[str, Any]:
+    """
+    Verifies the token once, queues the envelopes on the target's mailbox in
+    order and writes their transcripts (then the replies') as one bulk insert
+    each. Returns the replies in envelope order; a rejected envelope gets
+    None and an entry in `errors` keyed by its index.
+
+    Blob references are resolved for every envelope before any is queued,
+    so an unknown blob fails the whole batch (422) with nothing delivered.
+    """
+    if len(envelopes) > MAX_BATCH_MESSAGES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_MESSAGES} messages per batch",
+                            headers=NOT_QUEUED)
+    claims = _verify_channel_token(channel_id, authorization)
+
+    resolved = []
+    for i, envelope in enumerate(envelopes):
+        try:
+            resolved.append(_resolve_blobs(envelope))
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"Message {i}: {e.detail}; nothing was queued",
+                                headers=NOT_QUEUED)
+    queued = [_queue_message(channel_id, envelope, claims.get("task_id")) for envelope in resolved]
+    write_behind.insert_many("abn_transcripts", [row for _, row in queued if row])
+
+    await asyncio.gather(*(reply for reply, _ in queued), return_exceptions=True)
+    replies, errors, reply_rows = [], {}, []
+    for i, (reply, row) in enumerate(queued):
+        if reply.cancelled() or reply.exception() is not None:
+            replies.append(None)
+            errors[i] = "cancelled" if reply.cancelled() else str(reply.exception())
+            continue
+        replies.append(reply.result())
+        reply_row = _reply_transcript(row, reply) if row else None
+        if reply_row:
+            reply_rows.append(reply_row)
+    write_behind.insert_many("abn_transcripts", reply_rows)
+    return {"replies": replies, "errors": errors}
+
+@router.post("/abn/channel/{channel_id}/messages")
+async def send_abn_message(
+    channel_id: str,
+    envelope: dict = Body(...), 
+    authorization: str = Header(None)
+):
+    # Forward to Target through its mailbox; the HTTP call still returns the reply
+    try:
+        response_payload = await accept_abn_message(channel_id, envelope, authorization)
+    except SeqConflict as e:
+        # Only sequencing conflicts; errors raised by the target's handler propagate as they are
+        raise HTTPException(status_code=409, detail=str(e))
             
     return {"status": "delivered", "reply": response_payload}
+
+@router.post("/abn/channel/{channel_id}/messages/batch")
+async def send_abn_batch(
+    channel_id: str,
+    envelopes: List[dict] = Body(...),
+    authorization: str = Header(None)
+):
+    """Ordered array of envelopes for one channel; returns the array of replies."""
+    result = await accept_abn_batch(channel_id, envelopes, authorization)
+    return {"status": "delivered", **result}
+
+@router.post("/abn/deliver")
+async def deliver_abn_message(
+    envelope: dict = Body(...),
+    authorization: str = Header(None)
+):
+    """
+    Host side of a remote core: the gateway forwards a message for one of
+    this process's cores here, with a deliver-scoped token naming that core.
+    Channel tokens are refused, so senders cannot bypass the gateway.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing Deliver Token")
+    try:
+        claims = verify_token(authorization, expected_prefix="deliver:")
+    except Exception:
+        raise HTTPException(status_code=403, detail="Invalid Deliver Token")
+    target_core_id = envelope.get("target_core")
+    if claims.get("sub") != f"deliver:{envelope.get('channel_id')}" or claims.get("target_core") != target_core_id:
+        raise HTTPException(status_code=403, detail="Token mismatch for delivery")
+
+    from agent_registry import registry, run_scopes
+    # The originating run's instance when the run lives here, else the registered core
+    target_agent = run_scopes.get(claims["task_id"], target_core_id) if claims.get("task_id") else None
+    if target_agent is None:
+        target_agent = registry.get_agent(target_core_id)
+    if not target_agent or not hasattr(target_agent, "handle_abn_message"):
+        raise HTTPException(status_code=404, detail=f"Core {target_core_id} is not hosted here")
+    return {"status": "delivered", "reply": await target_agent.handle_abn_message(envelope)}
+
+@router.put("/abn/blobs")
+async def upload_blob(request: Request, channel_id: str, expires: int, signature: str):
+    """
+    Presigned upload (URL from /abn/open): streams the raw body to disk,
+    stores it once and returns its reference. Bodies above the store's
+    max_upload_bytes are refused with 413.
+    """
+    if not blob_store.check_signature("upload", channel_id, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired upload URL")
+    too_large = HTTPException(status_code=413, detail=f"Blob exceeds {blob_store.max_upload_bytes} bytes")
+    try:
+        declared = int(request.headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    if declared > blob_store.max_upload_bytes:
+        raise too_large
+
+    writer = blob_store.writer()
+    try:
+        async for chunk in request.stream():
+            # Content-Length may be absent (chunked) or wrong: count what arrives
+            if writer.size + len(chunk) > blob_store.max_upload_bytes:
+                raise too_large
+            writer.write(chunk)
+        stored = writer.commit()
+    finally:
+        writer.abort()
+    stored["download_url"] = blob_store.download_url(stored["hash"])
+    return stored
+
+@router.get("/abn/blobs/{digest}")
+async def download_blob(digest: str, expires: int, signature: str):
+    if not blob_store.check_signature("download", digest, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired download URL")
+    try:
+        data = blob_store.get(digest)
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return Response(content=data, media_type="application/octet-stream")
+
+@router.get("/abn/mailboxes")
+async def mailbox_metrics():
+    """Queue depth and delivery counters per target core."""
+    return abn_mailboxes.metrics()
+
+@router.get("/abn/write_behind")
+async def write_behind_metrics():
+    """Backlog and flush statistics of the transcript / channel write-behind buffer."""
+    return write_behind.metrics()
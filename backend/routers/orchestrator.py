@@ -1,16 +1,115 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.concurrency import run_in_threadpool
 from models import CoreRegistrationRequest, TaskRequest, TaskResponse, ABNAuthorizeRequest, ABNAuthorizeResponse
 from lib.supabase_client import supabase
-from lib.auth import create_task_token
+from lib.write_behind import write_behind
+from lib.auth import create_task_token, revoke_channel_tokens, verify_token
+from lib.abn_mailbox import abn_mailboxes
+from lib.abn_transport import remote_cores
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
 import datetime
+import os
+import threading
+import time
 import uuid
 
 router = APIRouter()
 
+# How long a PDP decision is reused for the same origin/target/budget.
+PDP_CACHE_TTL_S = 60.0
+# Lifetime of an authorized channel, counted from when it opens.
+CHANNEL_LIFETIME = datetime.timedelta(hours=1)
+MAX_PDP_PAIRS = 1024
+# Hosts a remote core may register as its endpoint (ABN_REMOTE_CORE_HOSTS,
+# comma-separated); empty accepts any host presenting a valid core token.
+REMOTE_CORE_HOSTS = {h.strip() for h in os.environ.get("ABN_REMOTE_CORE_HOSTS", "").split(",") if h.strip()}
+
+
+class PDPDecisionCache:
+    """
+    TTL cache of PDP decisions per (origin, target) pair, with the proposed
+    budget as the key inside a pair. Channels opened from a decision are
+    remembered so revoking one drops its pair's cached decisions.
+
+    Only allow / budget / message types are cached: the channel TTL is
+    per channel, so a cached decision comes back without one.
+    """
+    def __init__(self, ttl_s: float = PDP_CACHE_TTL_S, max_pairs: int = MAX_PDP_PAIRS):
+        self.ttl_s = ttl_s
+        self.max_pairs = max_pairs
+        self._pairs: "OrderedDict[Tuple[str, str], Dict[int, Tuple[float, ABNAuthorizeResponse]]]" = OrderedDict()
+        self._channels: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, origin: str, target: str, budget: int) -> Optional[ABNAuthorizeResponse]:
+        with self._lock:
+            entry = self._pairs.get((origin, target), {}).get(budget)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            return None
+
+    def put(self, origin: str, target: str, budget: int, decision: ABNAuthorizeResponse):
+        with self._lock:
+            pair = self._pairs.setdefault((origin, target), {})
+            pair[budget] = (time.monotonic() + self.ttl_s, decision.model_copy(update={"ttl": ""}))
+            self._pairs.move_to_end((origin, target))
+            while len(self._pairs) > self.max_pairs:
+                self._pairs.popitem(last=False)
+
+    def bind_channel(self, channel_id: str, origin: str, target: str):
+        with self._lock:
+            self._channels[channel_id] = (origin, target)
+            while len(self._channels) > self.max_pairs * 16:
+                self._channels.popitem(last=False)
+
+    def invalidate_channel(self, channel_id: str):
+        with self._lock:
+            pair = self._channels.pop(channel_id, None)
+            if pair:
+                self._pairs.pop(pair, None)
+
+    def clear(self):
+        with self._lock:
+            self._pairs.clear()
+            self._channels.clear()
+
+
+pdp_cache = PDPDecisionCache()
+
+def _authorize_endpoint(core_id: str, endpoint: str, authorization: Optional[str]):
+    """
+    The gateway forwards envelopes and deliver tokens to a registered
+    endpoint, so only the core's own host (core token) may set it, and only
+    to an http(s) URL on an allowed host.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing Core Token")
+    try:
+        claims = verify_token(authorization, expected_prefix="core:")
+    except Exception:
+        raise HTTPException(status_code=403, detail="Invalid Core Token")
+    if claims["sub"] != f"core:{core_id}":
+        raise HTTPException(status_code=403, detail="Token mismatch for core")
+
+    url = urlsplit(endpoint)
+    if url.scheme not in ("http", "https") or not url.hostname:
+        raise HTTPException(status_code=422, detail="Endpoint must be an http(s) URL")
+    if REMOTE_CORE_HOSTS and url.hostname not in REMOTE_CORE_HOSTS:
+        raise HTTPException(status_code=403, detail=f"Endpoint host {url.hostname} is not allowed")
+
 @router.post("/cores/register")
-async def register_core(req: CoreRegistrationRequest):
+async def register_core(req: CoreRegistrationRequest, authorization: str = Header(None)):
     data = {"core_id": req.core_id, "public_key_pem": req.public_key_pem}
+    if req.endpoint:
+        _authorize_endpoint(req.core_id, req.endpoint, authorization)
+        data["endpoint"] = req.endpoint
     res = supabase.table("core_registry").upsert(data).execute()
+    if req.endpoint:
+        # Messages for this core are forwarded over pooled HTTP from now on
+        remote_cores.register(req.core_id, req.endpoint)
+        abn_mailboxes.mailboxes.pop(req.core_id, None)
     return {"status": "registered", "core_id": req.core_id}
 
 @router.post("/task", response_model=TaskResponse)
@@ -33,17 +132,35 @@ async def authorize_abn(req: ABNAuthorizeRequest):
             allowed_msg_types=[]
         )
     
-    # Calculate TTL (e.g., 1 hour from now)
-    ttl = (datetime.datetime.utcnow() + datetime.timedelta(hours=1)).isoformat()
-    
     return ABNAuthorizeResponse(
         allow=True,
         budget=req.proposed_budget,
-        ttl=ttl,
+        ttl=channel_expiry(),
         allowed_msg_types=["PROPOSAL", "QUESTION", "ARTIFACT_REF", "COMMAND", "ACK"]
     )
 
+def channel_expiry() -> str:
+    """Expiry (ISO timestamp) of a channel opened now."""
+    return (datetime.datetime.utcnow() + CHANNEL_LIFETIME).isoformat()
+
+async def authorize_abn_cached(req: ABNAuthorizeRequest) -> ABNAuthorizeResponse:
+    """
+    authorize_abn, reusing a decision for the same origin/target/budget for
+    PDP_CACHE_TTL_S; a reused allow gets a TTL counted from now.
+    """
+    decision = pdp_cache.get(req.origin_core, req.target_core, req.proposed_budget)
+    if decision is None:
+        decision = await authorize_abn(req)
+        pdp_cache.put(req.origin_core, req.target_core, req.proposed_budget, decision)
+        return decision
+    return decision.model_copy(update={"ttl": channel_expiry() if decision.allow else ""})
+
 @router.delete("/channels/{channel_id}")
 async def revoke_channel(channel_id: str):
+    revoke_channel_tokens(channel_id)
+    pdp_cache.invalidate_channel(channel_id)
+    abn_mailboxes.forget_channel(channel_id)
+    # The channel row may still be buffered; write it before updating it
+    await run_in_threadpool(write_behind.flush, "abn_channels")
     supabase.table("abn_channels").update({"revoked": True}).eq("channel_id", channel_id).execute()
     return {"status": "revoked", "channel_id": channel_id}
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException
+from models import SweepRequest
+from lib.tools.design_sweep import DesignSweepTool
+
+router = APIRouter()
+sweep_tool = DesignSweepTool()
+
+@router.post("/physics/sweep")
+def run_design_sweep(req: SweepRequest):
+    # Sync handler: FastAPI runs it in the threadpool so the event loop stays free
+    try:
+        return sweep_tool.sweep(
+            speed_mph=req.speed_mph.to_list(),
+            weight_lbs=req.weight_lbs.to_list(),
+            wing_area_ft2=req.wing_area_ft2.to_list(),
+            aspect_ratio=req.aspect_ratio.to_list(),
+            altitude_ft=req.altitude_ft.to_list(),
+            efficiency_factor=req.efficiency_factor,
+            cd_profile=req.cd_profile,
+            wetted_area_ft2=req.wetted_area_ft2,
+            eta_cruise=req.eta_cruise,
+            temp_f=req.temp_f,
+            include_curves=req.include_curves
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,11 +1,17 @@
 import sys
 import os
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
 
 # Add backend to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Keep Knowledge Base embeddings offline and deterministic in tests
+os.environ.setdefault("KB_EMBEDDING_BACKEND", "local")
+# Blobs and spool files go to a scratch dir, not the backend's data dir
+os.environ.setdefault("BEAM_DATA_DIR", tempfile.mkdtemp(prefix="beam-test-data-"))
+
 from main import app
 
 @pytest.fixture
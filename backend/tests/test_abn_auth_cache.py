@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+
+from lib import auth
+from models import ABNAuthorizeRequest
+from routers import orchestrator
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    auth.verified_tokens.clear()
+    orchestrator.pdp_cache.clear()
+    yield
+    auth.verified_tokens.clear()
+    orchestrator.pdp_cache.clear()
+
+
+def test_repeat_verification_is_a_cache_hit_until_exp(monkeypatch):
+    token = auth.create_abn_token("ch-1", "a", "b", 10, ["PROPOSAL"])
+    decodes = []
+    real_decode = jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **k: decodes.append(1) or real_decode(*a, **k))
+
+    first = auth.verify_token(f"Bearer {token}", expected_prefix="channel:")
+    first["sub"] = "tampered"
+    for _ in range(5):
+        assert auth.verify_token(token, expected_prefix="channel:")["sub"] == "channel:ch-1"
+    assert len(decodes) == 1
+
+    # A cached entry is never served past the token's own expiry
+    later = time.time() + 7200
+    monkeypatch.setattr(auth.time, "time", lambda: later)
+    assert auth.verified_tokens.get(token) is None
+
+
+def test_cache_is_bounded_and_scope_is_still_checked():
+    cache = auth.VerifiedTokenCache(max_entries=2)
+    for i in range(3):
+        cache.put(f"t{i}", {"sub": f"task:{i}", "exp": time.time() + 60})
+    assert len(cache) == 2 and cache.get("t0") is None
+
+    task = auth.create_task_token("t-1", ["a"])
+    auth.verify_token(task)
+    with pytest.raises(Exception, match="Invalid token scope"):
+        auth.verify_token(task, expected_prefix="channel:")
+
+
+def test_revocation_invalidates_tokens_and_pdp_decisions(monkeypatch):
+    calls = []
+    real_authorize = orchestrator.authorize_abn
+
+    async def counting(req):
+        calls.append(req)
+        return await real_authorize(req)
+
+    monkeypatch.setattr(orchestrator, "authorize_abn", counting)
+    req = ABNAuthorizeRequest(origin_core="a", target_core="b", proposed_budget=10)
+    for _ in range(3):
+        assert asyncio.run(orchestrator.authorize_abn_cached(req)).allow
+    assert len(calls) == 1
+
+    token = auth.create_abn_token("ch-2", "a", "b", 10, ["PROPOSAL"])
+    auth.verify_token(token)
+    orchestrator.pdp_cache.bind_channel("ch-2", "a", "b")
+
+    auth.revoke_channel_tokens("ch-2")
+    orchestrator.pdp_cache.invalidate_channel("ch-2")
+    with pytest.raises(Exception, match="revoked"):
+        auth.verify_token(token)
+    asyncio.run(orchestrator.authorize_abn_cached(req))
+    assert len(calls) == 2
+
+
+def test_cached_decisions_get_a_fresh_channel_ttl():
+    req = ABNAuthorizeRequest(origin_core="a", target_core="b", proposed_budget=10)
+    first = asyncio.run(orchestrator.authorize_abn_cached(req))
+    time.sleep(0.01)
+    second = asyncio.run(orchestrator.authorize_abn_cached(req))
+    assert orchestrator.pdp_cache.get("a", "b", 10).ttl == ""
+    assert second.ttl > first.ttl
+    assert (second.budget, second.allowed_msg_types) == (first.budget, first.allowed_msg_types)
+
+    denied = ABNAuthorizeRequest(origin_core="a", target_core="b", proposed_budget=500)
+    asyncio.run(orchestrator.authorize_abn_cached(denied))
+    assert asyncio.run(orchestrator.authorize_abn_cached(denied)).ttl == ""
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from agent_registry import registry
+from lib.abn_client import ABNClient, ChannelPool
+from lib.abn_transport import InProcessTransport
+from lib.auth import create_task_token, create_abn_token
+from lib.blob_store import BlobStore
+from routers import gateway
+
+
+class EchoCore:
+    def __init__(self):
+        self.agent_id = f"echo-{uuid.uuid4().hex[:8]}"
+        self.seqs = []
+
+    async def handle_abn_message(self, envelope):
+        self.seqs.append(envelope["seq"])
+        return {"echo": envelope.get("n")}
+
+
+class RecordingBuffer:
+    def __init__(self):
+        self.calls = []
+
+    def insert(self, table, row):
+        self.calls.append(("insert", table, [row]))
+
+    def insert_many(self, table, rows):
+        self.calls.append(("insert_many", table, list(rows)))
+
+
+@pytest.fixture
+def core(monkeypatch):
+    buffer = RecordingBuffer()
+    monkeypatch.setattr(gateway, "write_behind", buffer)
+    core = EchoCore()
+    registry.register(core)
+    core.buffer = buffer
+    yield core
+    registry._agents.pop(core.agent_id, None)
+
+
+def test_batch_is_delivered_in_order_with_bulk_transcripts(core):
+    client = ABNClient("origin", create_task_token(f"task-{uuid.uuid4()}", ["origin"]),
+                       pool=ChannelPool(), transport=InProcessTransport())
+
+    async def scenario():
+        await client.open_channel(core.agent_id)
+        core.buffer.calls.clear()
+        return await client.send_batch(core.agent_id, [("PROPOSAL", {"n": n}) for n in range(3)])
+
+    replies = asyncio.run(scenario())
+    assert [r["echo"] for r in replies] == [0, 1, 2]
+    assert core.seqs == [1, 3, 5]
+    # One bulk insert for the requests, one for the replies
+    assert [(kind, [row["seq"] for row in rows]) for kind, _, rows in core.buffer.calls] == \
+        [("insert_many", [1, 3, 5]), ("insert_many", [2, 4, 6])]
+
+
+def test_rejected_envelopes_are_reported_by_index(core, client):
+    channel_id = f"ch-{uuid.uuid4()}"
+    token = create_abn_token(channel_id, "origin", core.agent_id, 10, ["PROPOSAL"])
+    batch = [{"target_core": core.agent_id, "msg_type": "PROPOSAL", "seq": seq, "n": seq} for seq in (1, 1, 3)]
+
+    res = client.post(f"/abn/channel/{channel_id}/messages/batch", json=batch, headers={"Authorization": token})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["replies"][0] == {"echo": 1} and body["replies"][1] is None and body["replies"][2] == {"echo": 3}
+    assert "duplicate" in body["errors"]["1"]
+    assert core.seqs == [1, 3]
+
+
+def test_batch_checks_token_once_and_bounds_size(core, client):
+    channel_id = f"ch-{uuid.uuid4()}"
+    other = create_abn_token(f"ch-{uuid.uuid4()}", "origin", core.agent_id, 10, ["PROPOSAL"])
+    envelope = {"target_core": core.agent_id, "msg_type": "PROPOSAL"}
+    url = f"/abn/channel/{channel_id}/messages/batch"
+    assert client.post(url, json=[envelope]).status_code == 401
+    assert client.post(url, json=[envelope], headers={"Authorization": other}).status_code == 403
+
+    token = create_abn_token(channel_id, "origin", core.agent_id, 10, ["PROPOSAL"])
+    too_many = [dict(envelope) for _ in range(gateway.MAX_BATCH_MESSAGES + 1)]
+    assert client.post(url, json=too_many, headers={"Authorization": token}).status_code == 413
+    assert core.seqs == []
+
+
+def test_unknown_blob_rejects_the_batch_before_anything_is_queued(core, client):
+    channel_id = f"ch-{uuid.uuid4()}"
+    token = create_abn_token(channel_id, "origin", core.agent_id, 10, ["PROPOSAL"])
+    batch = [{"target_core": core.agent_id, "msg_type": "PROPOSAL", "seq": 1, "n": 1},
+             {"target_core": core.agent_id, "msg_type": "PROPOSAL", "seq": 3, "code": {"$blob": "0" * 64}}]
+    url = f"/abn/channel/{channel_id}/messages/batch"
+
+    res = client.post(url, json=batch, headers={"Authorization": token})
+    assert res.status_code == 422 and "Message 1" in res.json()["detail"]
+    assert core.seqs == [] and core.buffer.calls == []
+    # Nothing was consumed: the corrected batch goes through with the same seqs
+    batch[1]["code"] = "inline"
+    assert client.post(url, json=batch, headers={"Authorization": token}).json()["errors"] == {}
+    assert core.seqs == [1, 3]
+
+
+def test_transcript_payloads_are_stored_by_the_flusher_not_on_the_event_loop(core, monkeypatch, tmp_path):
+    store = BlobStore(str(tmp_path), inline_limit=64)
+    monkeypatch.setattr(gateway, "blob_store", store)
+    client = ABNClient("origin", create_task_token(f"task-{uuid.uuid4()}", ["origin"]),
+                       pool=ChannelPool(), transport=InProcessTransport())
+    big = "x" * 1000
+
+    async def scenario():
+        await client.open_channel(core.agent_id)
+        core.buffer.calls.clear()
+        return await client.send_message(core.agent_id, "PROPOSAL", {"n": 1, "code": big})
+
+    assert asyncio.run(scenario()) == {"echo": 1}
+    assert store.stats["puts"] == 0
+    request, reply = [rows[0] for _, _, rows in core.buffer.calls]
+    assert "payload_hash" not in request and request[gateway.TRANSCRIPT_MESSAGE_KEY]["code"] == big
+
+    stored = gateway._store_transcript_payload(request)
+    assert gateway.TRANSCRIPT_MESSAGE_KEY not in stored and stored["payload_path"]
+    assert store.materialize(json.loads(store.get(stored["payload_hash"])))["code"] == big
+    assert gateway._store_transcript_payload(stored) == stored
+    assert gateway._store_transcript_payload(reply)["payload_path"] is None
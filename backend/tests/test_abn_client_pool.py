@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+
+import pytest
+
+from lib import abn_client
+from lib.abn_client import ABNClient, ChannelPool
+from lib.abn_transport import ABNTransport
+from lib.auth import create_task_token, create_abn_token, revoke_channel_tokens
+from models import ABNOpenResponse
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    """Stand-in gateway that mints real channel tokens and records traffic."""
+    opened, sent = [], []
+
+    class FakeTransport(ABNTransport):
+        async def open_channel(self, req, task_token):
+            channel_id = f"ch-{uuid.uuid4()}"
+            opened.append(channel_id)
+            token = create_abn_token(channel_id, req.origin_core, req.target_core, 2, ["PROPOSAL"])
+            return ABNOpenResponse(channel_id=channel_id, abn_token=token, presigned_upload_url=None)
+
+        async def post_message(self, channel_id, envelope, abn_token):
+            sent.append((channel_id, envelope["seq"]))
+            reply = asyncio.get_running_loop().create_future()
+            reply.set_result({"ack": envelope["seq"]})
+            return reply
+
+        async def send_batch(self, channel_id, envelopes, abn_token):
+            futures = [await self.post_message(channel_id, envelope, abn_token) for envelope in envelopes]
+            replies = await asyncio.gather(*futures, return_exceptions=True)
+            return {"replies": [None if isinstance(r, Exception) else r for r in replies],
+                    "errors": {i: str(r) for i, r in enumerate(replies) if isinstance(r, Exception)}}
+
+    monkeypatch.setattr(abn_client, "default_transport", FakeTransport())
+    return opened, sent
+
+
+def test_channels_are_reused_per_task_origin_and_target(gateway):
+    opened, _ = gateway
+    pool = ChannelPool()
+    token = create_task_token("task-1", ["a", "b"])
+
+    async def scenario():
+        first = ABNClient("a", token, pool=pool)
+        await first.request_connection("Verify flight safety and stability")
+        again = ABNClient("a", token, pool=pool)          # e.g. the next run of the same task
+        await again.request_connection("Verify flight safety and stability")
+        assert again.channel_id == first.channel_id
+        other_task = ABNClient("a", create_task_token("task-2", ["a"]), pool=pool)
+        await other_task.open_channel("engineering-flightcontrol-v1")
+        assert other_task.channel_id != first.channel_id
+
+    asyncio.run(scenario())
+    assert len(opened) == 2 and pool.hits == 1
+
+
+def test_spent_budget_or_revocation_opens_a_fresh_channel(gateway):
+    opened, sent = gateway
+    pool = ChannelPool()
+    client = ABNClient("a", create_task_token("task-3", ["a", "b"]), pool=pool)
+
+    async def scenario():
+        await client.open_channel("b")
+        for _ in range(3):                                  # budget of 2 per channel
+            await client.send_message("b", "PROPOSAL", {})
+        revoke_channel_tokens(client.channel_id)
+        await client.send_message("b", "PROPOSAL", {})
+
+    asyncio.run(scenario())
+    assert [ch for ch, _ in sent] == [opened[0], opened[0], opened[1], opened[2]]
+    assert [seq for _, seq in sent] == [1, 3, 1, 1]
+    assert len(opened) == 3
+
+
+def test_invalid_task_token_is_never_pooled(gateway):
+    pool = ChannelPool()
+
+    async def scenario():
+        for _ in range(2):
+            await ABNClient("a", "legacy", pool=pool).open_channel("b")
+
+    asyncio.run(scenario())
+    assert len(gateway[0]) == 2 and len(pool) == 0
+
+
+def test_transports_must_implement_the_whole_interface():
+    class Partial(ABNTransport):
+        async def open_channel(self, req, task_token):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from lib import abn_mailbox
+from lib.abn_mailbox import CoreMailbox, MailboxRouter, SeqConflict
+
+
+def test_messages_are_handled_in_seq_order_despite_arrival_order():
+    handled = []
+
+    async def handler(envelope):
+        handled.append(envelope["seq"])
+        await asyncio.sleep(0)
+        return {"ack": envelope["seq"]}
+
+    async def scenario():
+        box = CoreMailbox("b", handler)
+        futures = [box.deliver("ch-1", {"seq": seq}) for seq in (5, 1, 3)]
+        return await asyncio.gather(*futures)
+
+    replies = asyncio.run(scenario())
+    assert handled == [1, 3, 5]
+    assert [r["ack"] for r in replies] == [5, 1, 3]
+
+
+def test_channels_are_pipelined_concurrently_up_to_the_core_limit():
+    running, peak = [0], [0]
+
+    async def handler(envelope):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return {"seq": envelope["seq"]}
+
+    async def scenario():
+        router = MailboxRouter(resolve=lambda core: type("Core", (), {"handle_abn_message": staticmethod(handler)})(),
+                               max_concurrency=3)
+        envelopes = [{"target_core": "b"} for _ in range(4 * 6)]
+        futures = [router.deliver(f"ch-{i % 6}", env) for i, env in enumerate(envelopes)]
+        replies = await asyncio.gather(*futures)
+        return router, envelopes, replies
+
+    router, envelopes, replies = asyncio.run(scenario())
+    assert peak[0] == 3
+    # Seqs are assigned per channel: 1, 3, 5, 7 on each of the six channels
+    assert [env["seq"] for env in envelopes[::6]] == [1, 3, 5, 7]
+    assert [r["seq"] for r in replies] == [env["seq"] for env in envelopes]
+    assert router.metrics()["b"]["delivered"] == 24 and router.metrics()["b"]["queued"] == 0
+
+
+def test_duplicates_are_rejected_and_gaps_skipped_after_timeout():
+    handled = []
+
+    async def handler(envelope):
+        handled.append(envelope["seq"])
+        return None
+
+    async def scenario():
+        box = CoreMailbox("b", handler, gap_timeout_s=0.02)
+        await box.deliver("ch-1", {"seq": 1})
+        with pytest.raises(SeqConflict, match="duplicate"):
+            await box.deliver("ch-1", {"seq": 1})
+        late = box.deliver("ch-1", {"seq": 5})          # seq 3 is lost in transit
+        await asyncio.wait_for(late, 1.0)
+        return box
+
+    box = asyncio.run(scenario())
+    assert handled == [1, 5] and box.skipped == 1
+
+
+def test_evicted_channels_resume_at_their_cursor(monkeypatch):
+    monkeypatch.setattr(abn_mailbox, "MAX_CHANNELS", 2)
+
+    async def handler(envelope):
+        return envelope["seq"]
+
+    async def scenario():
+        box = CoreMailbox("b", handler, gap_timeout_s=5.0)
+        for seq in (1, 3):
+            await box.deliver("ch-1", {"seq": seq})
+        for cid in ("ch-2", "ch-3"):
+            await box.deliver(cid, {"seq": 1})
+        assert "ch-1" not in box.channels
+        # No gap wait: the channel picks up at seq 5
+        return await asyncio.wait_for(box.deliver("ch-1", {"seq": 5}), 0.5)
+
+    assert asyncio.run(scenario()) == 5
+
+
+def test_eviction_never_picks_the_channel_being_created(monkeypatch):
+    monkeypatch.setattr(abn_mailbox, "MAX_CHANNELS", 1)
+
+    async def handler(envelope):
+        await asyncio.sleep(0.01)
+        return envelope["seq"]
+
+    async def scenario():
+        box = CoreMailbox("b", handler)
+        # ch-1 is busy, so the only idle channel when ch-2 arrives is ch-2 itself
+        busy = box.deliver("ch-1", {"seq": 1})
+        second = box.deliver("ch-2", {"seq": 1})
+        return await asyncio.gather(busy, second), list(box.channels)
+
+    replies, channels = asyncio.run(scenario())
+    assert replies == [1, 1] and channels == ["ch-1", "ch-2"]
+
+
+def test_reused_seqs_are_renumbered_when_not_strict():
+    async def handler(envelope):
+        return envelope["seq"]
+
+    async def scenario():
+        box = CoreMailbox("b", handler, strict_seq=False)
+        return [await box.deliver("ch-1", {"seq": 1}) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [1, 3, 5]
+
+
+def test_only_seq_conflicts_map_to_409(monkeypatch):
+    import uuid
+    from fastapi.testclient import TestClient
+    from agent_registry import registry
+    from lib.auth import create_abn_token
+    from main import app
+    from routers import gateway
+
+    class PickyCore:
+        agent_id = f"picky-{uuid.uuid4().hex[:8]}"
+
+        async def handle_abn_message(self, envelope):
+            raise ValueError("cannot parse the proposal")
+
+    monkeypatch.setattr(gateway.write_behind, "insert", lambda table, row: None)
+    core = PickyCore()
+    registry.register(core)
+    try:
+        channel_id = f"ch-{uuid.uuid4()}"
+        token = create_abn_token(channel_id, "origin", core.agent_id, 10, ["PROPOSAL"])
+        http = TestClient(app, raise_server_exceptions=False)
+        url = f"/abn/channel/{channel_id}/messages"
+        envelope = {"target_core": core.agent_id, "msg_type": "PROPOSAL", "seq": 1}
+        assert http.post(url, json=envelope, headers={"Authorization": token}).status_code == 500
+        assert http.post(url, json=envelope, headers={"Authorization": token}).status_code == 409
+    finally:
+        registry._agents.pop(core.agent_id, None)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from lib import abn_client
+from lib.abn_client import ABNClient, ChannelPool
+from lib.abn_transport import ABNTransport
+from lib.auth import create_task_token, create_abn_token
+from lib.matchmaker import matchmaker
+from models import ABNOpenResponse
+
+# Seconds each stand-in reviewer takes to answer; None raises instead
+DELAYS = {"safety": 0.05, "sim": 0.05, "slow": 5.0, "broken": None}
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    opened = []
+
+    class FakeTransport(ABNTransport):
+        async def open_channel(self, req, task_token):
+            channel_id = f"ch-{uuid.uuid4()}"
+            opened.append(req.target_core)
+            token = create_abn_token(channel_id, req.origin_core, req.target_core, 10, ["PROPOSAL"])
+            return ABNOpenResponse(channel_id=channel_id, abn_token=token, presigned_upload_url=None)
+
+        async def post_message(self, channel_id, envelope, abn_token):
+            async def review():
+                delay = DELAYS[envelope["target_core"]]
+                if delay is None:
+                    raise RuntimeError("reviewer crashed")
+                await asyncio.sleep(delay)
+                return {"assessment": "SAFE", "by": envelope["target_core"]}
+            return asyncio.ensure_future(review())
+
+        async def send_batch(self, channel_id, envelopes, abn_token):
+            futures = [await self.post_message(channel_id, envelope, abn_token) for envelope in envelopes]
+            replies = await asyncio.gather(*futures, return_exceptions=True)
+            return {"replies": [None if isinstance(r, Exception) else r for r in replies],
+                    "errors": {i: str(r) for i, r in enumerate(replies) if isinstance(r, Exception)}}
+
+    monkeypatch.setattr(abn_client, "default_transport", FakeTransport())
+    return opened
+
+
+def client():
+    return ABNClient("prop", create_task_token(f"task-{uuid.uuid4()}", ["prop"]), pool=ChannelPool())
+
+
+def test_reviewers_are_asked_concurrently(gateway):
+    start = time.perf_counter()
+    result = asyncio.run(client().multicast("", "PROPOSAL", {}, targets=["safety", "sim", "prop"]))
+    assert time.perf_counter() - start < 0.09                   # not 2 x 0.05 s
+    assert result["targets"] == ["safety", "sim"]               # never to itself
+    assert set(result["replies"]) == {"safety", "sim"} and result["quorum_met"]
+    assert sorted(gateway) == ["safety", "sim"]
+
+
+def test_quorum_returns_early_and_timeout_bounds_the_wait(gateway):
+    async def scenario():
+        majority = await client().multicast("", "PROPOSAL", {}, targets=["safety", "sim", "slow"], quorum="majority")
+        everyone = await client().multicast("", "PROPOSAL", {}, targets=["safety", "slow"], timeout_s=0.1)
+        return majority, everyone
+
+    start = time.perf_counter()
+    majority, everyone = asyncio.run(scenario())
+    assert time.perf_counter() - start < 1.0
+    assert majority["quorum_met"] and majority["unanswered"] == ["slow"] and not majority["timed_out"]
+    assert not everyone["quorum_met"] and everyone["timed_out"]
+    assert set(everyone["replies"]) == {"safety"} and everyone["unanswered"] == ["slow"]
+
+
+def test_failed_reviewer_is_reported_and_matchmaker_lists_all_critics(gateway):
+    result = asyncio.run(client().multicast("", "PROPOSAL", {}, targets=["broken", "safety"], quorum="any"))
+    assert result["quorum_met"] and result["errors"] == {"broken": "reviewer crashed"}
+
+    need = "Verify flight safety and stability; simulation sanity check"
+    assert matchmaker.find_agents(need) == ["engineering-flightcontrol-v1", "drone-quick-sim-v1"]
+    assert matchmaker.find_best_agent("Verify flight safety and stability") == "engineering-flightcontrol-v1"
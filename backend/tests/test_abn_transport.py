@@ -0,0 +1,216 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from agent_registry import registry, run_scopes
+from lib.abn_client import ABNClient, ChannelPool
+from lib.abn_mailbox import MailboxRouter
+from lib.abn_transport import HTTPTransport, InProcessTransport, RemoteCoreRegistry, transport_from_env, remote_cores
+from lib.auth import create_task_token, create_abn_token, create_core_token
+from lib.blob_store import BlobStore, blob_ref, is_blob_ref
+from routers import gateway, orchestrator
+
+
+class EchoCore:
+    def __init__(self, agent_id):
+        self.agent_id = agent_id
+        self.received = []
+
+    async def handle_abn_message(self, envelope):
+        self.received.append(envelope)
+        return {"echo": envelope.get("n"), "seq": envelope.get("seq")}
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(gateway.write_behind, "insert", lambda table, row: None)
+    app = FastAPI()
+    app.include_router(orchestrator.router)
+    app.include_router(gateway.router)
+    cores = []
+
+    def host(core_id):
+        core = EchoCore(f"{core_id}-{uuid.uuid4().hex[:8]}")
+        registry.register(core)
+        cores.append(core.agent_id)
+        return core
+
+    app.state.host = host
+    yield app
+    for core_id in cores:
+        registry._agents.pop(core_id, None)
+
+
+def test_http_transport_pipelines_messages_over_keepalive(app):
+    core = app.state.host("echo")
+    transport = HTTPTransport("http://gateway", client_transport=httpx.ASGITransport(app=app))
+    client = ABNClient("remote-origin", create_task_token(f"task-{uuid.uuid4()}", ["remote-origin"]),
+                       pool=ChannelPool(), transport=transport)
+
+    async def scenario():
+        await client.open_channel(core.agent_id)
+        futures = [await client.post_message(core.agent_id, "PROPOSAL", {"n": n}) for n in range(3)]
+        replies = await asyncio.gather(*futures)
+        await transport.close()
+        return replies
+
+    replies = asyncio.run(scenario())
+    assert [r["echo"] for r in replies] == [0, 1, 2]
+    assert [e["seq"] for e in core.received] == [1, 3, 5]
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner):
+        self.inner = inner
+        self.requests = []
+
+    async def handle_async_request(self, request):
+        self.requests.append((request.method, request.url.path, await request.aread()))
+        return await self.inner.handle_async_request(request)
+
+
+def test_http_transport_uploads_large_fields_and_sends_references(app, tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path))
+    monkeypatch.setattr(gateway, "blob_store", store)
+    core = app.state.host("big")
+    wire = RecordingTransport(httpx.ASGITransport(app=app))
+    transport = HTTPTransport("http://gateway", client_transport=wire, inline_limit=64)
+    client = ABNClient("remote-origin", create_task_token(f"task-{uuid.uuid4()}", ["remote-origin"]),
+                       pool=ChannelPool(), transport=transport)
+    code = "def lift(v):\n    return v * v\n" * 50
+
+    async def scenario():
+        await client.open_channel(core.agent_id)
+        for n in range(2):
+            await client.send_message(core.agent_id, "ARTIFACT_REF", {"n": n, "code": code})
+        await transport.close()
+
+    asyncio.run(scenario())
+    assert [e["code"] for e in core.received] == [code, code]
+    uploads = [r for r in wire.requests if r[0] == "PUT"]
+    assert len(uploads) == 1 and uploads[0][2] == code.encode()
+    posted = [r[2] for r in wire.requests if r[1].endswith("/messages")]
+    assert all(code.encode() not in body and b'"$blob"' in body for body in posted)
+
+
+def test_remote_core_forwards_with_a_deliver_scoped_token(app):
+    core = app.state.host("far")
+    remote = RemoteCoreRegistry().register(core.agent_id, "http://host-b",
+                                           client_transport=httpx.ASGITransport(app=app))
+    envelope = {"channel_id": "ch-9", "origin_core": "a", "target_core": core.agent_id, "msg_type": "PROPOSAL", "n": 7}
+    assert asyncio.run(remote.handle_abn_message(envelope))["echo"] == 7
+
+    # The task id travels with the forwarded message: the host's run instance answers
+    task_id = f"run-{uuid.uuid4()}"
+    run_core = EchoCore(core.agent_id)
+    run_scopes.open(task_id, {core.agent_id: run_core})
+    try:
+        asyncio.run(remote.handle_abn_message(dict(envelope), task_id=task_id))
+    finally:
+        run_scopes.close(task_id)
+    assert len(run_core.received) == 1 and len(core.received) == 1
+
+    async def forged():
+        # A sender's own, valid channel token for this very channel is not a delivery token
+        token = create_abn_token("ch-9", "a", core.agent_id, 1, ["PROPOSAL"])
+        return await remote.http.request("POST", "/abn/deliver", json=envelope, headers={"Authorization": token})
+
+    with pytest.raises(Exception) as e:
+        asyncio.run(forged())
+    assert e.value.status_code == 403
+
+    # A core known only by endpoint is resolved to its RemoteCore by the mailboxes
+    remote_cores.register("core-elsewhere", "http://host-c")
+    try:
+        assert MailboxRouter().mailbox("core-elsewhere").handler.__self__ is remote_cores.get("core-elsewhere")
+    finally:
+        remote_cores.unregister("core-elsewhere")
+
+
+def test_in_process_transport_hands_payloads_over_without_serializing(app, monkeypatch):
+    monkeypatch.delenv("ABN_GATEWAY_URL", raising=False)
+    assert isinstance(transport_from_env(), InProcessTransport)
+    monkeypatch.setenv("ABN_GATEWAY_URL", "http://gateway:8000")
+    assert isinstance(transport_from_env(), HTTPTransport)
+
+    core = app.state.host("local")
+    artifact = {"mesh": [1, 2, 3]}
+    client = ABNClient("origin", create_task_token(f"task-{uuid.uuid4()}", ["origin"]),
+                       pool=ChannelPool(), transport=InProcessTransport())
+
+    async def scenario():
+        await client.open_channel(core.agent_id)
+        return await client.send_message(core.agent_id, "ARTIFACT_REF", {"artifact": artifact})
+
+    asyncio.run(scenario())
+    assert core.received[0]["artifact"] is artifact
+
+
+@pytest.mark.parametrize("kind", ["in-process", "http"])
+def test_seq_of_a_message_rejected_before_queuing_is_given_back(app, kind):
+    core = app.state.host(kind)
+    transport = (InProcessTransport() if kind == "in-process"
+                 else HTTPTransport("http://gateway", client_transport=httpx.ASGITransport(app=app)))
+    client = ABNClient("origin", create_task_token(f"task-{uuid.uuid4()}", ["origin"]),
+                       pool=ChannelPool(), transport=transport)
+    missing = blob_ref("0" * 64, 10, "application/json")
+
+    async def scenario():
+        await client.open_channel(core.agent_id)
+        budget = client.lease.budget
+        with pytest.raises(HTTPException) as rejected:
+            await client.send_message(core.agent_id, "PROPOSAL", {"code": missing})
+        assert rejected.value.status_code == 422
+        with pytest.raises(HTTPException):
+            await client.send_batch(core.agent_id, [("PROPOSAL", {"n": 0}), ("PROPOSAL", {"code": missing})])
+        assert client.lease.budget == budget
+        # Seq 1 is still free, so this is handled at once instead of after the gap timeout
+        reply = await asyncio.wait_for(client.send_message(core.agent_id, "PROPOSAL", {"n": 1}), timeout=1)
+        await transport.close()
+        return reply
+
+    assert asyncio.run(scenario()) == {"echo": 1, "seq": 1}
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def upsert(self, row):
+        self.rows.append(row)
+        return self
+
+    def execute(self):
+        return None
+
+
+def test_registering_an_endpoint_needs_the_cores_own_token(app, monkeypatch):
+    rows = []
+    monkeypatch.setattr(orchestrator, "supabase", type("FakeSupabase", (), {"table": lambda self, name: FakeTable(rows)})())
+    monkeypatch.setattr(orchestrator, "REMOTE_CORE_HOSTS", {"host-b"})
+    http = TestClient(app)
+    core_id = f"core-{uuid.uuid4().hex[:8]}"
+    req = {"core_id": core_id, "public_key_pem": "pem", "endpoint": "http://host-b:9000"}
+
+    try:
+        assert http.post("/cores/register", json=req).status_code == 401
+        other = create_core_token("someone-else")
+        assert http.post("/cores/register", json=req, headers={"Authorization": other}).status_code == 403
+        task = create_task_token("t", [core_id])
+        assert http.post("/cores/register", json=req, headers={"Authorization": task}).status_code == 403
+        token = create_core_token(core_id)
+        elsewhere = dict(req, endpoint="http://attacker.example")
+        assert http.post("/cores/register", json=elsewhere, headers={"Authorization": token}).status_code == 403
+        assert rows == [] and remote_cores.get(core_id) is None
+
+        assert http.post("/cores/register", json=req, headers={"Authorization": token}).status_code == 200
+        assert remote_cores.get(core_id).http.base_url == "http://host-b:9000"
+        # Registering only a public key needs no endpoint authorization
+        plain = {"core_id": f"core-{uuid.uuid4().hex[:8]}", "public_key_pem": "pem"}
+        assert http.post("/cores/register", json=plain).status_code == 200
+    finally:
+        remote_cores.unregister(core_id)
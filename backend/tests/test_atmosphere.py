@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from lib.atmosphere import isa, density_ratio, SEA_LEVEL_DENSITY
+from lib.drone_physics import FallbackPAVPhysics, VectorPAVPhysics, RHO_STD
+from lib.tools.propulsion_optimizer import PropulsionOptimizerTool
+
+
+def test_isa_reference_values():
+    sl = isa(0.0)
+    assert float(sl["density_slug_ft3"]) == pytest.approx(0.0023769, rel=1e-4)
+    assert float(sl["speed_of_sound_fts"]) == pytest.approx(1116.45, rel=1e-4)
+
+    h10k = isa(10000.0)
+    assert float(h10k["pressure_psf"]) == pytest.approx(1455.6, rel=1e-3)
+    assert float(h10k["temperature_f"]) == pytest.approx(23.34, abs=0.05)
+    assert float(isa(40000.0)["temperature_f"]) == pytest.approx(-69.7, abs=0.01)
+
+
+def test_hot_day_lowers_density_at_constant_pressure():
+    hot = isa(5000.0, 30.0)
+    std = isa(5000.0)
+    assert float(hot["pressure_psf"]) == pytest.approx(float(std["pressure_psf"]))
+    assert float(hot["density_slug_ft3"]) < float(std["density_slug_ft3"])
+
+
+def test_physics_density_is_altitude_and_temperature_aware():
+    assert FallbackPAVPhysics.get_air_density() == pytest.approx(RHO_STD)
+    assert FallbackPAVPhysics.get_air_density(10000) == pytest.approx(RHO_STD * 0.7385, rel=1e-3)
+
+    alts = np.array([0.0, 5000.0, 10000.0])
+    temps = np.array([[59.0], [95.0]])
+    vec = VectorPAVPhysics.get_air_density(alts, temps)
+    assert vec.shape == (2, 3)
+    for r, t in enumerate(temps[:, 0]):
+        for c, h in enumerate(alts):
+            assert vec[r, c] == pytest.approx(FallbackPAVPhysics.get_air_density(h, t))
+    np.testing.assert_allclose(density_ratio(alts), [1.0, 0.8617, 0.7385], rtol=1e-3)
+
+
+def test_temperature_is_ambient_at_altitude():
+    # The ISA temperature at 10,000 ft is 23.3 degF: passing it is a standard day
+    std = isa(10000.0)
+    assert FallbackPAVPhysics.get_air_density(10000, float(std["temperature_f"])) == \
+        pytest.approx(FallbackPAVPhysics.get_air_density(10000))
+    # 59 degF ambient at 10,000 ft: ISA pressure, warmer air, lower density
+    hot = FallbackPAVPhysics.get_air_density(10000, 59.0)
+    expected = float(std["pressure_psf"]) / (1716.49 * (59.0 + 459.67))
+    assert hot == pytest.approx(RHO_STD * expected / SEA_LEVEL_DENSITY)
+    assert PropulsionOptimizerTool(altitude_ft=10000, temp_f=59.0).sigma == pytest.approx(hot / RHO_STD)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from lib.tools.battery_model import BatteryModel, pack_arrays
+
+
+def test_light_load_matches_ideal_capacity_estimate():
+    # Far below 1C and with negligible sag the model reduces to usable Ah / I
+    model = BatteryModel(peukert=1.0, sag_at_rated_v=1e-6, soc_steps=64)
+    res = model.evaluate(5000, 50, 4, 20.0)
+    mean_v = 4 * (model.v_empty + (model.v_full - model.v_empty) * model.soc).mean()
+    assert res["flight_time_min"] == pytest.approx(0.8 * 5.0 * mean_v / 20.0 * 60.0, rel=1e-3)
+    assert res["current_headroom"] > 100
+
+
+def test_peukert_and_sag_shorten_flight_time():
+    ideal = BatteryModel(peukert=1.0, sag_at_rated_v=1e-6).evaluate(1300, 30, 6, 400.0)
+    real = BatteryModel().evaluate(1300, 30, 6, 400.0)
+    assert real["flight_time_min"] < ideal["flight_time_min"]
+    assert real["peak_current_a"] > ideal["peak_current_a"]
+
+
+def test_inventory_broadcast_and_power_profile():
+    packs = pack_arrays([
+        {"capacity_mah": 1300, "c_rating": 130, "voltage": "6S"},
+        {"capacity_mah": 1500, "c_rating": 20, "voltage": "4S"},
+    ])
+    np.testing.assert_array_equal(packs["cells"], [6, 4])
+    # (pack, profile) grid: a hover phase plus a zero-weight full-power check
+    power = np.array([[[150.0, 800.0]], [[150.0, 800.0]]])
+    res = BatteryModel().evaluate(packs["capacity_mah"][:, None], packs["c_rating"][:, None],
+                                  packs["cells"][:, None], power, weights=[1.0, 0.0])
+    assert res["flight_time_min"].shape == (2, 1)
+    assert res["current_headroom"][0, 0] > 0      # 169 A pack handles the 800 W burst
+    assert res["current_headroom"][1, 0] < 0      # 30 A pack cannot, so it is not flyable at all
+    assert not res["feasible"][1, 0] and res["flight_time_min"][1, 0] == 0.0
+    hover_only = BatteryModel().evaluate(1300, 130, 6, 150.0)
+    assert res["flight_time_min"][0, 0] == pytest.approx(float(hover_only["flight_time_min"]))
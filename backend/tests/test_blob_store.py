@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from lib.blob_store import BlobStore, is_blob_ref
+from routers import gateway
+
+
+def test_identical_payloads_are_stored_once_compressed_and_verified(tmp_path):
+    store = BlobStore(str(tmp_path))
+    code = ("def thrust(n):\n    return n * 9.81\n" * 400).encode()
+    first, again = store.put(code), store.put(code)
+    assert first["hash"] == again["hash"] and again["deduplicated"]
+    assert first["stored_bytes"] < len(code) / 10
+    assert store.get(first["hash"]) == code
+
+    blob = os.path.join(str(tmp_path), first["path"])
+    with open(blob, "wb") as f:
+        f.write(store._compress(b"tampered"))
+    with pytest.raises(ValueError, match="integrity"):
+        store.get(first["hash"])
+
+
+def test_large_fields_become_references_and_resolve_back(tmp_path):
+    store = BlobStore(str(tmp_path), inline_limit=64)
+    envelope = {"seq": 1, "msg_type": "REVIEW_REQUEST", "code": "x = 1\n" * 100,
+                "spec": {"rows": list(range(50))}, "note": "short"}
+    message = store.externalize(envelope)
+    assert is_blob_ref(message["code"]) and is_blob_ref(message["spec"])
+    assert message["note"] == "short" and message["seq"] == 1
+    assert store.materialize(message) == envelope
+
+    payload_hash, payload_path = store.message_ref(message)
+    assert payload_path and store.exists(payload_hash)
+    assert store.message_ref({"seq": 3, "note": "short"})[1] is None
+
+
+def test_presigned_upload_and_download(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path))
+    monkeypatch.setattr(gateway, "blob_store", store)
+    app = FastAPI()
+    app.include_router(gateway.router)
+    http = TestClient(app)
+
+    upload = store.upload_url("ch-1")
+    stored = http.put(upload, content=b"generated code").json()
+    assert stored["hash"] == store.digest(b"generated code")
+    assert http.get(stored["download_url"]).content == b"generated code"
+
+    assert http.put(upload.replace("ch-1", "ch-2"), content=b"x").status_code == 403
+    assert http.get(f"/abn/blobs/{stored['hash']}?expires=9999999999&signature=forged").status_code == 403
+
+
+def test_uploads_are_streamed_and_size_capped(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path), max_upload_bytes=1024)
+    monkeypatch.setattr(gateway, "blob_store", store)
+    app = FastAPI()
+    app.include_router(gateway.router)
+    http = TestClient(app)
+    upload = store.upload_url("ch-1")
+
+    assert http.put(upload, content=b"x" * 2048).status_code == 413
+    chunked = http.put(upload, content=iter([b"y" * 600, b"y" * 600]))
+    assert chunked.status_code == 413
+    assert os.listdir(os.path.join(str(tmp_path), "tmp")) == []
+
+    stored = http.put(upload, content=iter([b"a" * 500, b"b" * 500])).json()
+    assert store.get(stored["hash"]) == b"a" * 500 + b"b" * 500
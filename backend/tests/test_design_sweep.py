@@ -0,0 +1,84 @@
+import numpy as np
+
+from lib.drone_physics import FallbackPAVPhysics, MPH_TO_FTS, RHO_STD
+from lib.tools import design_sweep
+from lib.tools.design_sweep import DesignSweepTool
+
+
+def _scalar_power(w, s, ar, v_mph):
+    drag = FallbackPAVPhysics.calc_drag(w, RHO_STD, v_mph * MPH_TO_FTS, s, ar, 0.8, 0.02, 15.0)
+    return FallbackPAVPhysics.calc_cruise_power_kw(drag, v_mph * MPH_TO_FTS)
+
+
+def test_sweep_matches_scalar_physics_and_finds_min_power_speed():
+    speeds = np.linspace(5, 120, 24)
+    res = DesignSweepTool(chunk_points=50).sweep(speeds, [8.0, 12.0], [4.0, 6.0], [6.0, 9.0])
+    assert res["shape"] == [2, 2, 2, 1, 24]
+
+    power = res["curves"]["power_kw"]
+    for i, w in enumerate([8.0, 12.0]):
+        for j, s in enumerate([4.0, 6.0]):
+            for k, ar in enumerate([6.0, 9.0]):
+                expected = [_scalar_power(w, s, ar, v) for v in speeds]
+                got = [np.inf if p is None else p for p in power[i][j][k][0]]
+                np.testing.assert_allclose(got, expected)
+                best = int(np.argmin(expected))
+                assert res["min_power_speed_mph"][i][j][k][0] == speeds[best]
+
+    # Below 10 ft/s the scalar model reports infinite drag -> serialized as None
+    assert power[0][0][0][0][0] is None
+    assert res["optimum"]["weight_lbs"] == 8.0
+
+
+def test_large_sweeps_use_process_pool_and_skip_curves():
+    tool = DesignSweepTool(chunk_points=1000, parallel_threshold=10_000, max_curve_points=1000, max_workers=2)
+    res = tool.sweep(np.linspace(20, 120, 50), np.linspace(5, 20, 10), np.linspace(3, 8, 10), [8.0], [0.0, 5000.0])
+    assert res["points"] == 10_000
+    assert "curves" not in res and "curves_omitted" in res
+    assert np.isfinite(np.array(res["min_power_kw"], dtype=float)).all()
+
+    # The worker pool outlives the request
+    pool = design_sweep._pools[2]
+    tool.sweep(np.linspace(20, 120, 50), np.linspace(5, 20, 10), np.linspace(3, 8, 10), [8.0], [0.0, 5000.0])
+    assert design_sweep._pools[2] is pool
+
+
+def test_optima_grid_is_downsampled_but_optimum_is_exact():
+    weights, areas = np.linspace(5, 20, 40), np.linspace(3, 8, 30)
+    full = DesignSweepTool().sweep([30.0, 60.0, 90.0], weights, areas, [8.0])
+    res = DesignSweepTool(max_grid_points=100).sweep([30.0, 60.0, 90.0], weights, areas, [8.0])
+
+    grid = np.array(res["min_power_kw"], dtype=float)
+    assert grid.size <= 100 and res["grid"]["strides"][:2] == [4, 3]
+    np.testing.assert_allclose(grid, np.array(full["min_power_kw"], dtype=float)[::4, ::3])
+    assert res["optimum"] == full["optimum"] and "grid" not in full
+
+
+def test_sweep_endpoint(client):
+    response = client.post("/physics/sweep", json={
+        "speed_mph": {"start": 20, "stop": 100, "num": 5},
+        "weight_lbs": {"values": [10]},
+        "wing_area_ft2": {"values": [5]},
+        "aspect_ratio": {"values": [8]},
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["axes"]["speed_mph"] == [20, 40, 60, 80, 100]
+    assert body["optimum"]["speed_mph"] in body["axes"]["speed_mph"]
+
+
+def test_sweep_endpoint_rejects_oversized_ranges_before_expanding(client):
+    response = client.post("/physics/sweep", json={
+        "speed_mph": {"start": 20, "stop": 100, "num": 10**9},
+        "weight_lbs": {"values": [10]},
+        "wing_area_ft2": {"values": [5]},
+        "aspect_ratio": {"values": [8]},
+    })
+    assert response.status_code == 422
+
+    axis = {"start": 1, "stop": 10, "num": 1000}
+    response = client.post("/physics/sweep", json={
+        "speed_mph": axis, "weight_lbs": axis, "wing_area_ft2": axis, "aspect_ratio": {"values": [8]},
+    })
+    assert response.status_code == 422
+    assert "limit" in response.text
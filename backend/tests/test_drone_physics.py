@@ -0,0 +1,47 @@
+import numpy as np
+
+from lib.drone_physics import FallbackPAVPhysics as Scalar, VectorPAVPhysics as Vector
+
+
+def _scalar_grid(fn, *arrays):
+    flat = np.broadcast_arrays(*arrays)
+    with np.errstate(divide="ignore"):
+        return np.array([fn(*args) for args in zip(*(a.ravel().tolist() for a in flat))]).reshape(flat[0].shape)
+
+
+def test_lift_and_drag_match_scalar_including_stall_cases():
+    W = np.array([5.0, 10.0, 40.0])[:, None, None]
+    V = np.array([0.5, 5.0, 9.99, 10.0, 60.0, 150.0])[None, :, None]
+    S = np.array([2.0, 5.0])[None, None, :]
+    rho = 0.002378
+
+    cl = Vector.calc_lift_coefficient(W, rho, V, S)
+    np.testing.assert_allclose(cl, _scalar_grid(lambda w, v, s: Scalar.calc_lift_coefficient(w, rho, v, s), W, V, S))
+
+    drag = Vector.calc_drag(W, rho, V, S, 8.0, 0.8, 0.02, 15.0)
+    expected = _scalar_grid(lambda w, v, s: Scalar.calc_drag(w, rho, v, s, 8.0, 0.8, 0.02, 15.0), W, V, S)
+    np.testing.assert_allclose(drag, expected)
+    assert np.isinf(drag[:, :3]).all()
+
+
+def test_drag_error_paths_become_inf():
+    assert Vector.calc_drag(10.0, 0.002378, 50.0, 5.0, 0.0, 0.8, 0.02, 15.0) == np.inf
+    assert Vector.calc_drag(0.0, 0.002378, 50.0, 5.0, 8.0, 0.8, 0.02, 15.0) == np.inf
+
+
+def test_power_and_pressure_match_scalar():
+    W = np.append(np.linspace(1, 50, 7), -5.0)
+    Ae = np.array([-1.0, 0.0, 0.5, 2.0])[:, None]
+    hover = Vector.calc_hover_power_kw(W, Ae, 0.7, 0.93)
+    np.testing.assert_allclose(hover, _scalar_grid(lambda w, a: Scalar.calc_hover_power_kw(w, a), W, Ae))
+    # Negative weight or disc area is infeasible in both versions (not nan / complex)
+    assert np.isinf(hover[:, -1]).all() and np.isinf(hover[0]).all()
+    assert Scalar.calc_hover_power_kw(np.float64(-5.0), 2.0) == float("inf")
+
+    eta = np.array([-0.1, 0.0, 0.8])
+    np.testing.assert_allclose(
+        Vector.calc_cruise_power_kw(3.0, 88.0, eta),
+        [Scalar.calc_cruise_power_kw(3.0, 88.0, e) for e in eta]
+    )
+    assert Vector.calc_dynamic_pressure(0.002378, 100.0) == Scalar.calc_dynamic_pressure(0.002378, 100.0)
+    assert np.ndim(Vector.calc_hover_power_kw(10.0, 2.0)) == 0
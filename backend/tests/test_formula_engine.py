@@ -0,0 +1,59 @@
+import asyncio
+import os
+
+import pytest
+
+from lib.knowledge_base import KnowledgeBase
+from lib.tools.formula_engine import Formula, FormulaEngine
+
+KB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge", "classical_mechanics_formulas.json")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return FormulaEngine.build(KnowledgeBase(KB_PATH).data)
+
+
+def test_implicit_products_are_parsed():
+    f = Formula("Third", "kinematics", "v^2 = u^2 + 2as", ["v", "u", "a", "s"])
+    assert set(f.symbols) == {"v", "u", "a", "s"}
+    assert f.evaluate("v", {"u": 0.0, "a": 2.0, "s": 25.0})[0] == pytest.approx(10.0)
+
+
+def test_direct_and_chained_solutions(engine):
+    assert engine.solve("v", {"u": 0, "a": 2, "t": 5})["value"] == pytest.approx(10.0)
+    # Non-negative root of the quadratic in t
+    assert engine.solve("t", {"u": 0, "a": 2, "s": 25})["value"] == pytest.approx(5.0)
+
+    chained = engine.solve("KE", {"m": 2, "u": 0, "a": 2, "t": 5})
+    assert chained["value"] == pytest.approx(100.0)
+    assert [s["solved_for"] for s in chained["steps"]] == ["v", "KE"]
+
+    # g comes from the KB default (gravity ~ 9.81)
+    assert engine.solve("W", {"m": 2})["value"] == pytest.approx(19.62)
+    assert engine.solve("PE", {"m": 2}) is None
+    assert engine.solve("KE", {"m": 2, "v": 3})["unit"] == "Joules"
+    assert engine.solve("t", {"u": 0, "a": 2, "v": 10})["unit"] is None
+
+
+def test_batched_inputs_and_aliases(engine):
+    res = engine.solve("v", {"u": 0, "a": [2.0, -2.0, 1.0], "s": 25})
+    assert res["value"][0] == pytest.approx(10.0) and res["value"][1] is None
+    assert engine.canonical("initial_velocity") == "u"
+    assert engine.identify_unknown("A ball is dropped. What is the kinetic energy at impact?") == "KE"
+
+
+def test_agent_answers_without_llm(monkeypatch):
+    from agents.physics import classical_mechanics_agent as module
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+
+    monkeypatch.setattr(module, "call_llm", no_llm)
+    agent = module.ClassicalMechanicsAgent("test-run")
+    context = {"objective": "A car starts from rest and accelerates for 5 s. Find the final velocity.",
+               "inputs": {"initial_velocity": 0, "acceleration": 2, "time": 5}}
+    result = asyncio.run(agent._execute({}, context))
+    assert result["method"] == "symbolic"
+    # Unit as annotated in the KB ("v (m/s)")
+    assert result["final_answer"] == {"value": 10.0, "unit": "m/s", "variable": "v"}
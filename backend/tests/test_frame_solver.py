@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+from lib.knowledge_base import KnowledgeBase
+from lib.tools.frame_solver import (
+    DOF_PER_NODE, FrameSolver, FrameStressTool, multirotor_frame, parse_load_case, rectangular_section
+)
+
+KB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge", "drone_simulation.json")
+
+
+def test_cantilever_matches_beam_theory_in_both_planes():
+    L, F, E = 0.2, 5.0, 2.0e9
+    section = rectangular_section(0.02, 0.01, E)
+    nodes = np.stack([np.linspace(0, L, 6), np.zeros(6), np.zeros(6)], axis=1)
+    elements = np.stack([np.arange(5), np.arange(1, 6)], axis=1)
+    solver = FrameSolver(nodes, elements, section, supports=[0])
+
+    loads = np.zeros((solver.ndof, 2))
+    tip = 5 * DOF_PER_NODE
+    loads[tip + 2, 0] = F  # vertical
+    loads[tip + 1, 1] = F  # lateral
+    res = solver.solve(loads)
+
+    u = res["displacements"]
+    assert u[tip + 2, 0] == pytest.approx(F * L**3 / (3 * E * section["Iy"]))
+    assert u[tip + 1, 1] == pytest.approx(F * L**3 / (3 * E * section["Iz"]))
+    # Root bending stress M c / I
+    assert res["von_mises_pa"][0, 0] == pytest.approx(F * L * section["c_z"] / section["Iy"])
+
+
+def test_batched_solve_equals_individual_solves():
+    frame = multirotor_frame(rotor_count=6, arm_length_m=0.15, segments=3)
+    solver = FrameSolver(frame["nodes"], frame["elements"], rectangular_section(0.012, 0.008, 2.1e9), frame["supports"])
+    rng = np.random.default_rng(0)
+    loads = rng.normal(size=(solver.ndof, 4))
+    batched = solver.solve(loads)["von_mises_pa"]
+    for c in range(4):
+        np.testing.assert_allclose(batched[:, c], solver.solve(loads[:, c])["von_mises_pa"][:, 0])
+
+
+def test_kb_load_cases_are_parsed_and_solved():
+    cases = KnowledgeBase(KB_PATH).search("load_cases")
+    kinds = [parse_load_case(c)["kind"] for c in cases]
+    assert kinds == ["thrust", "load_factor", "aero", "impact"]
+
+    res = FrameStressTool().run(cases)
+    assert len(res["cases"]) == 4
+    hover, accel = res["cases"][0], res["cases"][1]
+    assert hover["max_deflection_mm"] == pytest.approx(hover["beam_theory_deflection_mm"])
+    assert accel["tip_force_n"] == pytest.approx(0.613 * 5.2)
+
+    # The crash case is reported but does not drive the verdict
+    assert res["cases"][3]["gating"] is False
+    assert res["governing_case"] == "Maximum Acceleration"
+    assert res["passed"]
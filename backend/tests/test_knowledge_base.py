@@ -0,0 +1,214 @@
+import copy
+import json
+import os
+import pickle
+import threading
+import time
+
+import pytest
+
+from lib.knowledge_base import FragmentCache, KnowledgeBase, kb_registry
+
+
+def _write_kb(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+@pytest.fixture
+def kb_file(tmp_path):
+    path = tmp_path / "parts.json"
+    _write_kb(path, {
+        "motors": [
+            {"id": "m1", "name": "T-Motor F40 PRO IV", "kv": 1950, "max_thrust_g": 1400, "tags": ["racing"]},
+            {"id": "m2", "name": "Emax ECO II 2207", "kv": 2400, "max_thrust_g": 1600, "tags": ["budget"]},
+        ]
+    })
+    yield str(path)
+    kb_registry.invalidate(str(path))
+
+
+def test_instances_share_one_parsed_snapshot(kb_file):
+    a = KnowledgeBase(kb_file)
+    b = KnowledgeBase(kb_file)
+    assert a.data is b.data
+    assert a.search("motors")[0]["id"] == "m1"
+
+
+def test_snapshot_is_read_only(kb_file):
+    kb = KnowledgeBase(kb_file)
+    with pytest.raises(TypeError):
+        kb.data["motors"][0]["kv"] = 1
+    with pytest.raises(TypeError):
+        kb.data["motors"].append({})
+    # Results are still plain JSON for prompt building
+    assert json.loads(json.dumps(kb.search("motors")))[1]["tags"] == ["budget"]
+
+
+def test_snapshot_items_copy_and_pickle_as_plain_data(kb_file):
+    item = KnowledgeBase(kb_file).data["motors"][1]
+    for clone in (copy.copy(item), copy.deepcopy(item), pickle.loads(pickle.dumps(item))):
+        assert clone == item and type(clone) is dict
+        clone["kv"] = 1
+    deep = copy.deepcopy(item)
+    assert type(deep["tags"]) is list
+    deep["tags"].append("mutable")
+    assert type(pickle.loads(pickle.dumps(item))["tags"]) is list
+    assert "mutable" not in item["tags"]
+
+
+def test_slow_derived_builds_do_not_block_other_keys(kb_file):
+    snapshot = KnowledgeBase(kb_file).snapshot
+    release, calls = threading.Event(), []
+
+    def slow():
+        calls.append("slow")
+        release.wait(2.0)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(snapshot.derived(("slow-test",), slow)))
+               for _ in range(2)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 2.0
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.005)
+    # Another key is served while the slow build is still running
+    assert snapshot.derived(("fast-test",), lambda: 42) == 42
+    release.set()
+    for t in threads:
+        t.join(2.0)
+    assert calls == ["slow"] and len(results) == 2 and results[0] is results[1]
+
+
+def test_reloads_when_file_changes(kb_file):
+    kb = KnowledgeBase(kb_file)
+    first = kb.snapshot
+    _write_kb(kb_file, {"motors": [{"id": "m9", "name": "New Motor"}]})
+    st = os.stat(kb_file)
+    os.utime(kb_file, ns=(st.st_atime_ns, first.mtime_ns + 1_000_000))
+    assert kb.snapshot is not first
+    assert kb.search("motors")[0]["id"] == "m9"
+
+
+def test_touch_without_content_change_keeps_snapshot(kb_file):
+    kb = KnowledgeBase(kb_file)
+    first = kb.snapshot
+    st = os.stat(kb_file)
+    os.utime(kb_file, ns=(st.st_atime_ns, first.mtime_ns + 1_000_000))
+    assert kb.snapshot is first
+
+
+def test_search_query_filters_by_value_text(kb_file):
+    kb = KnowledgeBase(kb_file)
+    assert [m["id"] for m in kb.search("motors", "emax")] == ["m2"]
+    assert [m["id"] for m in kb.search("motors", "RACING")] == ["m1"]
+    assert kb.search("missing") == []
+
+
+def test_missing_file_is_empty(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "nope.json"))
+    assert kb.get_categories() == []
+
+
+def test_indexed_search_matches_substring_scan(tmp_path):
+    words = ["motor", "t-motor", "2207", "5-inch", "long-range", "racing", "ECO II", "x", "pro iv"]
+    items = []
+    for i in range(200):
+        items.append({
+            "id": f"p{i}",
+            "name": f"{words[i % len(words)]} {words[(i * 7) % len(words)]}",
+            "kv": 1000 + i,
+            "tags": [words[(i * 3) % len(words)]],
+        })
+    path = tmp_path / "catalog.json"
+    _write_kb(path, {"parts": items})
+    kb = KnowledgeBase(str(path))
+
+    queries = ["motor", "otor", "t-mo", "or t", "5-inch", "-inch", "inch ", " ii", "10", "1010", "rang",
+               "racing", "'racing'", "x", "-", " ", "pro iv", "zzz", "eco ii 5"]
+    for q in queries:
+        expected = [it["id"] for it in items if q in " ".join(str(v).lower() for v in it.values())]
+        assert [it["id"] for it in kb.search("parts", q)] == expected, q
+    kb_registry.invalidate(str(path))
+
+
+def test_numeric_range_and_top_k_query(kb_file):
+    kb = KnowledgeBase(kb_file)
+    cols = kb.columns("motors")
+    assert cols.column("kv").tolist() == [1950.0, 2400.0]
+    assert [m["id"] for m in kb.query("motors", where={"max_thrust_g": (1500, None)})] == ["m2"]
+    assert [m["id"] for m in kb.query("motors", order_by="kv", descending=True, limit=1)] == ["m2"]
+    # Unknown fields never match a range
+    assert kb.query("motors", where={"yield_strength_mpa": (0, None)}) == []
+
+
+def test_large_catalog_columns_are_memory_mapped(tmp_path, monkeypatch):
+    import numpy as np
+    from lib import kb_columns
+    monkeypatch.setattr(kb_columns, "MMAP_MIN_ITEMS", 10)
+    path = tmp_path / "big.json"
+    _write_kb(path, {"motors": [{"id": f"m{i}", "weight_g": 100 - i, "max_thrust_g": 10 * i} for i in range(50)]})
+    kb = KnowledgeBase(str(path))
+    assert isinstance(kb.columns("motors").column("weight_g"), np.memmap)
+    top = kb.query("motors", where={"max_thrust_g": (200, 400)}, order_by="weight_g", limit=3)
+    assert [m["id"] for m in top] == ["m40", "m39", "m38"]
+    kb_registry.invalidate(str(path))
+
+
+def test_fragments_are_cached_until_reload(kb_file):
+    kb = KnowledgeBase(kb_file)
+    first = kb.fragment("motors")
+    assert json.loads(first) == json.loads(json.dumps(kb.search("motors")))
+    assert kb.fragment("motors") is first
+    assert json.loads(kb.fragment("motors", "emax"))[0]["id"] == "m2"
+
+    version = kb.version
+    _write_kb(kb_file, {"motors": [{"id": "m9"}]})
+    st = os.stat(kb_file)
+    os.utime(kb_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert kb.version != version
+    assert json.loads(kb.fragment("motors")) == [{"id": "m9"}]
+
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = FragmentCache(max_items=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None and cache.get("a") == "A" and len(cache) == 2
+    # A concurrent fill of the same key keeps the first text
+    assert cache.put("a", "A2") == "A"
+
+
+def test_semantic_retrieval_ranks_and_respects_budget(tmp_path):
+    path = tmp_path / "formulas.json"
+    _write_kb(path, {
+        "kinematics": [
+            {"name": "First Equation of Motion", "formula": "v = u + at"},
+            {"name": "Third Equation of Motion", "formula": "v^2 = u^2 + 2as"},
+        ],
+        "energy": [
+            {"name": "Kinetic Energy", "formula": "KE = 0.5 * m * v^2"},
+            {"name": "Gravitational Potential Energy", "formula": "PE = m * g * h"},
+        ],
+    })
+    kb = KnowledgeBase(str(path))
+
+    hits = kb.retrieve("potential energy of a mass at height h", k=2)
+    assert hits[0]["item"]["name"] == "Gravitational Potential Energy"
+    assert hits[0]["score"] >= hits[1]["score"]
+
+    only_kinematics = kb.retrieve("kinetic energy", categories=["kinematics"], k=5)
+    assert {h["category"] for h in only_kinematics} == {"kinematics"}
+
+    assert len(kb.retrieve("energy", k=4, token_budget=20)) == 1
+    assert json.loads(kb.retrieve_fragment("kinetic energy", k=1)) == {"energy": [{"name": "Kinetic Energy", "formula": "KE = 0.5 * m * v^2"}]}
+
+    # Embeddings are persisted next to the KB and reused by a fresh snapshot
+    assert list((tmp_path / ".cache").glob("formulas.*.npz"))
+    kb_registry.invalidate(str(path))
+    assert kb.retrieve("potential energy", k=1)[0]["item"]["name"] == "Gravitational Potential Energy"
+    kb_registry.invalidate(str(path))
@@ -0,0 +1,74 @@
+from agent_registry import AgentRegistry, registry
+from lib.matchmaker import AgentMatchmaker
+
+
+class Core:
+    def __init__(self, agent_id, description, keywords):
+        self.agent_id = agent_id
+        self.profile = {"id": agent_id, "name": agent_id, "description": description,
+                        "tools": [], "instructions": [], "keywords": keywords}
+
+    async def handle_abn_message(self, envelope):
+        return None
+
+
+def small_registry():
+    agents = AgentRegistry()
+    agents.register(Core("safety", "Validates stability margins and assesses crash risk.", ["safety", "stabil*"]))
+    agents.register(Core("sim", "Runs fast sanity checks (FEA/CFD) on designs.", ["simulat*", "sanity"]))
+    agents.register(Core("thermal", "Estimates heat soak and cooling of electronics and motors.", []))
+    return agents
+
+
+def test_every_registered_core_is_routable():
+    mm = AgentMatchmaker(registry)
+    assert mm.find_best_agent("Select materials and fasteners for the arms") == "drone-materials-v1"
+    assert mm.find_best_agent("Generate a parametric CAD model") == "drone-cad-v1"
+    assert mm.find_best_agent("Run a simulation of the frame") == "drone-quick-sim-v1"
+    assert mm.find_best_agent("Research datasheets for candidate motors") == "drone-research-v1"
+    assert mm.find_agents("Verify flight safety and stability; simulation sanity check") == \
+        ["engineering-flightcontrol-v1", "drone-quick-sim-v1"]
+    assert mm.find_best_agent("cost estimate") is None
+    # The orchestrator has no ABN handler, so it is never a target
+    assert "hmao.orchestrator" not in mm.index().agent_ids
+
+
+def test_resolved_needs_are_cached_until_the_registry_changes(monkeypatch):
+    agents = small_registry()
+    mm = AgentMatchmaker(agents)
+    index = mm.index()
+    calls = []
+    real_score = index.score
+    monkeypatch.setattr(index, "score", lambda need: calls.append(need) or real_score(need))
+
+    for _ in range(5):
+        assert mm.find_best_agent("Check  SAFETY margins") == "safety"
+    assert mm.find_best_agent("check safety margins") == "safety"
+    assert len(calls) == 1 and mm.hits == 5
+
+    agents.register(Core("safety-2", "Second opinion on flight safety.", ["safety", "flight"]))
+    assert mm.find_best_agent("flight safety review") == "safety-2"
+
+
+def test_needs_without_keywords_fall_back_to_profile_similarity():
+    mm = AgentMatchmaker(small_registry(), min_similarity=0.3)
+    assert mm.find_agents("estimate heat soak and cooling of the electronics") == ["thermal"]
+    assert mm.find_agents("order pizza for the team") == []
+
+
+def test_keywords_match_whole_words_unless_marked_as_stems():
+    mm = AgentMatchmaker(registry)
+    index = mm.index()
+
+    def hit(need):
+        hits, _ = index.score(need)
+        return {index.agent_ids[i] for i in range(len(hits)) if hits[i] > 0}
+
+    # Prefixes of ordinary words are not keyword hits
+    assert "drone-quick-sim-v1" not in hit("is this feasible with the current feature set")
+    assert "drone-cad-v1" not in hit("keep a steady cadence")
+    assert "qa-codereview-v1" not in hit("a qualified quantity") and "qa-codereview-v1" in hit("QA pass")
+    # Whole words, plurals and marked stems still are
+    assert "drone-quick-sim-v1" in hit("FEA of the arms") and "drone-quick-sim-v1" in hit("simulations")
+    assert "drone-cad-v1" in hit("CAD drawings") and "drone-cad-v1" in hit("geometric constraints")
+    assert "engineering-propulsion-v1" in hit("candidate motors and batteries")
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+from lib.knowledge_base import KnowledgeBase
+from lib.tools.monte_carlo import VarianceAnalysisTool, request_seed, safety_limits
+
+KB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge", "safety_regulations.json")
+
+
+@pytest.fixture
+def limits():
+    kb = KnowledgeBase(KB_PATH)
+    return safety_limits(kb.search("stability_margins"), kb.search("environmental_limits"))
+
+
+def test_limits_come_from_safety_kb(limits):
+    assert limits == {"min_thrust_to_weight": 1.5, "min_hover_throttle": 20.0,
+                      "max_hover_throttle": 60.0, "max_wind_m_s": 12.0}
+
+
+def test_zero_tolerance_reproduces_nominal_values(limits):
+    zero = {k: 0.0 for k in ("motor_thrust", "prop", "mass", "arm_length", "cg_offset_m")}
+    res = VarianceAnalysisTool(samples=1000, seed=0).run(4, 1400, 988, limits, tolerances=zero)
+    pct = res["percentiles"]
+    assert pct["thrust_to_weight"]["p1"] == pytest.approx(4 * 1400 / 988, abs=1e-4)
+    assert pct["hover_throttle_percent"]["p99"] == pytest.approx(np.sqrt(988 / 5600) * 100, abs=1e-3)
+    assert res["overall_failure_probability"] == 0.0
+
+
+def test_variance_produces_failure_probabilities_and_verdict(limits):
+    tool = VarianceAnalysisTool(samples=100_000, seed=1)
+    # Nominal hover throttle ~57%: inside the 60% limit, but tolerances push part of the fleet over it
+    res = tool.run(4, 1400, 1800, limits, tolerances={"motor_thrust": 0.08, "mass": 0.05})
+    p = res["failure_probability"]["hover_throttle"]
+    assert 0.01 < p < 0.99
+    assert res["overall_failure_probability"] >= p
+    assert tool.verdict(res["overall_failure_probability"]) in ("MARGINAL", "UNSAFE")
+    assert tool.verdict(0.001) == "SAFE"
+
+
+def test_request_seed_makes_the_verdict_reproducible(limits):
+    combo = {"rotor_count": 4, "max_thrust_per_motor_g": 1400, "all_up_weight_g": 1800}
+    tolerances = {"motor_thrust": 0.08, "mass": 0.05}
+    seed = request_seed(combo, tolerances, limits)
+    assert seed == request_seed(dict(reversed(list(combo.items()))), tolerances, limits)
+    assert seed != request_seed(dict(combo, all_up_weight_g=1801), tolerances, limits)
+
+    tool = VarianceAnalysisTool(samples=20_000)
+    runs = [tool.run(4, 1400, 1800, limits, tolerances=tolerances, seed=seed) for _ in range(2)]
+    assert runs[0]["failure_probability"] == runs[1]["failure_probability"]
+    assert runs[0]["percentiles"] == runs[1]["percentiles"]
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pytest
+
+from lib.knowledge_base import KnowledgeBase
+from lib.tools.prop_performance import PropPerformanceTables
+from lib.tools.propulsion_optimizer import PropulsionOptimizerTool
+
+KNOWLEDGE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge")
+
+
+@pytest.fixture
+def tables():
+    return PropPerformanceTables.from_kb(KnowledgeBase(os.path.join(KNOWLEDGE, "prop_performance.json")))
+
+
+def test_interpolation_hits_nodes_and_scales_with_density(tables):
+    prop = tables.props[0]
+    rpm = prop["rpm"]["start"] + prop["rpm"]["step"] * 10
+    node = tables.interpolate(0, rpm, airspeed_m_s=prop["airspeed_m_s"]["step"])
+    assert node["thrust_g"] == pytest.approx(prop["thrust_g"][1][10])
+    assert node["power_w"] == pytest.approx(prop["power_w"][1][10])
+
+    mid = tables.interpolate(0, rpm + prop["rpm"]["step"] / 2, 0.0, sigma=0.8)
+    expected = 0.8 * (prop["thrust_g"][0][10] + prop["thrust_g"][0][11]) / 2
+    assert mid["thrust_g"] == pytest.approx(expected)
+
+
+def test_operating_point_round_trips_thrust_for_hover_and_cruise(tables):
+    thrust = np.linspace(20, 1400, 200)
+    for table, airspeed, sigma in ((0, 0.0, 1.0), (0, 12.5, 0.85), (1, 22.0, 1.0)):
+        op = tables.operating_point(table, thrust, airspeed, sigma)
+        assert op["feasible"].all()
+        np.testing.assert_allclose(op["thrust_g"], thrust, rtol=1e-9)
+        assert np.all(np.diff(op["rpm"]) > 0) and np.all(np.diff(op["power_w"]) > 0)
+
+    too_much = tables.operating_point(0, [500.0, 5000.0], 0.0, max_rpm=[10_000, 50_000])
+    assert not too_much["feasible"].any()   # RPM ceiling, then beyond the table
+
+
+def test_inventory_operating_points_and_optimizer_use_tables(tables):
+    kb = KnowledgeBase(os.path.join(KNOWLEDGE, "propulsion_db.json"))
+    motors = kb.search("motors") + [{"id": "x", "recommended_prop": "3-inch", "kv": 3000}]
+    op = tables.operating_points(motors, np.array([[300.0], [900.0]]), cells=6)
+    assert op["rpm"].shape == (2, len(motors))
+    assert np.isfinite(op["power_w"][:, :3]).all() and np.isnan(op["power_w"][:, 3]).all()
+    assert op["feasible"][:, :3].all() and not op["feasible"][:, 3].any()
+    # The 7-inch prop hovers the same load more efficiently than the 5-inch
+    assert op["g_per_w"][0, 2] > op["g_per_w"][0, 0]
+
+    res = PropulsionOptimizerTool().optimize(motors[:3], kb.search("escs"), kb.search("batteries"),
+                                             rotor_counts=[4], base_weight_g=600, prop_tables=tables)
+    assert res["front"] and all(c["hover_rpm"] for c in res["front"])
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+from lib.knowledge_base import KnowledgeBase
+from lib.tools.propulsion_optimizer import PropulsionOptimizerTool
+
+KB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "knowledge", "propulsion_db.json")
+
+
+def test_pareto_front_matches_brute_force():
+    rng = np.random.default_rng(3)
+    pts = np.round(rng.random((300, 3)) * 10)  # rounding forces ties and duplicates
+    front = set(PropulsionOptimizerTool.pareto_front(pts).tolist())
+
+    expected = set()
+    for i, p in enumerate(pts):
+        dominated = np.any(np.all(pts >= p, axis=1) & np.any(pts > p, axis=1))
+        if not dominated:
+            expected.add(i)
+    # Exact duplicates collapse to one representative
+    assert {tuple(pts[i]) for i in front} == {tuple(pts[i]) for i in expected}
+    assert len(front) == len({tuple(pts[i]) for i in expected})
+
+    first = PropulsionOptimizerTool.pareto_front(pts, limit=3)
+    assert len(first) == 3 and set(first.tolist()) <= front
+
+
+def test_optimizer_enforces_constraints_on_catalog():
+    kb = KnowledgeBase(KB_PATH)
+    motors, escs, batteries = kb.search("motors"), kb.search("escs"), kb.search("batteries")
+    res = PropulsionOptimizerTool().optimize(motors, escs, batteries, rotor_counts=[4, 6], base_weight_g=800,
+                                             min_thrust_to_weight=2.0)
+    assert res["evaluated"] == len(motors) * len(escs) * len(batteries) * 2
+    assert res["front"]
+    for combo in res["front"]:
+        assert combo["thrust_to_weight"] >= 2.0
+        assert combo["motor_max_current_a"] <= combo["esc_current_a"]
+        assert combo["rotor_count"] * combo["motor_max_current_a"] <= combo["pack_max_current_a"]
+    endurance = [c["endurance_min"] for c in res["front"]]
+    assert endurance == sorted(endurance, reverse=True)
+
+    # The 4S-only motor must never be paired with a 6S pack
+    motor_cells = {m["id"]: m["voltage"] for m in motors}
+    battery_cells = {b["id"]: b["voltage"] for b in batteries}
+    for combo in res["front"]:
+        if motor_cells[combo["motor"]["id"]] == "4S":
+            assert battery_cells[combo["battery"]["id"]] == "4S"
+
+
+def test_motor_chunks_give_the_same_front_as_one_grid():
+    kb = KnowledgeBase(KB_PATH)
+    args = (kb.search("motors"), kb.search("escs"), kb.search("batteries"))
+    whole = PropulsionOptimizerTool().optimize(*args, rotor_counts=[4, 6], base_weight_g=800)
+    chunked = PropulsionOptimizerTool(grid_chunk=1).optimize(*args, rotor_counts=[4, 6], base_weight_g=800)
+    for key in ("front", "evaluated", "feasible"):
+        assert chunked[key] == whole[key]
+
+
+def test_optimizer_returns_empty_front_when_nothing_lifts():
+    kb = KnowledgeBase(KB_PATH)
+    res = PropulsionOptimizerTool().optimize(kb.search("motors"), kb.search("escs"), kb.search("batteries"),
+                                             rotor_counts=[4], base_weight_g=50_000)
+    assert res["front"] == [] and res["feasible"] == 0
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from agent_registry import RunScopes, run_scopes
+from agents.hmao import core as hmao_core
+from agents.hmao.core import DisciplineCore
+from lib.abn_client import ABNClient, ChannelPool
+from lib.abn_transport import InProcessTransport
+from lib.auth import create_task_token
+from routers import gateway
+
+
+class CountingCore(DisciplineCore):
+    def __init__(self, run_id):
+        super().__init__(run_id, "run-scoped-echo")
+
+    async def _plan(self, context):
+        return {}
+
+    async def _execute(self, plan, context):
+        return {}
+
+    async def _validate(self, result, context):
+        return {"passed": True}
+
+
+@pytest.fixture(autouse=True)
+def quiet_transcripts(monkeypatch):
+    monkeypatch.setattr(gateway.write_behind, "insert", lambda table, row: None)
+
+
+def test_messages_reach_the_originating_runs_instances():
+    runs = {task: CountingCore(task) for task in (f"run-{uuid.uuid4()}", f"run-{uuid.uuid4()}")}
+    for task, core in runs.items():
+        run_scopes.open(task, {"echo": core})
+
+    async def negotiate(task, n):
+        client = ABNClient("origin", create_task_token(task, ["origin"]), pool=ChannelPool(),
+                           transport=InProcessTransport())
+        await client.open_channel("run-scoped-echo")
+        return [await client.send_message("run-scoped-echo", "QUESTION", {}) for _ in range(n)]
+
+    async def scenario():
+        first, second = runs
+        await asyncio.gather(negotiate(first, 2), negotiate(second, 3))
+        run_scopes.close(first)
+        # After the run ended nothing of it is reachable (no process-wide core of that name)
+        return await negotiate(first, 1)
+
+    late = asyncio.run(scenario())
+    assert [len(c.trace_log) for c in runs.values()] == [2, 3]
+    assert late == [None]
+    run_scopes.close(list(runs)[1])
+
+
+def test_run_scopes_are_bounded_and_expire(monkeypatch):
+    scopes = RunScopes(max_runs=2, ttl_s=60)
+    for i in range(3):
+        scopes.open(f"t{i}", {"core": object()})
+    assert len(scopes) == 2 and scopes.get("t0", "core") is None
+
+    later = time.monotonic() + 120
+    monkeypatch.setattr("agent_registry.time.monotonic", lambda: later)
+    assert scopes.get("t2", "core") is None and len(scopes) == 1
+
+
+def test_pooled_channels_outlive_a_run_until_they_expire():
+    pool = ChannelPool()
+    task_id = f"run-{uuid.uuid4()}"
+
+    async def open_for(task):
+        client = ABNClient("origin", create_task_token(task, ["origin"]), pool=pool, transport=InProcessTransport())
+        await client.open_channel("run-scoped-echo")
+        return client
+
+    # A continued run of the same task reuses the channel its first run opened
+    first = asyncio.run(open_for(task_id))
+    again = asyncio.run(open_for(task_id))
+    assert again.channel_id == first.channel_id and pool.hits == 1
+
+    # Once the lease's token lifetime runs out, the next run opens a fresh channel
+    first.lease.expires_at = time.time()
+    assert asyncio.run(open_for(task_id)).channel_id != first.channel_id
+    assert len(pool) == 1
+
+
+def test_trace_log_of_a_long_lived_core_stays_bounded(monkeypatch):
+    monkeypatch.setattr(hmao_core, "MAX_TRACE_LOG", 50)
+    core = CountingCore("sys")
+
+    async def flood():
+        for seq in range(200):
+            await core.handle_abn_message({"msg_type": "QUESTION", "origin_core": "a", "seq": seq})
+
+    asyncio.run(flood())
+    assert len(core.trace_log) == 50
+    assert core.trace_log[-1]["content"] == "Received QUESTION from a"
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+
+from lib.data_dir import DATA_DIR
+from lib.write_behind import WriteBehindBuffer, write_behind
+
+
+class FakeClient:
+    """Records bulk inserts as (table, rows); raises while `fail` is set."""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+        self._table = None
+
+    def table(self, name):
+        self._table = name
+        return self
+
+    def insert(self, rows):
+        self._rows = rows
+        return self
+
+    def execute(self):
+        if self.fail:
+            raise ConnectionError("database unreachable")
+        self.calls.append((self._table, list(self._rows)))
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_full_batches_flush_earlier_tables_first_and_preserve_order():
+    client = FakeClient()
+    buf = WriteBehindBuffer(client, max_batch=3, flush_interval_s=60.0)
+    buf.insert("abn_channels", {"channel_id": "ch-1"})
+    for seq in range(7):
+        buf.insert("abn_transcripts", {"seq": seq})
+    assert wait_for(lambda: buf.metrics()["written"] >= 7)
+    # The channel row is neither a full batch nor old enough, but transcripts reference it
+    assert client.calls[0] == ("abn_channels", [{"channel_id": "ch-1"}])
+    buf.stop()
+    assert buf.pending() == 0
+    assert all(len(rows) <= 3 for _, rows in client.calls)
+    assert [c for c in client.calls if c[0] == "abn_channels"] == [("abn_channels", [{"channel_id": "ch-1"}])]
+    assert [r["seq"] for t, rows in client.calls if t == "abn_transcripts" for r in rows] == list(range(7))
+
+
+def test_flushes_by_time():
+    client = FakeClient()
+    buf = WriteBehindBuffer(client, max_batch=100, flush_interval_s=0.02)
+    buf.insert("abn_transcripts", {"seq": 0})
+    assert buf.metrics()["backlog"] <= 1
+    assert wait_for(lambda: client.calls == [("abn_transcripts", [{"seq": 0}])])
+    buf.stop()
+
+
+def test_failed_rows_are_retried_spooled_on_shutdown_and_recovered(tmp_path):
+    spool = str(tmp_path / "spool.jsonl")
+    down = FakeClient(fail=True)
+    buf = WriteBehindBuffer(down, max_batch=10, flush_interval_s=0.01, spool_path=spool)
+    buf.insert("abn_channels", {"channel_id": "ch-1"})
+    buf.insert("abn_transcripts", {"seq": 0})
+    assert wait_for(lambda: buf.metrics()["failed_batches"] >= 2)
+    assert buf.pending() == 2
+    buf.stop()
+    assert buf.metrics()["spooled"] == 2 and buf.pending() == 0
+
+    up = FakeClient()
+    restarted = WriteBehindBuffer(up, max_batch=10, flush_interval_s=0.01, spool_path=spool)
+    restarted.start()
+    assert wait_for(lambda: restarted.metrics()["written"] == 2)
+    restarted.stop()
+    assert restarted.metrics()["recovered"] == 2
+    assert up.calls == [("abn_channels", [{"channel_id": "ch-1"}]), ("abn_transcripts", [{"seq": 0}])]
+
+
+def test_rows_without_a_spool_are_counted_as_dropped(capsys):
+    buf = WriteBehindBuffer(FakeClient(fail=True), max_batch=10, flush_interval_s=0.01)
+    buf.insert_many("abn_transcripts", [{"seq": 1}, {"seq": 3}])
+    buf.stop()
+    assert buf.metrics()["dropped"] == 2 and buf.pending() == 0
+    assert "dropped 2 unwritten rows" in capsys.readouterr().out
+    # The process-wide buffer spools under the backend data dir by default
+    assert os.path.dirname(write_behind.spool_path) == DATA_DIR
+
+
+def test_insert_many_is_written_as_one_bulk_insert():
+    client = FakeClient()
+    buf = WriteBehindBuffer(client, max_batch=10, flush_interval_s=0.01)
+    buf.insert_many("abn_transcripts", [{"seq": s} for s in (1, 3, 5)])
+    assert wait_for(lambda: buf.metrics()["written"] == 3)
+    buf.stop()
+    assert client.calls == [("abn_transcripts", [{"seq": 1}, {"seq": 3}, {"seq": 5}])]
+
+
+def test_backlog_is_drained_by_the_flusher_and_capped(tmp_path):
+    client = FakeClient()
+    threads = []
+    execute = client.execute
+
+    def record_thread():
+        threads.append(threading.current_thread())
+        return execute()
+
+    client.execute = record_thread
+    buf = WriteBehindBuffer(client, max_batch=100, flush_interval_s=60.0, max_backlog=3)
+    buf.insert_many("abn_transcripts", [{"seq": s} for s in range(4)])
+    # Past max_backlog the flusher thread writes; the producer never does
+    assert wait_for(lambda: buf.metrics()["written"] == 4)
+    assert threading.current_thread() not in threads
+    buf.stop()
+
+    # Past the hard cap rows go to the spool instead of memory
+    spool = str(tmp_path / "spool.jsonl")
+    capped = WriteBehindBuffer(FakeClient(fail=True), max_batch=100, flush_interval_s=60.0, max_rows=5,
+                               spool_path=spool)
+    capped.insert_many("abn_transcripts", [{"seq": s} for s in range(4)])
+    capped.insert_many("abn_transcripts", [{"seq": s} for s in range(4, 8)])
+    assert capped.pending() == 5
+    assert capped.metrics()["overflowed"] == 3 and capped.metrics()["spooled"] == 3
+    with open(spool) as f:
+        assert [json.loads(line)["row"]["seq"] for line in f] == [5, 6, 7]
+    capped.stop()
+
+
+def test_preparer_runs_in_the_flusher_and_failed_batches_keep_their_queued_rows():
+    client = FakeClient(fail=True)
+    buf = WriteBehindBuffer(client, max_batch=10, flush_interval_s=60.0)
+    threads = []
+
+    def prepare(row):
+        threads.append(threading.current_thread().name)
+        return {"seq": row["seq"], "payload_hash": f"h{row['raw']}"}
+
+    buf.register_preparer("abn_transcripts", prepare)
+    buf.insert_many("abn_transcripts", [{"seq": 1, "raw": "a"}, {"seq": 3, "raw": "b"}])
+    assert buf.flush() == 0 and buf.pending("abn_transcripts") == 2
+
+    client.fail = False
+    buf.insert_many("abn_transcripts", [{"seq": n, "raw": n} for n in range(5, 21, 2)])
+    assert wait_for(lambda: buf.metrics()["written"] == 10)
+    buf.stop()
+    assert client.calls[0][1][:2] == [{"seq": 1, "payload_hash": "ha"}, {"seq": 3, "payload_hash": "hb"}]
+    assert "write-behind" in threads